@@ -3,12 +3,17 @@ import hashlib
 import hmac
 import time
 import sys
+from copy import copy
 import pytz
 from datetime import datetime
-from typing import Any, Dict, Callable
-from copy import copy
+from typing import Any, Dict, Callable, Optional
 
-from src.bybit_gateway import WebsocketClient
+from src.bybit_gateway.websocket import WebsocketClient
+from src.bybit_gateway.websocket.router import ShardedWebsocketApi, PARTITION_SYMBOL
+from src.bybit_gateway.clock import now_ms
+from src.orderbook import OrderBook
+from src.datatypes import TickData, DepthDelta, TICK_DEPTH, get_price_scale
+from src.constant import OrderStatus
 
 
 REST_HOST = "https://api.bybit.com"
@@ -33,9 +38,9 @@ class Request:
 class BybitWebsocketApi(WebsocketClient):
     """"""
     
-    def __init__(self,):
+    def __init__(self, gateway):
         """"""
-        super().__init__()
+        super().__init__(gateway)
 
 
         self.key = ""
@@ -45,13 +50,22 @@ class BybitWebsocketApi(WebsocketClient):
         self.callbacks: Dict[str, Callable] = {}
         self.subscribed: Dict[str, Request] = {}
 
-        self.symbol_bids: Dict[str, dict] = {}
-        self.symbol_asks: Dict[str, dict] = {}
+        self.ticks: Dict[str, TickData] = {}
+        self.books: Dict[str, OrderBook] = {}
+        self.gaps: int = 0
+
+        # Public topics are spread over these sockets when connected with shards
+        self.market: Optional[BybitMarketDataApi] = None
 
     def connect(
-        self, key: str, secret: str, server: str, proxy_host: str, proxy_port: int
+        self, key: str, secret: str, server: str, proxy_host: str, proxy_port: int,
+        shards: int = 0, partition: str = PARTITION_SYMBOL
     ):
-        """"""
+        """
+        :param shards: number of sockets for public topics, 0 to keep them
+            on the same socket as private topics.
+        :param partition: symbol or class, how topics are spread over shards.
+        """
         self.key = key
         self.secret = secret.encode()
         self.server = server
@@ -61,9 +75,23 @@ class BybitWebsocketApi(WebsocketClient):
         else:
             url = TESTNET_WEBSOCKET_HOST
 
-        self.init(url, self.proxy_host, self.proxy_port)
+        if shards:
+            self.market = BybitMarketDataApi(self)
+            self.market.init(
+                url, shards, partition,
+                ping_interval=20, proxy_host=proxy_host, proxy_port=proxy_port
+            )
+            self.market.start()
+
+        self.init(url, ping_interval=20, proxy_host=proxy_host, proxy_port=proxy_port)
         self.start()
 
+    def stop(self):
+        """"""
+        super().stop()
+        if self.market:
+            self.market.stop()
+
     def login(self):
         """"""
         expires = generate_timestamp(30)
@@ -88,15 +116,55 @@ class BybitWebsocketApi(WebsocketClient):
         }
         self.send_packet(req)
 
+    def subscribe(self, req: Request):
+        """
+        Subscribe a public topic, it is subscribed again after reconnect.
+        """
+        topic = req.topic
+        if topic.startswith("instrument_info."):
+            self.callbacks[topic] = self.on_tick
+        elif topic.startswith("orderBookL2_25."):
+            self.callbacks[topic] = self.on_depth
+
+        self.subscribed[topic] = req
+        if self.market:
+            self.market.subscribe(topic, self.callbacks[topic])
+        elif self._ws:
+            self.send_packet({"op": "subscribe", "args": [topic]})
+
+    def resubscribe(self, topic: str):
+        """
+        Subscribe topic again, server replies with a new snapshot.
+        """
+        if self.market:
+            self.market.resubscribe(topic)
+            return
+
+        self.send_packet({"op": "unsubscribe", "args": [topic]})
+        self.send_packet({"op": "subscribe", "args": [topic]})
+
     def on_connected(self):
         """"""
         self.gateway.write_log("Websocket API连接成功")
-        self.login()
+
+        # Public topics need no login, replay them all in one request
+        if self.subscribed and not self.market:
+            self.send_packet({"op": "subscribe", "args": list(self.subscribed)})
+
+        if self.key:
+            self.login()
 
     def on_disconnected(self):
         """"""
         self.gateway.write_log("Websocket API连接断开")
 
+        if self.market:
+            return
+
+        # Books are rebuilt from the snapshots sent after resubscribing
+        for book in self.books.values():
+            book.clear()
+
     def on_packet(self, packet: dict):
         """"""
         if "topic" not in packet:
@@ -125,12 +193,19 @@ class BybitWebsocketApi(WebsocketClient):
             self.subscribe_topic("order", self.on_order)
             self.subscribe_topic("execution", self.on_trade)
             self.subscribe_topic("position", self.on_position)
-
-            for req in self.subscribed.values():
-                self.subscribe(req)
         else:
             self.gateway.write_log("Websocket API登录失败")
 
+    def get_tick(self, symbol: str) -> TickData:
+        """
+        Get the tick buffer of symbol, created on first use.
+        """
+        tick = self.ticks.get(symbol, None)
+        if not tick:
+            tick = TickData(symbol)
+            self.ticks[symbol] = tick
+        return tick
+
     def on_tick(self, packet: dict):
         """"""
         topic = packet["topic"]
@@ -139,23 +214,29 @@ class BybitWebsocketApi(WebsocketClient):
         timestamp = packet["timestamp_e6"]
 
         symbol = topic.replace("instrument_info.100ms.", "")
-        tick = self.ticks[symbol]
+        if not self.check_price_scale(symbol):
+            return
+        tick = self.get_tick(symbol)
 
         if type_ == "snapshot":
-            tick.last_price = data["last_price_e4"] / 10000
+            tick.last_price = tick.price_scale.from_e(data["last_price_e4"], 4)
             tick.volume = data["volume_24h"]
+            tick.total_volume = data["total_volume"]
         else:
             update = data["update"][0]
 
             if "last_price_e4" in update:
-                tick.last_price = update["last_price_e4"] / 10000
+                tick.last_price = tick.price_scale.from_e(update["last_price_e4"], 4)
 
             if "volume_24h" in update:
                 tick.volume = update["volume_24h"]
 
+            if "total_volume" in update:
+                tick.total_volume = update["total_volume"]
+
         local_dt = datetime.fromtimestamp(timestamp / 1_000_000)
         tick.datetime = local_dt.astimezone(UTC_TZ)
-        self.gateway.on_tick(copy(tick))
+        self.gateway.on_tick(tick.snapshot())
 
     def on_depth(self, packet: dict):
         """"""
@@ -164,58 +245,85 @@ class BybitWebsocketApi(WebsocketClient):
         data = packet["data"]
         timestamp = packet["timestamp_e6"]
 
-        # Update depth data into dict buf
+        # Update depth data into order book
         symbol = topic.replace("orderBookL2_25.", "")
-        tick = self.ticks[symbol]
-        bids = self.symbol_bids.setdefault(symbol, {})
-        asks = self.symbol_asks.setdefault(symbol, {})
-
+        if not self.check_price_scale(symbol):
+            return
+        tick = self.get_tick(symbol)
+        book = self.books.get(symbol, None)
+        if not book:
+            book = OrderBook(symbol)
+            self.books[symbol] = book
+
+        seq = packet.get("cross_seq", 0)
         if type_ == "snapshot":
-            for d in data:
-                price = float(d["price"])
-
-                if d["side"] == "Buy":
-                    bids[price] = d
-                else:
-                    asks[price] = d
+            book.on_snapshot(data, seq)
         else:
-            for d in data["delete"]:
-                price = float(d["price"])
-                if d["side"] == "Buy":
-                    bids.pop(price)
-                else:
-                    asks.pop(price)
-
-            for d in (data["update"] + data["insert"]):
-                price = float(d["price"])
-                if d["side"] == "Buy":
-                    bids[price] = d
-                else:
-                    asks[price] = d
-
-        # Calculate 1-5 bid/ask depth
-        bid_keys = list(bids.keys())
-        bid_keys.sort(reverse=True)
-
-        ask_keys = list(asks.keys())
-        ask_keys.sort()
-
-        for i in range(5):
-            n = i + 1
-
-            bid_price = bid_keys[i]
-            bid_data = bids[bid_price]
-            ask_price = ask_keys[i]
-            ask_data = asks[ask_price]
-
-            setattr(tick, f"bid_price_{n}", bid_price)
-            setattr(tick, f"bid_volume_{n}", bid_data["size"])
-            setattr(tick, f"ask_price_{n}", ask_price)
-            setattr(tick, f"ask_volume_{n}", ask_data["size"])
+            # Waiting for snapshot after a gap
+            if not book.ready:
+                return
+
+            if seq and seq < book.seq:
+                self.on_gap(symbol, topic, f"cross_seq回退：{book.seq} -> {seq}")
+                return
+
+            book.on_delta(data["delete"], data["update"], data["insert"], seq)
+
+            if book.crossed():
+                bid = book.to_price(book.best_bid())
+                ask = book.to_price(book.best_ask())
+                self.on_gap(symbol, topic, f"盘口交叉：{bid} >= {ask}")
+                return
+
+        # Nothing to push when levels beyond 1-5 bid/ask depth changed
+        bid_changes, ask_changes = book.top_changes(TICK_DEPTH)
+        if not bid_changes and not ask_changes:
+            return
+
+        if bid_changes:
+            tick.set_bids(book.top_bids(TICK_DEPTH))
+        if ask_changes:
+            tick.set_asks(book.top_asks(TICK_DEPTH))
 
         local_dt = datetime.fromtimestamp(timestamp / 1_000_000)
         tick.datetime = local_dt.astimezone(UTC_TZ)
-        self.gateway.on_tick(copy(tick))
+        self.gateway.on_tick(tick.snapshot())
+        self.gateway.on_depth(DepthDelta(symbol, tick.datetime, bid_changes, ask_changes))
+
+    def check_price_scale(self, symbol: str) -> bool:
+        """
+        Tick and book of symbol keep the price scale they were created with,
+        which changes when contracts are loaded after market data started.
+        Both are dropped then and snapshots of symbol are requested again,
+        so prices of different scales are never mixed.
+
+        :return: False if data of symbol was dropped
+        """
+        scale = get_price_scale(symbol).scale
+
+        tick = self.ticks.get(symbol, None)
+        book = self.books.get(symbol, None)
+        if (not tick or tick.price_scale.scale == scale) and (not book or book.price_scale == scale):
+            return True
+
+        self.gateway.write_log(f"{symbol}价格精度变为{scale}，重新获取快照")
+
+        self.ticks.pop(symbol, None)
+        self.books.pop(symbol, None)
+        for topic in (f"instrument_info.100ms.{symbol}", f"orderBookL2_25.{symbol}"):
+            if topic in self.subscribed:
+                self.resubscribe(topic)
+        return False
+
+    def on_gap(self, symbol: str, topic: str, reason: str):
+        """
+        Order book of symbol missed data, drop it and ask for a new snapshot.
+        """
+        self.gaps += 1
+        self.gateway.write_log(f"{symbol}深度数据不连续，重新获取快照，原因：{reason}")
+
+        self.books[symbol].clear()
+        self.resubscribe(topic)
 
     def on_trade(self, packet: dict):
         """
@@ -239,8 +347,10 @@ class BybitWebsocketApi(WebsocketClient):
             order = self.order_manager.get_order_with_sys_orderid(sys_orderid)
 
             if order:
+                # Stored order is shared, update a copy of it
+                order = copy(order)
                 order.traded = d["cum_exec_qty"]
-                order.status = d["order_status"]
+                order.status = OrderStatus(d["order_status"])
                 order.time = d["timestamp"]
             else:
                 # Use sys_orderid as local_orderid when
@@ -249,7 +359,7 @@ class BybitWebsocketApi(WebsocketClient):
                 if not local_orderid:
                     local_orderid = sys_orderid
 
-                self.order_manager.update_orderid_map(
+                self.order_manager.update_order_id_map(
                     local_orderid,
                     sys_orderid
                 )
@@ -260,7 +370,7 @@ class BybitWebsocketApi(WebsocketClient):
                     orderid=local_orderid,
                     type=ORDER_TYPE_BYBIT2VT[d["order_type"]],
                     direction=DIRECTION_BYBIT2VT[d["side"]],
-                    price=float(d["price"]),
+                    price=get_price_scale(d["symbol"]).from_str(d["price"]),
                     volume=d["qty"],
                     traded=d["cum_exec_qty"],
                     status=STATUS_BYBIT2VT[d["order_status"]],
@@ -289,12 +399,41 @@ class BybitWebsocketApi(WebsocketClient):
             self.gateway.on_position(position)
 
 
+class BybitMarketDataApi(ShardedWebsocketApi):
+    """
+    Public topics of BybitWebsocketApi spread over several sockets, while
+    private topics stay alone on the socket of BybitWebsocketApi.
+    """
+
+    def __init__(self, api: BybitWebsocketApi):
+        """"""
+        super().__init__(api.gateway)
+        self.api = api
+
+    def on_shard_connected(self, index: int):
+        """"""
+        self.gateway.write_log(f"行情Websocket分片{index}连接成功")
+
+    def on_shard_disconnected(self, index: int):
+        """"""
+        self.gateway.write_log(f"行情Websocket分片{index}连接断开")
+
+        # Books of the shard are rebuilt from the snapshots sent after resubscribing
+        for symbol, book in self.api.books.items():
+            if self.router.shard_of(f"orderBookL2_25.{symbol}") == index:
+                book.clear()
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb):
+        """"""
+        self.api.on_error(exception_type, exception_value, tb)
+
+
 def generate_timestamp(expire_after: float = 30) -> int:
     """
     :param expire_after: expires in seconds.
     :return: timestamp in milliseconds
     """
-    return int(time.time() * 1000 + expire_after * 1000)
+    return int(now_ms() + expire_after * 1000)
 
 
 def sign(secret: bytes, data: bytes) -> str:
@@ -0,0 +1 @@
+from .bar_generator import BarGenerator, BarSeries, BarSnapshot, DEFAULT_BAR_CAPACITY
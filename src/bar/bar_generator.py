@@ -0,0 +1,353 @@
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.constant import BarType
+from src.datatypes import TickData
+
+DEFAULT_BAR_CAPACITY = 1000  # completed bars kept in each series
+
+
+class BarSeries:
+    """
+    Bars of one symbol with one bar type and size.
+
+    Completed bars are kept in preallocated NumPy arrays, one per field, so
+    indicators can be computed on whole columns. Prices are int ticks like
+    TickData, datetime is the epoch milliseconds of the first tick of a bar.
+
+    The arrays are a ring buffer written twice, at i and i + capacity, so the
+    latest n bars are always one contiguous slice and are returned as views
+    without copying. A view of n bars stays intact until capacity - n + 1
+    more bars are completed, copy it to keep it longer.
+
+    The bar being built is kept in open_price, high_price, low_price,
+    close_price, bar_volume, bar_count and bar_start.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        bar_type: BarType = BarType.TIME,
+        size: int = 60,
+        capacity: int = DEFAULT_BAR_CAPACITY,
+    ):
+        """
+        :param size: seconds for time bars, contracts for volume bars, trade ticks for tick bars
+        """
+        self.symbol = symbol
+        self.bar_type = bar_type
+        self.size = size
+        self.capacity = capacity
+
+        length = capacity * 2
+        self._datetime = np.zeros(length, np.int64)
+        self._open = np.zeros(length, np.int64)
+        self._high = np.zeros(length, np.int64)
+        self._low = np.zeros(length, np.int64)
+        self._close = np.zeros(length, np.int64)
+        self._volume = np.zeros(length, np.float64)
+        self._count = np.zeros(length, np.int64)
+
+        self.total: int = 0  # bars completed since created
+
+        self.bar_start: int = 0
+        self.open_price: int = 0
+        self.high_price: int = 0
+        self.low_price: int = 0
+        self.close_price: int = 0
+        self.bar_volume: float = 0
+        self.bar_count: int = 0
+
+        if bar_type == BarType.TIME:
+            self._interval = size * 1000
+            self.update = self._update_time
+        elif bar_type == BarType.VOLUME:
+            self.update = self._update_volume
+        else:
+            self.update = self._update_tick
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _update_time(self, timestamp: int, price: int, volume: float) -> bool:
+        """
+        :return: True if a bar was completed before this tick
+        """
+        start = timestamp - timestamp % self._interval
+        completed = False
+        if self.bar_count and start != self.bar_start:
+            self._complete()
+            completed = True
+
+        self._add(start, price, volume)
+        return completed
+
+    def _update_volume(self, timestamp: int, price: int, volume: float) -> bool:
+        """
+        :return: True if the bar was completed by this tick
+        """
+        self._add(timestamp, price, volume)
+        if self.bar_volume >= self.size:
+            self._complete()
+            return True
+        return False
+
+    def _update_tick(self, timestamp: int, price: int, volume: float) -> bool:
+        """
+        :return: True if the bar was completed by this tick
+        """
+        self._add(timestamp, price, volume)
+        if self.bar_count >= self.size:
+            self._complete()
+            return True
+        return False
+
+    def _add(self, timestamp: int, price: int, volume: float):
+        """"""
+        if not self.bar_count:
+            self.bar_start = timestamp
+            self.open_price = price
+            self.high_price = price
+            self.low_price = price
+        elif price > self.high_price:
+            self.high_price = price
+        elif price < self.low_price:
+            self.low_price = price
+
+        self.close_price = price
+        self.bar_volume += volume
+        self.bar_count += 1
+
+    def _complete(self):
+        """
+        Write the bar being built into the arrays and start a new one.
+        """
+        i = self.total % self.capacity
+        j = i + self.capacity
+
+        self._datetime[i] = self._datetime[j] = self.bar_start
+        self._open[i] = self._open[j] = self.open_price
+        self._high[i] = self._high[j] = self.high_price
+        self._low[i] = self._low[j] = self.low_price
+        self._close[i] = self._close[j] = self.close_price
+        self._volume[i] = self._volume[j] = self.bar_volume
+        self._count[i] = self._count[j] = self.bar_count
+        self.total += 1
+
+        self.bar_volume = 0
+        self.bar_count = 0
+
+    def _view(self, array: np.ndarray, n: int = 0) -> np.ndarray:
+        """
+        Latest n completed bars of array, oldest first, all of them if n is 0.
+        """
+        available = len(self)
+        if not n or n > available:
+            n = available
+        if not n:
+            return array[:0]
+
+        end = (self.total - 1) % self.capacity + self.capacity + 1
+        return array[end - n:end]
+
+    def datetime(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._datetime, n)
+
+    def open(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._open, n)
+
+    def high(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._high, n)
+
+    def low(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._low, n)
+
+    def close(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._close, n)
+
+    def volume(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._volume, n)
+
+    def count(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._count, n)
+
+    def snapshot(self) -> "BarSnapshot":
+        """
+        Copy of the completed bars, which stays the same while the series
+        is updated.
+        """
+        return BarSnapshot(self)
+
+    def __repr__(self):
+        return f"BarSeries({self.symbol}, {self.bar_type.value}, {self.size}, bars={len(self)})"
+
+
+class BarSnapshot:
+    """
+    Completed bars of a BarSeries copied at one point, oldest first.
+
+    Pushed to strategies instead of the series, which keeps changing on the
+    thread feeding ticks. Arrays are read-only, accessors are the same as
+    BarSeries.
+    """
+
+    def __init__(self, series: BarSeries):
+        """"""
+        self.symbol = series.symbol
+        self.bar_type = series.bar_type
+        self.size = series.size
+        self.total = series.total
+
+        self._datetime = self._copy(series.datetime())
+        self._open = self._copy(series.open())
+        self._high = self._copy(series.high())
+        self._low = self._copy(series.low())
+        self._close = self._copy(series.close())
+        self._volume = self._copy(series.volume())
+        self._count = self._copy(series.count())
+
+    @staticmethod
+    def _copy(array: np.ndarray) -> np.ndarray:
+        """"""
+        array = array.copy()
+        array.flags.writeable = False
+        return array
+
+    def __len__(self) -> int:
+        return len(self._close)
+
+    @staticmethod
+    def _view(array: np.ndarray, n: int = 0) -> np.ndarray:
+        """
+        Latest n bars of array, all of them if n is 0.
+        """
+        if not n or n >= len(array):
+            return array
+        return array[-n:]
+
+    def datetime(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._datetime, n)
+
+    def open(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._open, n)
+
+    def high(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._high, n)
+
+    def low(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._low, n)
+
+    def close(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._close, n)
+
+    def volume(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._volume, n)
+
+    def count(self, n: int = 0) -> np.ndarray:
+        """"""
+        return self._view(self._count, n)
+
+    def __repr__(self):
+        return f"BarSnapshot({self.symbol}, {self.bar_type.value}, {self.size}, bars={len(self)})"
+
+
+class BarGenerator:
+    """
+    Aggregates ticks of each symbol into any number of BarSeries, with
+    different bar types and sizes fed from the same ticks.
+
+    Bars are built from trades only: a tick counts when total_volume grew
+    since the previous tick of the symbol, by the traded volume. Ticks
+    pushed for book updates, and the first tick of a symbol which sets the
+    base volume, are skipped. The rolling 24h volume is not used, it falls
+    as old trades leave the window.
+
+    Time bars are completed by the first tick of the next interval, no bar is
+    made for an interval without ticks.
+    """
+
+    def __init__(self, on_bar: Callable[["BarSnapshot"], None] = None):
+        """
+        :param on_bar: called with a snapshot of the series each time one of its bars is completed
+        """
+        self.on_bar = on_bar
+
+        self.series: Dict[str, List[BarSeries]] = {}
+        self.volumes: Dict[str, float] = {}  # last total_volume of symbol
+
+        self._lock = Lock()
+
+    def add(
+        self,
+        symbol: str,
+        bar_type: BarType = BarType.TIME,
+        size: int = 60,
+        capacity: int = DEFAULT_BAR_CAPACITY,
+    ) -> BarSeries:
+        """
+        Start building bars of symbol, the existing series is returned if
+        there is one with the same type and size.
+        """
+        symbol = getattr(symbol, "value", symbol)
+
+        with self._lock:
+            series = self.get(symbol, bar_type, size)
+            if series is not None:
+                return series
+
+            series = BarSeries(symbol, bar_type, size, capacity)
+            # Replaced instead of appended, update_tick iterates without the lock
+            self.series[symbol] = self.series.get(symbol, []) + [series]
+            return series
+
+    def get(self, symbol: str, bar_type: BarType = BarType.TIME, size: int = 60) -> Optional[BarSeries]:
+        """"""
+        symbol = getattr(symbol, "value", symbol)
+        for series in self.series.get(symbol, []):
+            if series.bar_type == bar_type and series.size == size:
+                return series
+        return None
+
+    def update_tick(self, tick: TickData):
+        """"""
+        series_list = self.series.get(tick.symbol, None)
+        if not series_list:
+            return
+
+        # No instrument data received yet
+        total_volume = tick.total_volume
+        if not total_volume:
+            return
+
+        last_total_volume = self.volumes.get(tick.symbol, None)
+        if last_total_volume is not None and total_volume <= last_total_volume:
+            return
+
+        self.volumes[tick.symbol] = total_volume
+        price = tick.last_price
+        if last_total_volume is None or not price:
+            return
+        volume = total_volume - last_total_volume
+
+        dt = tick.datetime
+        timestamp = int(dt.timestamp() * 1000) if dt else int(time.time() * 1000)
+
+        for series in series_list:
+            if series.update(timestamp, price, volume) and self.on_bar:
+                self.on_bar(series.snapshot())
@@ -0,0 +1,124 @@
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+TIME_PATH = "/v2/public/time"
+
+# Samples with a round trip above this are too vague to align the clock
+MAX_RTT_MS = 1000
+
+
+class ClockSync:
+    """
+    Estimate offset between server clock and local clock.
+
+    Local time is a wall clock anchor advanced by time.monotonic(), so it
+    does not jump when the host clock is stepped. Each sample is taken the
+    NTP way: offset is server time minus the midpoint of the round trip, and
+    the sample with the smallest round trip in the recent window is used,
+    since it has the least uncertainty.
+    """
+
+    def __init__(self, window: int = 8, max_age: float = 600):
+        """"""
+        self.max_age: float = max_age  # seconds before estimate is stale
+
+        self._anchor_ms: float = time.time() * 1000
+        self._anchor_mono: float = time.monotonic()
+
+        # (rtt, offset) of recent samples
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)
+
+        self.offset_ms: float = 0  # server minus local
+        self.rtt_ms: float = 0
+        self.updated: float = 0  # monotonic time of last accepted sample
+
+        self.count: int = 0
+        self.rejected: int = 0
+
+    def local_ms(self) -> float:
+        """
+        Local time in milliseconds, before offset is applied.
+        """
+        return self._anchor_ms + (time.monotonic() - self._anchor_mono) * 1000
+
+    def now_ms(self) -> int:
+        """
+        Estimated server time in milliseconds.
+        """
+        return int(self._anchor_ms + (time.monotonic() - self._anchor_mono) * 1000 + self.offset_ms)
+
+    @property
+    def uncertainty_ms(self) -> float:
+        """
+        Max error of now_ms, half round trip of the sample in use.
+        """
+        return self.rtt_ms / 2
+
+    @property
+    def synced(self) -> bool:
+        """"""
+        return bool(self.updated) and time.monotonic() - self.updated < self.max_age
+
+    def add_sample(self, send_ms: float, server_ms: float, recv_ms: float) -> bool:
+        """
+        Add one measurement, times are local_ms() around the request.
+        :return: False if sample was dropped
+        """
+        rtt = recv_ms - send_ms
+        if rtt < 0 or rtt > MAX_RTT_MS:
+            self.rejected += 1
+            return False
+
+        self._samples.append((rtt, server_ms - (send_ms + recv_ms) / 2))
+        self.rtt_ms, self.offset_ms = min(self._samples)
+        self.updated = time.monotonic()
+        self.count += 1
+        return True
+
+    async def sync(self, session, url_base: str, samples: int = 5) -> int:
+        """
+        Query server time a few times in a row on session.
+        :return: number of accepted samples
+        """
+        url = url_base + TIME_PATH
+        accepted = 0
+
+        for _ in range(samples):
+            send_ms = self.local_ms()
+            async with session.get(url) as cr:
+                data = await cr.json(content_type=None)
+            recv_ms = self.local_ms()
+
+            server_ms = float(data["time_now"]) * 1000
+            if self.add_sample(send_ms, server_ms, recv_ms):
+                accepted += 1
+
+        return accepted
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "synced": self.synced,
+            "offset_ms": self.offset_ms,
+            "rtt_ms": self.rtt_ms,
+            "count": self.count,
+            "rejected": self.rejected,
+        }
+
+    def __str__(self):
+        """"""
+        return "offset:{:.1f}ms, rtt:{:.1f}ms, synced:{}".format(
+            self.offset_ms, self.rtt_ms, self.synced
+        )
+
+
+# Clock shared by REST and websocket signing
+CLOCK = ClockSync()
+
+
+def now_ms() -> int:
+    """
+    Estimated server time in milliseconds.
+    """
+    return CLOCK.now_ms()
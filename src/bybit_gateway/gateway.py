@@ -1,14 +1,17 @@
-from src.datatypes import TickData, Symbol, OrderRequest, CancelRequest
+from src.datatypes import TickData, DepthDelta, ContractData, Symbol, OrderRequest, CancelRequest, OrderType
 from src.strategy import Strategy
-from typing import Any, Callable, Optional, Type, Union, List
+from src.journal import JournalWriter
+from src.manager import LocalOrderManager, CompactIdGenerator
+from src.contract import ContractRegistry, OrderValidator, CONTRACT_CACHE_FILE
+from src.bar import BarGenerator, BarSeries, BarSnapshot, DEFAULT_BAR_CAPACITY
+from src.constant import BarType
+from src.event import EventEngine, Event, EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_POSITION, EVENT_DEPTH, EVENT_BAR
+from typing import Any, Callable, Dict, Optional, Type, Union, List
 from types import TracebackType
-from multiprocessing import Pool
 from enum import Enum
 from src.logger import LogFactory
-import multiprocessing
-import os
+import asyncio
 import time
-import requests
 import json
 import logging
 import socket
@@ -23,8 +26,11 @@ from threading import Lock, Thread
 from time import sleep
 from typing import Optional
 
-from copy import copy
-from src.datatypes import OrderData, CancelRequest
+from src.datatypes import OrderData, CancelRequest, get_price_scale
+from src.bybit_gateway.rate_limit import RateLimiter
+from src.bybit_gateway.signer import Signer
+from src.bybit_gateway.clock import CLOCK, ClockSync
+from aiohttp import ClientSession, ClientResponse, ClientTimeout, TCPConnector, TraceConfig
 
 class RequestStatus(Enum):
     ready = 0  # Request created
@@ -33,23 +39,41 @@ class RequestStatus(Enum):
     error = 3  # Exception raised
 
 
-pool: multiprocessing.pool.Pool = Pool(os.cpu_count() * 20)
-
 CALLBACK_TYPE = Callable[[dict, "Request"], Any]
 ON_FAILED_TYPE = Callable[[int, "Request"], Any]
 ON_ERROR_TYPE = Callable[[Type, Exception, TracebackType, "Request"], Any]
 CONNECTED_TYPE = Callable[["Request"], Any]
+BATCH_CALLBACK_TYPE = Callable[["BatchRequest"], Any]
 
 REST_HOST = "https://api.bybit.com"
+REST_HEADERS = {"Referer": "vn.py"}
 TESTNET_REST_HOST = "https://api-testnet.bybit.com"
 
+ORDER_TYPE_VT2BYBIT = {
+    OrderType.LIMIT: "Limit",
+    OrderType.MARKET: "Market",
+}
+
 
 class BybitGateway(object):
-    def __init__(self):
-        self.order_manager = LocalOrderManager(self, str(time.time()))
+    def __init__(self, event_engine: EventEngine = None):
+        self.event_engine = event_engine or EventEngine()
+        self.order_manager = LocalOrderManager(self)
+        self.contracts = ContractRegistry()
         self.rest_api = BybitRestApi(self)
+
+        # Latest tick of each symbol, used by pre-trade checks
+        self.ticks: Dict[str, TickData] = {}
+        self.validator = OrderValidator(self.contracts, self.ticks.get)
+
+        # Bars built from ticks, see subscribe_bars
+        self.bars = BarGenerator(self.on_bar)
         self.ws_api = WebsocketClient(self)
         self.strategy_map = {}
+        self.latest_only_handlers = {}  # (symbol, strategy):handler
+
+        # Binary journal of orders, cancels and ticks, see open_journal
+        self.journal: Optional[JournalWriter] = None
 
     def connect(self, setting: dict):
         """"""
@@ -57,35 +81,213 @@ class BybitGateway(object):
         secret = setting["Secret"]
         server = setting["Server"]
 
+        # Contracts differ between REAL and TESTNET, cache them separately
+        self.contracts.cache_path = setting.get(
+            "Contract Cache", f"{server.lower()}_{CONTRACT_CACHE_FILE}"
+        )
+
+        # Processes trading the same account need distinct order id nodes
+        node_id = setting.get("Node ID", None)
+        if node_id is not None:
+            self.order_manager.id_generator = CompactIdGenerator(
+                self.order_manager.order_prefix, int(node_id)
+            )
+
+        self.event_engine.start()
         self.rest_api.connect(key, secret, server)
         # self.ws_api.connect(key, secret, server)
 
-    def register_strategy(self, symbol: Symbol, strategy: Strategy):
-        self.strategy_map[symbol] = strategy
+    def get_contract(self, symbol: Union[Symbol, str]) -> Optional[ContractData]:
+        """"""
+        return self.contracts.get(symbol)
+
+    def open_journal(self, folder: str):
+        """
+        Record order requests, order updates, cancel requests and ticks into
+        a binary journal in folder.
+        """
+        if not self.journal:
+            self.journal = JournalWriter(folder)
+
+    def register_strategy(self, symbol: Symbol, strategy: Strategy, latest_only: bool = False):
+        """
+        Subscribe strategy to tick, order, trade and position events of symbol.
+
+        With latest_only, ticks the strategy could not handle in time are
+        superseded by newer ones, see get_conflation_stats.
+        """
+        if isinstance(symbol, Symbol):
+            symbol = symbol.value
+
+        self.strategy_map.setdefault(symbol, []).append(strategy)
+
+        tick_handler = strategy.process_tick_event
+        if latest_only:
+            tick_handler = self.event_engine.latest_only(tick_handler)
+            self.latest_only_handlers[(symbol, strategy)] = tick_handler
+
+        self.event_engine.register(EVENT_TICK + symbol, tick_handler)
+        self.event_engine.register(EVENT_ORDER + symbol, strategy.process_order_event)
+        self.event_engine.register(EVENT_TRADE + symbol, strategy.process_trade_event)
+        self.event_engine.register(EVENT_POSITION + symbol, strategy.process_position_event)
+        self.event_engine.register(EVENT_DEPTH + symbol, strategy.process_depth_event)
+        self.event_engine.register(EVENT_BAR + symbol, strategy.process_bar_event)
+
+    def subscribe_bars(
+        self,
+        symbol: Union[Symbol, str],
+        bar_type: BarType = BarType.TIME,
+        size: int = 60,
+        capacity: int = DEFAULT_BAR_CAPACITY,
+    ) -> BarSeries:
+        """
+        Build bars of symbol from its ticks, each completed bar pushes a
+        snapshot of the series to strategies of the symbol. Calling again with the same bar
+        type and size returns the existing series.
+
+        :param size: seconds for time bars, contracts for volume bars, trade ticks for tick bars
+        """
+        return self.bars.add(symbol, bar_type, size, capacity)
+
+    def get_conflation_stats(self) -> List[dict]:
+        """
+        Received, delivered and conflated tick counts of latest_only strategies.
+        """
+        stats = []
+        for (symbol, strategy), handler in self.latest_only_handlers.items():
+            data = handler.to_dict()
+            data["symbol"] = symbol
+            data["strategy"] = strategy.__class__.__name__
+            stats.append(data)
+        return stats
+
+    def on_event(self, type: str, symbol: str, data: Any):
+        """
+        General event push.
+        """
+        self.event_engine.put(Event(type, symbol, data))
 
     def on_tick(self, tick: TickData):
         """
-        Tick data.
+        Tick event push, strategies receive it on event engine threads.
         """
-        for s in self.strategy_map[tick.symbol]:
-            s.on_tick(tick)
+        self.ticks[tick.symbol] = tick
+        if self.journal:
+            self.journal.write_tick(tick)
+        self.bars.update_tick(tick)
+        self.on_event(EVENT_TICK, tick.symbol, tick)
 
-    # def send_order(self, req: OrderRequest):
-    #     """"""
-    #     return self.rest_api.send_order(req)
+    def on_depth(self, delta: DepthDelta):
+        """
+        Changed top levels of a book, pushed right after the tick holding them.
+        """
+        self.on_event(EVENT_DEPTH, delta.symbol, delta)
+
+    def on_bar(self, bars: BarSnapshot):
+        """
+        Bar event push, with a copy of the series taken when the bar was
+        completed, so strategies never read bars being written.
+        """
+        self.on_event(EVENT_BAR, bars.symbol, bars)
+
+    def on_order(self, order: OrderData):
+        """
+        Order event push.
+        """
+        if self.journal:
+            self.journal.write_order(order)
+        self.on_event(EVENT_ORDER, order.symbol, order)
+
+    def on_trade(self, trade: Any):
+        """
+        Trade event push.
+        """
+        self.on_event(EVENT_TRADE, trade.symbol, trade)
+
+    def on_position(self, position: Any):
+        """
+        Position event push.
+        """
+        self.on_event(EVENT_POSITION, position.symbol, position)
+
+    def send_order(self, req: OrderRequest):
+        """
+        Send order after pre-trade checks, empty order_link_id is returned
+        if it was rejected locally.
+        """
+        if not self.check_order(req):
+            return ""
+
+        # Journaled request is matched with later order records by it
+        if not req.order_link_id:
+            req.order_link_id = self.order_manager.new_order_link_id()
+
+        if self.journal:
+            self.journal.write_order_request(req)
+        return self.rest_api.send_order(req)
+
+    def send_orders(self, reqs: List[OrderRequest], callback: BATCH_CALLBACK_TYPE = None):
+        """
+        Send a batch of orders, callback receives the BatchRequest with per-order results.
+        Orders rejected by pre-trade checks are left out of the batch.
+        """
+        reqs = [req for req in reqs if self.check_order(req)]
+        if not reqs:
+            return None
+
+        for req in reqs:
+            if not req.order_link_id:
+                req.order_link_id = self.order_manager.new_order_link_id()
+
+        if self.journal:
+            for req in reqs:
+                self.journal.write_order_request(req)
+        return self.rest_api.send_orders(reqs, callback)
+
+    def check_order(self, req: OrderRequest) -> bool:
+        """
+        Round and validate order with contract rules and latest tick.
+        """
+        reason = self.validator.validate(req)
+        if reason:
+            self.rest_api.logger.info("委托本地检查未通过：%s，合约：%s，价格：%s，数量：%s",
+                                      reason, req.symbol, req.price, req.size)
+            return False
+        return True
 
     def cancel_order(self, req: CancelRequest):
         """"""
+        if self.journal:
+            self.journal.write_cancel_request(req)
         self.rest_api.cancel_order(req)
 
+    def cancel_orders(self, reqs: List[CancelRequest], callback: BATCH_CALLBACK_TYPE = None):
+        """
+        Cancel a batch of orders, callback receives the BatchRequest with per-order results.
+        """
+        if self.journal:
+            for req in reqs:
+                self.journal.write_cancel_request(req)
+        return self.rest_api.cancel_orders(reqs, callback)
+
+    def cancel_all_orders(self, symbol: str):
+        """
+        Cancel all active orders of symbol with a single request.
+        """
+        self.rest_api.cancel_all_orders(symbol)
+
     # def query_position(self):
     #     """"""
     #     self.rest_api.query_position()
 
-    # def close(self):
-    #     """"""
-    #     self.rest_api.stop()
-    #     self.ws_api.stop()
+    def close(self):
+        """"""
+        self.rest_api.stop()
+        # self.ws_api.stop()
+        self.event_engine.stop()
+
+        if self.journal:
+            self.journal.close()
 
 
 class Request:
@@ -120,7 +322,7 @@ class Request:
         self.on_error = on_error
         self.extra = extra
 
-        self.response: Optional[requests.Response] = None
+        self.response: Optional[Response] = None
         self.status = RequestStatus.ready
         self.client = client
 
@@ -138,41 +340,136 @@ class Request:
             else:
                 response = self.response.text
 
+        if self.client is None:
+            full_url = self.path
+        else:
+            full_url = self.client.url_base + self.path
+
         return (
-            "request: {method} {path} {http_code}: \n"
-            "full_url: {full_url}\n"
-            "status: {status}\n"
-            "headers: {headers}\n"
-            "params: {params}\n"
-            "data: {data}\n"
-            "response: {response}\n".format(
-                full_url=self.client.make_full_url(self.path),
-                status=self.status.name,
-                method=self.method,
-                path=self.path,
-                http_code=status_code,
-                headers=self.headers,
-                params=self.params,
-                data=self.data,
-                response=response,
-            )
+            f"request: {self.method} {self.path} {status_code}: \n"
+            f"full_url: {full_url}\n"
+            f"status: {self.status.name}\n"
+            f"headers: {self.headers}\n"
+            f"params: {self.params}\n"
+            f"data: {self.data}\n"
+            f"response: {response}\n"
         )
 
 
-class BybitRestApi:
+class BatchRequest:
+    """
+    A group of requests sent together, callback is called once all of them
+    finished, with the result of each request kept in the same order.
+    """
+
+    def __init__(self, callback: BATCH_CALLBACK_TYPE = None, extras: List[Any] = None):
+        """"""
+        self.callback = callback
+        self.extras = extras or []
+        self.requests: List[Request] = []
+
+        # json body if 2xx, status code if non-2xx, exception if error raised
+        self.results: List[Any] = []
+
+    def on_result(self, data: dict, request: Request):
+        """"""
+        self.results[request.extra] = data
+
+    def on_failed(self, status_code: int, request: Request):
+        """"""
+        self.results[request.extra] = status_code
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb, request: Request):
+        """"""
+        self.results[request.extra] = exception_value
+
+    def succeeded(self) -> List[int]:
+        """
+        Index of requests finished with 2xx status.
+        """
+        return [
+            i for i, request in enumerate(self.requests)
+            if request.status == RequestStatus.success
+        ]
+
+    def __len__(self):
+        return len(self.requests)
+
+
+class Response:
+    """
+    Response body read off the event loop, so callbacks never touch the
+    underlying aiohttp connection.
+    """
+
+    def __init__(self, status_code: int, text: str):
+        """"""
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> dict:
+        """"""
+        return json.loads(self.text)
+
+
+class ConnectionPoolStats:
+    """
+    Counters of the REST connection pool, fed by aiohttp trace hooks.
+
+    * hits: request served by an idle keep-alive connection
+    * misses: no idle connection, a new one had to be opened
+    * handshakes: new connections established (TCP + TLS)
+    * queued: request waited because the pool reached its limit
+    """
 
-    class Session:
+    def __init__(self):
+        """"""
+        self.hits: int = 0
+        self.misses: int = 0
+        self.handshakes: int = 0
+        self.queued: int = 0
 
-        def __init__(self, client, session: requests.Session):
-            self.client = client
-            self.session = session
+    def create_trace_config(self) -> TraceConfig:
+        """"""
+        trace_config = TraceConfig()
+        trace_config.on_connection_reuseconn.append(self._on_reuse)
+        trace_config.on_connection_create_start.append(self._on_create_start)
+        trace_config.on_connection_create_end.append(self._on_create_end)
+        trace_config.on_connection_queued_start.append(self._on_queued)
+        return trace_config
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "handshakes": self.handshakes,
+            "queued": self.queued,
+        }
 
-        def __enter__(self):
-            return self.session
+    async def _on_reuse(self, session, context, params):
+        """"""
+        self.hits += 1
 
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            with self.client._sessions_lock:
-                self.client._sessions.append(self.session)
+    async def _on_create_start(self, session, context, params):
+        """"""
+        self.misses += 1
+
+    async def _on_create_end(self, session, context, params):
+        """"""
+        self.handshakes += 1
+
+    async def _on_queued(self, session, context, params):
+        """"""
+        self.queued += 1
+
+    def __str__(self):
+        return "hits: {hits}, misses: {misses}, handshakes: {handshakes}, queued: {queued}".format(
+            **self.to_dict()
+        )
+
+
+class BybitRestApi:
 
     def __init__(self, gateway: BybitGateway):
         """"""
@@ -183,6 +480,7 @@ class BybitRestApi:
         self.url_base: str = ""
         self.key = ""
         self.secret = b""
+        self.signer: Optional[Signer] = None
 
         self.order_count = 1_000_000
         self.order_count_lock = Lock()
@@ -190,19 +488,43 @@ class BybitRestApi:
 
         self._active: bool = False
 
-        self._tasks_lock = Lock()
-        self._tasks: List[multiprocessing.pool.AsyncResult] = []
-        self._sessions_lock = Lock()
-        self._sessions: List[requests.Session] = []
+        # Event loop running on a dedicated thread, all HTTP io happens here
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[Thread] = None
+        self._session: Optional[ClientSession] = None
+
+        # Bound the number of requests in flight at the same time
+        self.max_inflight: int = 64
+        self.timeout: int = 10  # seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Keep-alive connection pool
+        self.pool_size: int = 3  # connections pre-warmed by start()
+        self.max_connections: int = 100
+        self.max_connections_per_host: int = 20
+        self.keepalive_timeout: float = 30  # seconds before idle connection is evicted
+        self.pool_stats = ConnectionPoolStats()
+
+        # Client side rate limit, checked before a request takes an in-flight slot
+        self.rate_limiter = RateLimiter()
+
+        # Server clock estimate, refreshed in background after start()
+        self.clock: ClockSync = CLOCK
+        self.clock_sync_interval: float = 60  # seconds
+        self.clock_samples: int = 5
+        self.recv_window: int = 5 * 1000  # ms, used while clock is synced
+        self.fallback_recv_window: int = 30 * 1000  # ms, used before clock is synced
+        self._clock_synced: bool = False
+        self._clock_task: Optional[asyncio.Task] = None
 
-        self._streams_lock = Lock()
-        self._streams: List[Thread] = []
+        self._tasks_lock = Lock()
+        self._tasks: List[asyncio.Future] = []
 
-    def sign(self, request: Request):
+    def sign(self, request: Request, timestamp: int = None):
         """
         Generate ByBit signature.
         """
-        request.headers = {"Referer": "vn.py"}
+        request.headers = REST_HEADERS
 
         if request.method == "GET":
             api_params = request.params
@@ -213,17 +535,42 @@ class BybitRestApi:
             if api_params is None:
                 api_params = request.data = {}
 
-        api_params["api_key"] = self.key
-        api_params["recv_window"] = 30 * 1000
-        api_params["timestamp"] = generate_timestamp(-5)
-
-        data2sign = "&".join(
-            [f"{k}={v}" for k, v in sorted(api_params.items())])
-        signature = sign(self.secret, data2sign.encode())
-        api_params["sign"] = signature
+        if timestamp is None:
+            timestamp = self.generate_timestamp()
+        self.signer.sign(api_params, timestamp)
 
         return request
 
+    def generate_timestamp(self) -> int:
+        """
+        Timestamp for signing requests.
+
+        With a synced clock the estimated server time is used, pulled back by
+        its uncertainty so it is never ahead of server. Otherwise fall back to
+        local time five seconds back with a wide recv_window.
+        """
+        synced = self.clock.synced
+        if synced != self._clock_synced:
+            self._set_clock_synced(synced)
+
+        if synced:
+            return self.clock.now_ms() - int(self.clock.uncertainty_ms)
+        return generate_timestamp(-5)
+
+    def _set_clock_synced(self, synced: bool):
+        """"""
+        self._clock_synced = synced
+
+        if synced:
+            recv_window = self.recv_window
+        else:
+            recv_window = self.fallback_recv_window
+
+        if self.signer:
+            self.signer.set_recv_window(recv_window)
+
+        self.logger.info("服务器时钟同步状态：%s，recv_window：%sms，%s", synced, recv_window, self.clock)
+
     def connect(
             self,
             key: str,
@@ -235,6 +582,7 @@ class BybitRestApi:
         """
         self.key = key
         self.secret = secret.encode()
+        self.signer = Signer(self.key, self.secret)
 
         self.connect_time = (
                 int(datetime.now().strftime("%y%m%d%H%M%S")) * self.order_count
@@ -248,18 +596,120 @@ class BybitRestApi:
         self.start(3)
         self.logger.info("REST API启动成功")
 
-        self.query_contract()
+        contracts = self.gateway.contracts
+        if contracts.load_cache():
+            self.logger.info("合约信息从缓存加载，数量：%s", len(contracts))
+        else:
+            self.query_contract()
         # self.query_order()
         # self.query_position()
 
     def start(self, n: int = 3):
         """
-        Start rest client with session count n.
+        Start rest client with n pre-warmed keep-alive connections.
         """
         if self._active:
             return
         self._active = True
 
+        self.pool_size = n
+        self.max_connections_per_host = max(self.max_connections_per_host, n)
+
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = Thread(target=self._run_loop, daemon=True)
+        self._loop_thread.start()
+
+        future = asyncio.run_coroutine_threadsafe(self._init_loop(), self._loop)
+        future.result()
+
+    def stop(self):
+        """
+        Stop rest client, requests still in flight are cancelled.
+        """
+        if not self._active:
+            return
+        self._active = False
+
+        future = asyncio.run_coroutine_threadsafe(self._close_loop(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def join(self):
+        """
+        Wait till the event loop thread exits.
+        """
+        if self._loop_thread:
+            self._loop_thread.join()
+
+    def _run_loop(self):
+        """"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _init_loop(self):
+        """
+        Create loop bound objects, must be run inside the event loop.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self._session = self._create_session()
+        await self._warm_connections(self.pool_size)
+
+        if self.url_base:
+            await self._sync_clock()
+            self._clock_task = asyncio.get_running_loop().create_task(self._run_clock_sync())
+
+    async def _sync_clock(self):
+        """
+        Measure server time over the warm connections.
+        """
+        try:
+            await self.clock.sync(self._get_session(), self.url_base, self.clock_samples)
+        except Exception as e:
+            self.logger.info("服务器时钟同步失败，错误：%s", e)
+
+        self._set_clock_synced(self.clock.synced)
+
+    async def _run_clock_sync(self):
+        """"""
+        while True:
+            await asyncio.sleep(self.clock_sync_interval)
+            await self._sync_clock()
+
+    async def _warm_connections(self, n: int):
+        """
+        Open n connections to url_base concurrently, so the first requests
+        do not pay for the TCP and TLS handshake.
+        """
+        if not self.url_base or n <= 0:
+            return
+
+        results = await asyncio.gather(
+            *[self._warm_connection() for _ in range(n)],
+            return_exceptions=True
+        )
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            self.logger.info("REST连接预热失败%s个，错误：%s", len(failed), failed[0])
+
+        self.logger.info("REST连接池预热完成，%s", self.pool_stats)
+
+    async def _close_loop(self):
+        """"""
+        if self._clock_task:
+            self._clock_task.cancel()
+            self._clock_task = None
+
+        with self._tasks_lock:
+            tasks = list(self._tasks)
+
+        for task in tasks:
+            task.cancel()
+
+        if self._session:
+            await self._session.close()
+            self._session = None
+
     def query_contract(self):
         """"""
         self.add_request(
@@ -270,19 +720,141 @@ class BybitRestApi:
 
     def cancel_order(self, req: CancelRequest):
         """"""
-        sys_orderid = self.order_manager.get_order_link_id(req.order_id)
+        self.add_request(
+            "POST",
+            path="/open-api/order/cancel",
+            data=self._cancel_data(req),
+            callback=self.on_cancel_order
+        )
+
+    def send_order(self, req: OrderRequest):
+        """"""
+        order_link_id = req.order_link_id
+        if not order_link_id:
+            order_link_id = self.order_manager.new_order_link_id()
+
+        self.add_request(
+            "POST",
+            path="/v2/private/order/create",
+            data=self._order_data(req, order_link_id),
+            callback=self.on_send_order,
+            extra=req
+        )
+        return order_link_id
+
+    def send_orders(self, reqs: List[OrderRequest], callback: BATCH_CALLBACK_TYPE = None):
+        """
+        Send orders concurrently over the pooled connections.
+        """
+        data_list = []
+        for req in reqs:
+            order_link_id = req.order_link_id
+            if not order_link_id:
+                order_link_id = self.order_manager.new_order_link_id()
+            data_list.append(self._order_data(req, order_link_id))
+
+        return self.add_batch_request(
+            "POST",
+            "/v2/private/order/create",
+            data_list,
+            callback=self._batch_callback("委托下单", callback, self.update_order_id),
+            extras=reqs
+        )
+
+    def _order_data(self, req: OrderRequest, order_link_id: str) -> dict:
+        """"""
         data = {
-            "order_id": sys_orderid,
             "symbol": req.symbol,
+            "side": req.side,
+            "order_type": ORDER_TYPE_VT2BYBIT[req.type],
+            "qty": req.size,
+            "time_in_force": req.time_in_force.value,
+            "order_link_id": order_link_id,
         }
+        if req.type == OrderType.LIMIT:
+            data["price"] = get_price_scale(req.symbol).to_str(req.price)
+        return data
+
+    def on_send_order(self, data: dict, request: Request):
+        """"""
+        if self.check_error("委托下单", data):
+            return
+
+        self.update_order_id(data["result"])
+
+    def update_order_id(self, result: dict):
+        """
+        Keep exchange order_id of a created order, so it can be cancelled by it.
+        """
+        if result and result.get("order_id") and result.get("order_link_id"):
+            self.order_manager.update_order_id_map(result["order_link_id"], result["order_id"])
+
+    def cancel_orders(self, reqs: List[CancelRequest], callback: BATCH_CALLBACK_TYPE = None):
+        """
+        Cancel orders concurrently over the pooled connections.
+        """
+        data_list = [self._cancel_data(req) for req in reqs]
+
+        return self.add_batch_request(
+            "POST",
+            "/open-api/order/cancel",
+            data_list,
+            callback=self._batch_callback("委托撤单", callback),
+            extras=reqs
+        )
+
+    def _cancel_data(self, req: CancelRequest) -> dict:
+        """
+        Cancel by exchange order_id when it is known, else by order_link_id.
+        """
+        data = {"symbol": req.symbol}
+
+        order_id = req.order_id or self.order_manager.get_order_id(req.order_link_id)
+        if order_id:
+            data["order_id"] = order_id
+        else:
+            data["order_link_id"] = req.order_link_id
+        return data
 
+    def cancel_all_orders(self, symbol: str):
+        """"""
         self.add_request(
             "POST",
-            path="/open-api/order/cancel",
-            data=data,
-            callback=self.on_cancel_order
+            path="/v2/private/order/cancelAll",
+            data={"symbol": symbol},
+            callback=self.on_cancel_all_orders
         )
 
+    def on_cancel_all_orders(self, data: dict, request: Request):
+        """"""
+        if self.check_error("全部撤单", data):
+            return
+
+        self.logger.info("全部撤单成功，数量：%s", len(data["result"] or []))
+
+    def _batch_callback(
+        self,
+        name: str,
+        callback: BATCH_CALLBACK_TYPE = None,
+        on_result: Callable[[dict], None] = None,
+    ):
+        """
+        Log per-order errors of a batch before passing it to user callback.
+        :param on_result: called with the result of each succeeded order
+        """
+        def on_batch(batch: BatchRequest):
+            for result in batch.results:
+                if isinstance(result, dict):
+                    if not self.check_error(name, result) and on_result:
+                        on_result(result["result"])
+                else:
+                    self.logger.info("%s失败，信息：%s", name, result)
+
+            if callback:
+                callback(batch)
+
+        return on_batch
+
     def on_cancel_order(self, data: dict, request: Request):
         """"""
         if self.check_error("委托下单", data):
@@ -290,15 +862,11 @@ class BybitRestApi:
 
     def on_query_contract(self, data: dict, request: Request):
         """"""
-        print("on_query_contract")
         if self.check_error("查询合约", data):
             return
 
-        for d in data["result"]:
-            print(d)
-            # self.gateway.on_contract(contract)
-
-        self.logger.info("合约信息查询成功")
+        self.gateway.contracts.on_symbols(data["result"])
+        self.logger.info("合约信息查询成功，数量：%s", len(self.gateway.contracts))
 
     def check_error(self, name: str, data: dict):
         """"""
@@ -336,7 +904,6 @@ class BybitRestApi:
         :param extra: Any extra data which can be used when handling callback
         :return: Request
         """
-        print("debug")
         request = Request(
             method=method,
             path=path,
@@ -349,38 +916,110 @@ class BybitRestApi:
             extra=extra,
             client=self,
         )
-        task = pool.apply_async(
-            self._process_request,
-            args=[request, ],
-            callback=self._clean_finished_tasks,
-            # error_callback=lambda e: self.on_error(type(e), e, e.__traceback__, request),
-        )
-        print(1)
-        self._push_task(task)
+        self._submit(self._process_request(request), [request])
         return request
 
-    def _clean_finished_tasks(self, result: None):
+    def add_batch_request(
+            self,
+            method: str,
+            path: str,
+            data_list: List[Union[dict, str, bytes]],
+            callback: BATCH_CALLBACK_TYPE = None,
+            extras: List[Any] = None,
+    ):
+        """
+        Add a batch of requests to the same path, sent concurrently. Each
+        request is signed when it gets its rate limit token, so requests
+        waiting for the limiter do not expire in recv_window.
+        :param data_list: Http body of each request.
+        :param callback: callback function when all requests finished, type: (BatchRequest)
+        :param extras: Any extra data for each request, kept in BatchRequest.extras
+        :return: BatchRequest
+        """
+        batch = BatchRequest(callback, extras)
+        for i, data in enumerate(data_list):
+            request = Request(
+                method=method,
+                path=path,
+                params=None,
+                data=data,
+                headers=None,
+                callback=batch.on_result,
+                on_failed=batch.on_failed,
+                on_error=batch.on_error,
+                extra=i,
+                client=self,
+            )
+            batch.requests.append(request)
+            batch.results.append(None)
+
+        if not self._submit(self._process_batch(batch), batch.requests) and batch.callback:
+            batch.callback(batch)
+        return batch
+
+    def _submit(self, coro, requests: List[Request]) -> bool:
+        """
+        Run coro on the event loop. Requests are failed with an error if the
+        client is not started or already stopped.
+        """
+        if self._active:
+            try:
+                task = asyncio.run_coroutine_threadsafe(coro, self._loop)
+            except RuntimeError:
+                # Loop closed by stop() in the meantime
+                pass
+            else:
+                task.add_done_callback(self._clean_finished_tasks)
+                self._push_task(task)
+                return True
+
+        coro.close()
+        error = RuntimeError("REST client is not running, call start() first")
+        for request in requests:
+            request.status = RequestStatus.error
+            if request.on_error:
+                request.on_error(RuntimeError, error, None, request)
+            else:
+                self.on_error(RuntimeError, error, None, request)
+        return False
+
+    async def _process_batch(self, batch: BatchRequest):
+        """"""
+        await asyncio.gather(
+            *[self._process_request(request) for request in batch.requests]
+        )
+
+        if batch.callback:
+            try:
+                batch.callback(batch)
+            except Exception:
+                t, v, tb = sys.exc_info()
+                self.on_error(t, v, tb, None)
+
+    def _clean_finished_tasks(self, result: asyncio.Future):
         with self._tasks_lock:
-            not_finished_tasks = [i for i in self._tasks if not i.ready()]
+            not_finished_tasks = [i for i in self._tasks if not i.done()]
             self._tasks = not_finished_tasks
 
     def _push_task(self, task):
         with self._tasks_lock:
             self._tasks.append(task)
 
-    def _process_request(
-            self, request: Request
-    ):
+    async def _process_request(self, request: Request):
         """
         Sending request to server and get result.
+
+        Request is signed after waiting for rate limit and connection, so its
+        timestamp is fresh when it is sent.
         """
-        print(23)
-        self.logger.info("_process_request")
         try:
-            with self._get_session() as session:
+            await self.rate_limiter.acquire(request.path)
+
+            async with self._semaphore:
+                session = self._get_session()
                 request = self.sign(request)
                 url = self.url_base + request.path
-                self.logger.info("test")
+
                 # send request
                 uid = uuid.uuid4()
                 stream = request.stream
@@ -391,44 +1030,52 @@ class BybitRestApi:
                 self.logger.info("[%s] sending request %s %s, headers:%s, params:%s, data:%s",
                                  uid, method, url,
                                  headers, params, data)
-                response = session.request(
+                # Connection goes back to the pool when the block exits, also on errors
+                async with session.request(
                     method,
                     url,
                     headers=headers,
                     params=params,
                     data=data,
-                    stream=stream,
-                )
-                request.response = response
-                status_code = response.status_code
-
-                self.logger.info("[%s] received response from %s:%s", uid, method, url)
-
-                # check result & call corresponding callbacks
-                if not stream:  # normal API:
-                    # just call callback with all contents received.
-                    if status_code // 100 == 2:  # 2xx codes are all successful
-                        if status_code == 204:
-                            json_body = None
+                ) as cr:
+                    status_code = cr.status
+
+                    self.logger.info("[%s] received response from %s:%s", uid, method, url)
+
+                    # check result & call corresponding callbacks
+                    if not stream:  # normal API:
+                        # just call callback with all contents received.
+                        text = await cr.text()
+                        request.response = Response(status_code, text)
+
+                        if status_code // 100 == 2:  # 2xx codes are all successful
+                            if status_code == 204:
+                                json_body = None
+                            else:
+                                json_body = request.response.json()
+                                self.rate_limiter.on_response(request.path, json_body)
+                            self._process_json_body(json_body, request)
                         else:
-                            json_body = response.json()
-                        self._process_json_body(json_body, request)
-                    else:
-                        if request.on_failed:
+                            if status_code == 403:
+                                self.rate_limiter.on_ip_limited()
+
                             request.status = RequestStatus.failed
-                            request.on_failed(status_code, request)
-                        else:
-                            self.on_failed(status_code, request)
-                else:  # streaming API:
-                    if request.on_connected:
-                        request.on_connected(request)
-                    # split response by lines, and call one callback for each line.
-                    for line in response.iter_lines(chunk_size=None):
-                        if line:
-                            request.processing_line = line
-                            json_body = json.loads(line)
-                            self._process_json_body(json_body, request)
-                    request.status = RequestStatus.success
+                            if request.on_failed:
+                                request.on_failed(status_code, request)
+                            else:
+                                self.on_failed(status_code, request)
+                    else:  # streaming API:
+                        request.response = Response(status_code, "")
+                        if request.on_connected:
+                            request.on_connected(request)
+                        # split response by lines, and call one callback for each line.
+                        async for line in cr.content:
+                            line = line.strip()
+                            if line:
+                                request.processing_line = line
+                                json_body = json.loads(line)
+                                self._process_json_body(json_body, request)
+                        request.status = RequestStatus.success
         except Exception:
             request.status = RequestStatus.error
             t, v, tb = sys.exc_info()
@@ -437,22 +1084,40 @@ class BybitRestApi:
             else:
                 self.on_error(t, v, tb, request)
 
-    def _get_session(self):
-        with self._sessions_lock:
-            if self._sessions:
-                return self.Session(self, self._sessions.pop())
-            else:
-                return self.Session(self, self._create_session())
+    def _get_session(self) -> ClientSession:
+        """
+        Session is shared by all requests, aiohttp pools the connections.
+        """
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> ClientSession:
+        """"""
+        connector = TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        return ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=self.timeout),
+            trace_configs=[self.pool_stats.create_trace_config()],
+            trust_env=True
+        )
 
-    def _create_session(self):
+    async def _warm_connection(self):
         """"""
-        return requests.session()
+        session = self._get_session()
+        async with session.head(self.url_base) as cr:
+            await cr.release()
 
     def on_failed(self, status_code: int, request: Request):
         """
         Default on_failed handler for Non-2xx response.
         """
-        sys.stderr.write(str(request))
+        self.logger.error(f"请求失败，状态码：{status_code}，{request}")
 
     def on_error(
             self,
@@ -464,11 +1129,7 @@ class BybitRestApi:
         """
         Default on_error handler for Python exception.
         """
-        sys.stderr.write(
-            self.exception_detail(exception_type, exception_value, tb, request)
-        )
-        sys.excepthook(exception_type, exception_value, tb)
-        self.logger.error("ErrorType: "+exception_type + " ErrorValue: "+ exception_value)
+        self.logger.error(self.exception_detail(exception_type, exception_value, tb, request))
 
     def exception_detail(
         self,
@@ -477,15 +1138,12 @@ class BybitRestApi:
         tb,
         request: Optional[Request],
     ):
-        text = "[{}]: Unhandled RestClient Error:{}\n".format(
-            datetime.now().isoformat(), exception_type
-        )
-        text += "request:{}\n".format(request)
-        text += "Exception trace: \n"
-        text += "".join(
-            traceback.format_exception(exception_type, exception_value, tb)
+        trace = "".join(traceback.format_exception(exception_type, exception_value, tb))
+        return (
+            f"[{datetime.now().isoformat()}]: Unhandled RestClient Error:{exception_type.__name__}\n"
+            f"request:{request}\n"
+            f"Exception trace: \n{trace}"
         )
-        return text
 
     def _process_json_body(self, json_body: Optional[dict], request: "Request"):
         status_code = request.response.status_code
@@ -567,141 +1225,12 @@ class WebsocketClient(object):
             self.logger.setLevel(logging.DEBUG)
 
 
-class LocalOrderManager:
-    """
-    Management tool to support use local order id for trading.
-    """
-
-    def __init__(self, gateway: BybitGateway, order_prefix: str = ""):
-        """"""
-        self.gateway = gateway
-
-        # For generating local orderid
-        self.order_prefix = order_prefix
-        self.order_count = 0
-        self.orders = {}  # local_orderid:order
-
-        # Map between local and system orderid
-        self.local_sys_orderid_map = {}
-        self.sys_local_orderid_map = {}
-
-        # Push order data buf
-        self.push_data_buf = {}  # sys_orderid:data
-
-        # Callback for processing push order data
-        self.push_data_callback = None
-
-        # Cancel request buf
-        self.cancel_request_buf = {}  # local_orderid:req
-
-        # Hook cancel order function
-        self._cancel_order = gateway.cancel_order
-        gateway.cancel_order = self.cancel_order
-
-    def new_order_link_id(self):
-        """
-        Generate a new local orderid.
-        """
-        self.order_count += 1
-        order_link_id = self.order_prefix + str(self.order_count) + str(uuid.uuid4())
-        return order_link_id
-
-    def get_order_link_id(self, order_id: str):
-        """
-        Get order_link_id with order_id.
-        """
-        order_link_id = self.sys_local_orderid_map.get(order_id, "")
-
-        if not order_link_id:
-            order_link_id = self.new_order_link_id()
-            self.update_order_id_map(order_link_id, order_id)
-
-        return order_link_id
-
-    def get_order_id(self, order_link_id: str):
-        """
-        Get order_id with local order_link_id.
-        """
-        order_id = self.local_sys_orderid_map.get(order_link_id, "")
-        return order_id
-
-    def update_order_id_map(self, order_link_id: str, order_id: str):
-        """
-        Update orderid map.
-        """
-        self.sys_local_orderid_map[order_id] = order_link_id
-        self.local_sys_orderid_map[order_link_id] = order_id
-
-        self.check_cancel_request(order_link_id)
-        self.check_push_data(order_id)
-
-    def check_push_data(self, sys_orderid: str):
-        """
-        Check if any order push data waiting.
-        """
-        if sys_orderid not in self.push_data_buf:
-            return
-
-        data = self.push_data_buf.pop(sys_orderid)
-        if self.push_data_callback:
-            self.push_data_callback(data)
-
-    def add_push_data(self, sys_orderid: str, data: dict):
-        """
-        Add push data into buf.
-        """
-        self.push_data_buf[sys_orderid] = data
-
-    def get_order_with_sys_orderid(self, order_id: str):
-        """
-        Get order_link_id by order_id
-        :param order_id:
-        :return:
-        """
-        order_link_id = self.sys_local_orderid_map.get(order_id, None)
-        if not order_link_id:
-            return None
-        else:
-            return self.get_order_with_local_orderid(order_link_id)
-
-    def get_order_with_order_link_id(self, order_link_id: str):
-        """"""
-        order = self.orders[order_link_id]
-        return copy(order)
-
-    def on_order(self, order: OrderData):
-        """
-        Keep an order buf before pushing it to bybit_gateway.
-        """
-        self.orders[order.order_link_id] = copy(order)
-        self.gateway.on_order(order)
-
-    def cancel_order(self, req: CancelRequest):
-        """
-        """
-        order_link_id = self.get_order_link_id(req.order_link_id)
-        if not order_link_id:
-            self.cancel_request_buf[req.order_link_id] = req
-            return
-
-        self._cancel_order(req)
-
-    def check_cancel_request(self, order_link_id: str):
-        """
-        """
-        if order_link_id not in self.cancel_request_buf:
-            return
-
-        req = self.cancel_request_buf.pop(order_link_id)
-        self.gateway.cancel_order(req)
-
-
 def generate_timestamp(expire_after: float = 30) -> int:
     """
     :param expire_after: expires in seconds.
     :return: timestamp in milliseconds
     """
-    return int(time.time() * 1000 + expire_after * 1000)
+    return int(CLOCK.now_ms() + expire_after * 1000)
 
 
 def sign(secret: bytes, data: bytes) -> str:
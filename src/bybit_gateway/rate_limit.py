@@ -0,0 +1,256 @@
+import asyncio
+import time
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Tuple
+
+# Priority classes, lower value is served first
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_QUERY = 2
+
+RATE_LIMITED_CODE = 10006
+
+# path: (requests per minute, priority)
+ENDPOINT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "/open-api/order/cancel": (100, PRIORITY_CANCEL),
+    "/v2/private/order/cancel": (100, PRIORITY_CANCEL),
+    "/v2/private/order/cancelAll": (10, PRIORITY_CANCEL),
+    "/open-api/order/create": (100, PRIORITY_ORDER),
+    "/v2/private/order/create": (100, PRIORITY_ORDER),
+    "/v2/private/order/replace": (100, PRIORITY_ORDER),
+    "/v2/private/order": (600, PRIORITY_QUERY),
+    "/v2/private/position/list": (120, PRIORITY_QUERY),
+}
+DEFAULT_LIMIT = (600, PRIORITY_QUERY)
+
+# Requests per second allowed for each IP, shared by all endpoints
+GLOBAL_LIMIT = 50
+
+
+class BucketStats:
+    """
+    Queue wait time of requests passing a bucket.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.delayed: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+        self.throttled: int = 0  # rejected by server with rate limit error
+
+    def on_acquired(self, wait: float):
+        """"""
+        self.count += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "count": self.count,
+            "delayed": self.delayed,
+            "avg_wait": self.total_wait / self.count if self.count else 0,
+            "max_wait": self.max_wait,
+            "throttled": self.throttled,
+        }
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity / period tokens per second.
+
+    Waiters are served by priority, then by arrival. Must be used from
+    inside the event loop only.
+    """
+
+    def __init__(self, name: str, capacity: int, period: float = 60):
+        """"""
+        self.name = name
+        self.capacity: float = capacity
+        self.rate: float = capacity / period
+        self.tokens: float = capacity
+        self.updated: float = time.monotonic()
+        self.blocked_until: float = 0
+
+        self.stats = BucketStats()
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._count: int = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float):
+        """"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _available(self, now: float) -> bool:
+        """"""
+        return self.tokens >= 1 and now >= self.blocked_until
+
+    async def acquire(self, priority: int = PRIORITY_QUERY) -> float:
+        """
+        Take one token, wait if none left.
+        :return: seconds waited in queue
+        """
+        start = time.monotonic()
+        self._refill(start)
+
+        if not self._waiters and self._available(start):
+            self.tokens -= 1
+            self.stats.on_acquired(0)
+            return 0
+
+        future = asyncio.get_running_loop().create_future()
+        self._count += 1
+        heappush(self._waiters, (priority, self._count, future))
+        self._schedule()
+
+        await future
+
+        wait = time.monotonic() - start
+        self.stats.on_acquired(wait)
+        return wait
+
+    def _schedule(self):
+        """
+        Arm the timer for the time the next token becomes available.
+        """
+        if self._timer or not self._waiters:
+            return
+
+        now = time.monotonic()
+        delay = max(
+            self.blocked_until - now,
+            (1 - self.tokens) / self.rate,
+            0
+        )
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._wake)
+
+    def _wake(self):
+        """"""
+        self._timer = None
+
+        now = time.monotonic()
+        self._refill(now)
+
+        waiters = self._waiters
+        while waiters and self._available(now):
+            _, _, future = heappop(waiters)
+            if future.done():  # waiting task was cancelled
+                continue
+
+            self.tokens -= 1
+            future.set_result(None)
+
+        self._schedule()
+
+    def update(self, limit: int, remaining: int, reset_ms: int):
+        """
+        Align bucket with rate_limit, rate_limit_status and rate_limit_reset_ms
+        reported by server.
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        if limit and limit != self.capacity:
+            self.rate = self.rate * limit / self.capacity
+            self.capacity = limit
+
+        self.tokens = min(self.tokens, remaining)
+
+        if remaining <= 0 and reset_ms:
+            self.block(reset_ms / 1000 - time.time())
+
+    def block(self, seconds: float):
+        """
+        Stop handing out tokens for some seconds.
+        """
+        if seconds <= 0:
+            return
+
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+        # Re-arm the timer with the new delay
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._schedule()
+
+
+class RateLimiter:
+    """
+    Client side rate limiter for BybitRestApi.
+
+    Each endpoint has its own bucket, plus a global bucket for the IP limit
+    shared by all endpoints. Cancels are served before new orders, and new
+    orders before queries.
+    """
+
+    def __init__(self, global_limit: int = GLOBAL_LIMIT):
+        """"""
+        self.global_bucket = TokenBucket("global", global_limit, 1)
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def get_bucket(self, path: str) -> Tuple[TokenBucket, int]:
+        """
+        Get bucket and priority of path.
+        """
+        limit, priority = ENDPOINT_LIMITS.get(path, DEFAULT_LIMIT)
+
+        bucket = self.buckets.get(path, None)
+        if not bucket:
+            bucket = TokenBucket(path, limit)
+            self.buckets[path] = bucket
+
+        return bucket, priority
+
+    async def acquire(self, path: str) -> float:
+        """
+        Wait till request to path can be sent.
+        :return: seconds waited in queue
+        """
+        bucket, priority = self.get_bucket(path)
+        wait = await bucket.acquire(priority)
+        wait += await self.global_bucket.acquire(priority)
+        return wait
+
+    def on_response(self, path: str, data: dict):
+        """
+        Adapt bucket of path with rate limit fields of the response.
+        """
+        if not isinstance(data, dict):
+            return
+
+        bucket, _ = self.get_bucket(path)
+
+        if data.get("ret_code", 0) == RATE_LIMITED_CODE:
+            bucket.stats.throttled += 1
+            bucket.tokens = 0
+
+        if "rate_limit_status" in data:
+            bucket.update(
+                data.get("rate_limit", 0),
+                data["rate_limit_status"],
+                data.get("rate_limit_reset_ms", 0)
+            )
+        elif data.get("ret_code", 0) == RATE_LIMITED_CODE:
+            bucket.block(1)
+
+    def on_ip_limited(self, seconds: float = 1):
+        """
+        Server returned 403, stop sending anything for a while.
+        """
+        self.global_bucket.stats.throttled += 1
+        self.global_bucket.block(seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        """"""
+        data = {"global": self.global_bucket.stats.to_dict()}
+        for path, bucket in self.buckets.items():
+            data[path] = bucket.stats.to_dict()
+        return data
@@ -0,0 +1,462 @@
+import asyncio
+import logging
+import sys
+import time
+import traceback
+from datetime import datetime
+from threading import Lock, Thread, get_ident
+from typing import Optional, Union
+
+from aiohttp import ClientSession, ClientWebSocketResponse, TCPConnector, WSMsgType
+
+from src.logger import LogFactory
+from .codec import JsonCodec, get_codec
+from .recorder import FrameRecorder
+from .supervisor import Backoff, ConnectionHealth
+from .heartbeat import LatencyHistogram
+
+
+class WebsocketLoop:
+    """
+    Event loop on a dedicated thread hosting any number of AsyncWebsocketClient.
+
+    All sockets of the loop share one ClientSession, callbacks of every
+    client are called on the loop thread.
+    """
+
+    def __init__(self, verify_ssl: bool = True):
+        """
+        :param verify_ssl: check TLS certificates of servers, only turn off for testing
+        """
+        self.verify_ssl = verify_ssl
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[Thread] = None
+        self.thread_id: int = 0
+
+        self._session: Optional[ClientSession] = None
+        self._lock = Lock()
+
+    def start(self):
+        """"""
+        with self._lock:
+            if self.loop:
+                return
+
+            self.loop = asyncio.new_event_loop()
+            self.thread = Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Close the shared session and stop the loop thread.
+        """
+        with self._lock:
+            loop = self.loop
+            if not loop:
+                return
+            self.loop = None
+
+        asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self.thread.join()
+
+    def _run(self):
+        """"""
+        loop = self.loop
+        self.thread_id = get_ident()
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
+
+    async def _close(self):
+        """"""
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def in_loop(self) -> bool:
+        """
+        Check if caller is running on the loop thread.
+        """
+        return get_ident() == self.thread_id
+
+    def get_session(self) -> ClientSession:
+        """
+        Session shared by all sockets, must be called inside the loop.
+        """
+        if self._session is None or self._session.closed:
+            if self.verify_ssl:
+                connector = TCPConnector(limit=0)
+            else:
+                connector = TCPConnector(limit=0, ssl=False)
+            self._session = ClientSession(connector=connector, trust_env=True)
+        return self._session
+
+
+_default_loop: Optional[WebsocketLoop] = None
+
+
+def get_websocket_loop() -> WebsocketLoop:
+    """
+    Loop shared by clients created without one.
+    """
+    global _default_loop
+    if not _default_loop:
+        _default_loop = WebsocketLoop()
+    return _default_loop
+
+
+class AsyncWebsocketClient(object):
+    """
+    Websocket API running on asyncio.
+
+    Same callbacks as WebsocketClient, but instead of a worker and a ping
+    thread for each client, every connection is a task of a WebsocketLoop,
+    so many sockets share one thread. Callbacks are called on the loop
+    thread and should not block.
+
+    send_packet can be called from any thread.
+
+    Callbacks to overrides:
+    * unpack_data
+    * on_connected
+    * on_disconnected
+    * on_packet
+    * on_error
+    """
+
+    def __init__(self, gateway, loop: WebsocketLoop = None):
+        """Constructor"""
+        self.gateway = gateway
+        self.host = None
+        self.ws_loop: WebsocketLoop = loop or get_websocket_loop()
+
+        self._ws: Optional[ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Future] = None
+        self._active = False
+
+        self.ping_interval = 60  # seconds
+        self.pong_timeout: float = 10  # seconds
+        self.max_missed: int = 2
+        self.header = {}
+        self.proxy: Optional[str] = None
+
+        self.logger: Optional[logging.Logger] = None
+        self.codec = JsonCodec
+
+        # Reconnect supervision
+        self.backoff = Backoff()
+        self.health = ConnectionHealth()
+        self.stable_after: float = 30  # seconds up before backoff is reset
+
+        # Heartbeat
+        self.latency = LatencyHistogram()
+        self.missed: int = 0
+        self._pong: Optional[asyncio.Future] = None
+
+        # For debugging
+        self._last_sent_text = None
+        self._last_received_text = None
+
+        self._recorder: Optional[FrameRecorder] = None
+
+    def init(self, host: str, ping_interval: int = 60, log_path: Optional[str] = None,
+             codec: str = "auto", proxy_host: str = "", proxy_port: int = 0,
+             ):
+        """
+        :param host:
+        :param ping_interval: unit: seconds, type: int
+        :param log_path: optional. file to save logger.
+        :param codec: json, orjson, ujson or auto for the fastest importable one.
+        :param proxy_host: optional. http proxy host.
+        :param proxy_port: optional. http proxy port.
+        """
+        self.host = host
+        self.ping_interval = ping_interval
+        self.codec = get_codec(codec)
+
+        if proxy_host and proxy_port:
+            self.proxy = f"http://{proxy_host}:{proxy_port}"
+
+        if log_path is not None:
+            self.logger = LogFactory.get_file_logger(log_path)
+            self.logger.setLevel(logging.DEBUG)
+
+    def start(self):
+        """
+        Start the client on its loop, on_connected function is called after
+        websocket is connected successfully.
+        """
+        if self._active:
+            return
+        self._active = True
+        self.backoff.reset()
+
+        self.ws_loop.start()
+        self._task = asyncio.run_coroutine_threadsafe(self._run(), self.ws_loop.loop)
+
+    def stop(self):
+        """
+        Stop the client, other clients of the loop keep running.
+        """
+        self._active = False
+        if self._task:
+            self._task.cancel()
+        self.stop_capture()
+
+    def join(self):
+        """
+        Wait till the client task finishes.
+
+        This function cannot be called from the loop thread or callback function.
+        """
+        if self._task:
+            try:
+                self._task.result()
+            except BaseException:  # noqa
+                pass
+
+    def start_capture(self, path: str):
+        """"""
+        self.stop_capture()
+        self._recorder = FrameRecorder(path)
+
+    def stop_capture(self):
+        """"""
+        recorder = self._recorder
+        if recorder:
+            self._recorder = None
+            recorder.close()
+
+    def send_packet(self, packet: dict):
+        """
+        Send a packet (dict data) to server.
+        """
+        text = self.codec.dumps(packet)
+        self._record_last_sent_text(text)
+        self._send_text(text)
+
+    def _send_text(self, text: str):
+        """
+        Schedule sending text on the loop, in call order.
+        """
+        ws = self._ws
+        if not ws:
+            return
+
+        if self.ws_loop.in_loop():
+            future = asyncio.ensure_future(ws.send_str(text))
+        else:
+            future = asyncio.run_coroutine_threadsafe(ws.send_str(text), self.ws_loop.loop)
+        future.add_done_callback(self._on_sent)
+        self._log('sent text: %s', text)
+
+    def _on_sent(self, future):
+        """
+        Pass error of a send to on_error.
+        """
+        if future.cancelled():
+            return
+
+        e = future.exception()
+        if e:
+            self.on_error(type(e), e, e.__traceback__)
+
+    def _log(self, msg, *args):
+        logger = self.logger
+        if logger:
+            logger.debug(msg, *args)
+
+    async def _run(self):
+        """
+        Keep connecting till stop is called.
+        """
+        while self._active:
+            delay = self.backoff.delay()
+            if delay:
+                self._log("reconnect in %.2fs, attempt %s", delay, self.backoff.attempts)
+                await asyncio.sleep(delay)
+
+            try:
+                ws = await self.ws_loop.get_session().ws_connect(
+                    self.host,
+                    headers=self.header,
+                    proxy=self.proxy,
+                    autoping=True,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._log("connect failed: %s", e)
+                self.health.on_failed()
+                self.backoff.fail()
+                continue
+
+            await self._serve(ws)
+
+    async def _serve(self, ws: ClientWebSocketResponse):
+        """
+        Receive from one connection till it is closed.
+        """
+        self._ws = ws
+        self.health.on_connected()
+        self.missed = 0
+        ping_task = asyncio.ensure_future(self._run_ping(ws))
+
+        try:
+            self.on_connected()
+
+            async for msg in ws:
+                if msg.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    break
+
+                text = msg.data
+                self.health.on_recv()
+
+                recorder = self._recorder
+                if recorder:
+                    recorder.write(text)
+
+                self._record_last_received_text(text)
+
+                try:
+                    data = self.unpack_data(text)
+                except ValueError as e:
+                    print("websocket unable to parse data: {}".format(text))
+                    raise e
+
+                self._log('recv data: %s', data)
+
+                pong = self._pong
+                if pong and not pong.done() and self.is_pong(data):
+                    pong.set_result(time.perf_counter())
+
+                self.on_packet(data)
+        except asyncio.CancelledError:
+            raise
+        except:  # noqa
+            et, ev, tb = sys.exc_info()
+            self.on_error(et, ev, tb)
+        finally:
+            ping_task.cancel()
+            self._ws = None
+            await ws.close()
+
+            uptime = self.health.on_disconnected()
+            if uptime >= self.stable_after:
+                self.backoff.reset()
+            else:
+                self.backoff.fail()
+
+            self.on_disconnected()
+
+    async def _run_ping(self, ws: ClientWebSocketResponse):
+        """
+        Ping every ping_interval, close the socket after max_missed pongs.
+        """
+        loop = asyncio.get_running_loop()
+
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+
+            self._pong = loop.create_future()
+            sent_at = time.perf_counter()
+            self.send_packet({"op": "ping"})
+
+            try:
+                received_at = await asyncio.wait_for(self._pong, self.pong_timeout)
+            except asyncio.TimeoutError:
+                self.missed += 1
+                self._log("pong not received in %ss, missed %s", self.pong_timeout, self.missed)
+
+                if self.missed >= self.max_missed:
+                    await ws.close()
+                    return
+            else:
+                self.latency.add((received_at - sent_at) * 1000)
+                self.missed = 0
+            finally:
+                self._pong = None
+
+    def get_health(self) -> dict:
+        """"""
+        data = self.health.to_dict()
+        data["attempts"] = self.backoff.attempts
+        data["missed_pongs"] = self.missed
+        data["rtt"] = self.latency.last
+        return data
+
+    def get_latency(self) -> dict:
+        """"""
+        return self.latency.to_dict()
+
+    def unpack_data(self, data: Union[str, bytes]):
+        """
+        Default serialization format is json.
+        """
+        return self.codec.loads(data)
+
+    @staticmethod
+    def is_pong(packet: dict) -> bool:
+        """"""
+        return isinstance(packet, dict) and packet.get("ret_msg", None) == "pong"
+
+    @staticmethod
+    def on_connected():
+        """
+        Callback when websocket is connected successfully.
+        """
+        pass
+
+    @staticmethod
+    def on_disconnected():
+        """
+        Callback when websocket connection is lost.
+        """
+        pass
+
+    @staticmethod
+    def on_packet(packet: dict):
+        """
+        Callback when receiving data from server.
+        """
+        pass
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb):
+        """
+        Callback when exception raised.
+        """
+        sys.stderr.write(
+            self.exception_detail(exception_type, exception_value, tb)
+        )
+        return sys.excepthook(exception_type, exception_value, tb)
+
+    def exception_detail(
+            self, exception_type: type, exception_value: Exception, tb
+    ):
+        """
+        Print detailed exception information.
+        """
+        text = "[{}]: Unhandled WebSocket Error:{}\n".format(
+            datetime.now().isoformat(), exception_type
+        )
+        text += "LastSentText:\n{}\n".format(self._last_sent_text)
+        text += "LastReceivedText:\n{}\n".format(self._last_received_text)
+        text += "Exception trace: \n"
+        text += "".join(
+            traceback.format_exception(exception_type, exception_value, tb)
+        )
+        return text
+
+    def _record_last_sent_text(self, text: str):
+        """"""
+        self._last_sent_text = text[:1000]
+
+    def _record_last_received_text(self, text: str):
+        """"""
+        self._last_received_text = text[:1000]
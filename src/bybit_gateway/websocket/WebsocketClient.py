@@ -1,14 +1,19 @@
-import json
 import logging
 import socket
 import ssl
 import sys
 import traceback
 from datetime import datetime
-from threading import Lock, Thread
-from time import sleep
-from typing import Optional
-from src.bybit_gateway import websocket, BybitGateway
+from threading import Event, Lock, Thread
+from typing import Optional, Union
+
+import websocket
+
+from src.bybit_gateway import BybitGateway
+from .codec import JsonCodec, get_codec
+from .recorder import FrameRecorder
+from .supervisor import Backoff, ConnectionHealth
+from .heartbeat import Heartbeat
 
 
 class WebsocketClient(object):
@@ -21,7 +26,8 @@ class WebsocketClient(object):
     Use stop to stp threads and disconnect websocket before destroying the client
     object (especially when exiting the programme).
 
-    Default serialization format is json.
+    Default serialization format is json, encoded and decoded by the codec
+    selected in init() (orjson or ujson when importable, json otherwise).
 
     Callbacks to overrides:
     * unpack_data
@@ -30,7 +36,14 @@ class WebsocketClient(object):
     * on_packet
     * on_error
 
-    After start() is called, the ping thread will ping server every 60 seconds.
+    After start() is called, the ping thread sends {"op": "ping"} every
+    ping_interval seconds and records the round trip of the pong. The
+    connection is dropped after max_missed pongs did not arrive within
+    pong_timeout.
+
+    A lost connection is reopened by the worker thread, waiting a jittered
+    exponential backoff when connecting fails or the connection keeps
+    dropping. on_connected is called again after every reconnect.
 
     If you want to send anything other than JSON, override send_packet.
     """
@@ -48,23 +61,49 @@ class WebsocketClient(object):
         self._active = False
 
         self.ping_interval = 60  # seconds
+        self.pong_timeout: float = 10  # seconds
+        self.max_missed: int = 2
+        self.heartbeat = Heartbeat()
         self.header = {}
 
+        self.proxy_host: Optional[str] = None
+        self.proxy_port: Optional[int] = None
+
+        # Reconnect supervision
+        self.backoff = Backoff()
+        self.health = ConnectionHealth()
+        self.stable_after: float = 30  # seconds up before backoff is reset
+        self.stale_timeout: float = 0  # seconds without frame before reconnect, 0 to disable
+        self._stop_event = Event()
+
         self.logger: Optional[logging.Logger] = None
+        self.codec = JsonCodec
 
         # For debugging
         self._last_sent_text = None
         self._last_received_text = None
 
+        # Capture of all received frames, see start_capture
+        self._recorder: Optional[FrameRecorder] = None
+
     def init(self, host: str, ping_interval: int = 60, log_path: Optional[str] = None,
+             codec: str = "auto", proxy_host: str = "", proxy_port: int = 0,
              ):
         """
         :param host:
         :param ping_interval: unit: seconds, type: int
         :param log_path: optional. file to save logger.
+        :param codec: json, orjson, ujson or auto for the fastest importable one.
+        :param proxy_host: optional. http proxy host.
+        :param proxy_port: optional. http proxy port.
         """
         self.host = host
         self.ping_interval = ping_interval  # seconds
+        self.codec = get_codec(codec)
+
+        if proxy_host and proxy_port:
+            self.proxy_host = proxy_host
+            self.proxy_port = proxy_port
         if log_path is not None:
             self.logger = get_file_logger(log_path)
             self.logger.setLevel(logging.DEBUG)
@@ -77,6 +116,9 @@ class WebsocketClient(object):
         Please don't send packet untill on_connected fucntion is called.
         """
         self._active = True
+        self._stop_event.clear()
+        self.heartbeat.start()
+        self.backoff.reset()
         self._worker_thread = Thread(target=self._run)
         self._worker_thread.start()
 
@@ -88,7 +130,10 @@ class WebsocketClient(object):
         Stop the client.
         """
         self._active = False
+        self._stop_event.set()
+        self.heartbeat.stop()
         self._disconnect()
+        self.stop_capture()
 
     def join(self):
         """
@@ -99,13 +144,28 @@ class WebsocketClient(object):
         self._ping_thread.join()
         self._worker_thread.join()
 
+    def start_capture(self, path: str):
+        """
+        Record every received frame into a capture file, which can be fed
+        back later with FrameReplayer.
+        """
+        self.stop_capture()
+        self._recorder = FrameRecorder(path)
+
+    def stop_capture(self):
+        """"""
+        recorder = self._recorder
+        if recorder:
+            self._recorder = None
+            recorder.close()
+
     def send_packet(self, packet: dict):
         """
         Send a packet (dict data) to server
 
         override this if you want to send non-json packet
         """
-        text = json.dumps(packet)
+        text = self.codec.dumps(packet)
         self._record_last_sent_text(text)
         return self._send_text(text)
 
@@ -150,6 +210,8 @@ class WebsocketClient(object):
                 )
                 triggered = True
         if triggered:
+            self.health.on_connected()
+            self.heartbeat.reset()
             self.on_connected()
 
     def _disconnect(self):
@@ -164,34 +226,92 @@ class WebsocketClient(object):
                 triggered = True
         if triggered:
             ws.close()
+
+            # Connection dropping soon after it was opened counts as a failure
+            uptime = self.health.on_disconnected()
+            if uptime >= self.stable_after:
+                self.backoff.reset()
+            else:
+                self.backoff.fail()
+
             self.on_disconnected()
 
+    def _connect(self) -> bool:
+        """
+        Open a new connection, after the backoff delay if there is one.
+        :return: True if connected
+        """
+        delay = self.backoff.delay()
+        if delay:
+            self._log("reconnect in %.2fs, attempt %s", delay, self.backoff.attempts)
+            if self._stop_event.wait(delay):
+                return False
+
+        try:
+            self._ensure_connection()
+        except Exception as e:
+            self._log("connect failed: %s", e)
+            self.health.on_failed()
+            if self._ws:
+                self._disconnect()  # on_connected failed
+            else:
+                self.backoff.fail()
+            return False
+
+        return self._ws is not None
+
+    def get_health(self) -> dict:
+        """"""
+        data = self.health.to_dict()
+        data["attempts"] = self.backoff.attempts
+        data["missed_pongs"] = self.heartbeat.missed
+        data["rtt"] = self.heartbeat.latency.last
+        return data
+
+    def get_latency(self) -> dict:
+        """
+        Statistics of recent ping round trips in milliseconds.
+        """
+        return self.heartbeat.latency.to_dict()
+
     def _run(self):
         """
         Keep running till stop is called.
         """
         try:
             while self._active:
+                if not self._ws and not self._connect():
+                    continue
+
                 try:
-                    self._ensure_connection()
                     ws = self._ws
                     if ws:
-                        text = ws.recv()
+                        text = self._recv(ws)
 
                         # ws object is closed when recv function is blocking
                         if not text:
                             self._disconnect()
                             continue
 
+                        self.health.on_recv()
+
+                        recorder = self._recorder
+                        if recorder:
+                            recorder.write(text)
+
                         self._record_last_received_text(text)
 
                         try:
                             data = self.unpack_data(text)
                         except ValueError as e:
-                            print("websocket unable to parse data: " + text)
+                            print("websocket unable to parse data: {}".format(text))
                             raise e
 
                         self._log('recv data: %s', data)
+
+                        if self.heartbeat.waiting and self.is_pong(data):
+                            self.heartbeat.on_pong()
+
                         self.on_packet(data)
                 # ws is closed before recv function is called
                 # For socket.error, see Issue #1608
@@ -208,37 +328,74 @@ class WebsocketClient(object):
             self.on_error(et, ev, tb)
         self._disconnect()
 
-    @staticmethod
-    def unpack_data(data: str):
+    def _recv(self, ws: websocket.WebSocket) -> Union[str, bytes]:
+        """
+        Receive one frame. Payload is kept as bytes when the codec can parse
+        bytes directly, which skips decoding it into str first.
+        """
+        if not self.codec.accepts_bytes:
+            return ws.recv()
+
+        opcode, data = ws.recv_data()
+        if opcode == websocket.ABNF.OPCODE_CLOSE:
+            return ""
+        return data
+
+    def unpack_data(self, data: Union[str, bytes]):
         """
         Default serialization format is json.
 
         override this method if you want to use other serialization format.
         """
-        return json.loads(data)
+        return self.codec.loads(data)
 
     def _run_ping(self):
         """"""
+        heartbeat = self.heartbeat
+
         while self._active:
+            if heartbeat.sleep(self.ping_interval):
+                break
+
+            if not self._ws:
+                continue
+
             try:
+                self._check_stale()
+                heartbeat.on_ping()
                 self._ping()
             except:  # noqa
                 et, ev, tb = sys.exc_info()
                 self.on_error(et, ev, tb)
 
                 # self._run() will reconnect websocket
-                sleep(1)
+                continue
+
+            if heartbeat.wait_pong(self.pong_timeout) or heartbeat.stopped:
+                continue
 
-            for i in range(self.ping_interval):
-                if not self._active:
-                    break
-                sleep(1)
+            self._log("pong not received in %ss, missed %s", self.pong_timeout, heartbeat.missed)
+            if heartbeat.missed >= self.max_missed:
+                self._disconnect()
+
+    def _check_stale(self):
+        """
+        Drop a connection that went silent, the worker thread reconnects it.
+        """
+        if self.stale_timeout and self.health.idle() > self.stale_timeout:
+            self._log("no data for %.1fs, reconnect", self.health.idle())
+            self._disconnect()
 
     def _ping(self):
         """"""
-        ws = self._ws
-        if ws:
-            ws.send("ping", websocket.ABNF.OPCODE_PING)
+        self.send_packet({"op": "ping"})
+
+    @staticmethod
+    def is_pong(packet: dict) -> bool:
+        """
+        Check if packet is the reply to ping, only called while one is pending.
+        """
+        return isinstance(packet, dict) and packet.get("ret_msg", None) == "pong"
 
     @staticmethod
     def on_connected():
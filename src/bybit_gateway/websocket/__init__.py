@@ -1 +1,7 @@
 from .WebsocketClient import WebsocketClient
+from .codec import get_codec, CODECS
+from .recorder import FrameRecorder, FrameReplayer, read_frames
+from .supervisor import Backoff, ConnectionHealth
+from .heartbeat import Heartbeat, LatencyHistogram
+from .AsyncWebsocketClient import AsyncWebsocketClient, WebsocketLoop, get_websocket_loop
+from .router import TopicRouter, SymbolMerger, ShardedWebsocketApi, PARTITION_SYMBOL, PARTITION_CLASS
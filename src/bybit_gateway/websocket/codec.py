@@ -0,0 +1,95 @@
+import json
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec:
+    """
+    Default codec based on json of the standard library.
+    """
+
+    name = "json"
+
+    # Whether frames are passed to loads() as received bytes, instead of
+    # decoded to str first. json.loads on bytes detects the encoding and
+    # decodes with surrogatepass, which measured slower than decode +
+    # loads(str) in test_websocket/test1.py, so frames are decoded first.
+    accepts_bytes = False
+
+    @staticmethod
+    def loads(data: Union[str, bytes]) -> Any:
+        """"""
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(packet: dict) -> str:
+        """"""
+        return json.dumps(packet)
+
+
+class OrjsonCodec(JsonCodec):
+    """"""
+
+    name = "orjson"
+    accepts_bytes = True
+
+    @staticmethod
+    def loads(data: Union[str, bytes]) -> Any:
+        """"""
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(packet: dict) -> str:
+        """"""
+        return orjson.dumps(packet).decode()
+
+
+class UjsonCodec(JsonCodec):
+    """"""
+
+    name = "ujson"
+    accepts_bytes = True
+
+    @staticmethod
+    def loads(data: Union[str, bytes]) -> Any:
+        """"""
+        return ujson.loads(data)
+
+    @staticmethod
+    def dumps(packet: dict) -> str:
+        """"""
+        return ujson.dumps(packet)
+
+
+CODECS: Dict[str, type] = {JsonCodec.name: JsonCodec}
+if orjson:
+    CODECS[OrjsonCodec.name] = OrjsonCodec
+if ujson:
+    CODECS[UjsonCodec.name] = UjsonCodec
+
+# Preferred order when codec is "auto"
+AUTO_ORDER = [OrjsonCodec.name, UjsonCodec.name, JsonCodec.name]
+
+
+def get_codec(name: str = "auto"):
+    """
+    Get codec by name, "auto" picks the fastest one importable.
+    """
+    if name == "auto":
+        for codec_name in AUTO_ORDER:
+            if codec_name in CODECS:
+                return CODECS[codec_name]
+
+    codec = CODECS.get(name, None)
+    if not codec:
+        raise ValueError(f"Codec {name} is not available, choose from {list(CODECS)}")
+    return codec
@@ -0,0 +1,144 @@
+import time
+from bisect import bisect_left
+from collections import deque
+from threading import Condition
+from typing import Deque, List
+
+# Upper bounds of histogram buckets in ms, last bucket is everything above
+LATENCY_BUCKETS: List[float] = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+class LatencyHistogram:
+    """
+    Histogram of the latest window samples, in milliseconds.
+    """
+
+    def __init__(self, window: int = 256, buckets: List[float] = None):
+        """"""
+        self.bounds: List[float] = buckets or LATENCY_BUCKETS
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+
+        self._samples: Deque[float] = deque()
+        self.window = window
+
+        self.total: int = 0  # samples ever added
+        self.last: float = 0
+
+    def add(self, value: float):
+        """"""
+        samples = self._samples
+        if len(samples) >= self.window:
+            old = samples.popleft()
+            self.counts[bisect_left(self.bounds, old)] -= 1
+
+        samples.append(value)
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.last = value
+
+    def to_dict(self) -> dict:
+        """"""
+        samples = self._samples
+        if not samples:
+            return {"count": 0}
+
+        values = sorted(samples)
+        n = len(values)
+
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+
+        return {
+            "count": n,
+            "last": self.last,
+            "min": values[0],
+            "avg": sum(values) / n,
+            "p50": values[int(n * 0.5)],
+            "p90": values[min(n - 1, int(n * 0.9))],
+            "p99": values[min(n - 1, int(n * 0.99))],
+            "max": values[-1],
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class Heartbeat:
+    """
+    State of application level ping/pong of one connection.
+
+    The ping thread blocks on a single condition, woken only when the next
+    ping is due, when the pong arrives or when the client is stopped.
+    """
+
+    def __init__(self, window: int = 256):
+        """"""
+        self.latency = LatencyHistogram(window)
+
+        self.sent_at: float = 0
+        self.waiting: bool = False  # ping sent, pong not received yet
+        self.missed: int = 0  # pongs missed in a row
+        self.stopped: bool = False
+
+        self._cond = Condition()
+
+    def start(self):
+        """"""
+        with self._cond:
+            self.stopped = False
+            self.reset()
+
+    def stop(self):
+        """
+        Wake the ping thread so it can exit.
+        """
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def reset(self):
+        """
+        Forget outstanding ping, called for each new connection.
+        """
+        self.waiting = False
+        self.missed = 0
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Wait till next ping is due.
+        :return: True if stopped meanwhile
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.stopped, seconds)
+            return self.stopped
+
+    def on_ping(self):
+        """"""
+        with self._cond:
+            self.sent_at = time.perf_counter()
+            self.waiting = True
+
+    def on_pong(self):
+        """
+        Pong received, record round trip of the outstanding ping.
+        """
+        with self._cond:
+            if not self.waiting:
+                return  # late pong of a ping already counted as missed
+
+            self.latency.add((time.perf_counter() - self.sent_at) * 1000)
+            self.waiting = False
+            self.missed = 0
+            self._cond.notify_all()
+
+    def wait_pong(self, timeout: float) -> bool:
+        """
+        Wait for pong of the ping just sent.
+        :return: False if pong did not arrive in time
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self.waiting or self.stopped, timeout)
+            if not self.waiting:
+                return True
+
+            self.waiting = False
+            if not self.stopped:
+                self.missed += 1
+            return False
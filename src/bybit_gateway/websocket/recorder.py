@@ -0,0 +1,217 @@
+import os
+import struct
+import time
+import zlib
+from queue import Queue
+from threading import Lock, Thread
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+# Chunk header: magic, compressed payload size, frame count
+CHUNK_HEADER = struct.Struct("<4sII")
+CHUNK_MAGIC = b"BYWS"
+
+# Frame header inside a chunk: monotonic receive time in ns, payload size
+FRAME_HEADER = struct.Struct("<qI")
+
+CHUNK_SIZE = 1024 * 1024  # bytes of raw frames per chunk
+
+
+class FrameRecorder:
+    """
+    Append raw websocket frames with their receive time to a capture file.
+
+    Frames are grouped into zlib compressed chunks, each chunk written in one
+    go by a background thread, so the receive loop only appends to a buffer.
+    A capture file may be appended to again, a chunk cut short by a crash is
+    cut off the file before new chunks are appended after it.
+
+    The buffer is guarded by a lock, as close may be called from another
+    thread while the receive loop writes. Frames written after close are
+    dropped.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, level: int = 1):
+        """"""
+        self.path = path
+        self.chunk_size = chunk_size
+        self.level = level
+
+        self._lock = Lock()
+        self._closed: bool = False
+        self._buf: List[bytes] = []
+        self._buf_size: int = 0
+        self._count: int = 0
+
+        self._file: BinaryIO = open(path, "ab")
+        self._file.truncate(complete_size(path))
+        self._queue: Queue = Queue()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        self.frames: int = 0
+        self.chunks: int = 0
+
+    def write(self, data: Union[str, bytes], timestamp: int = None):
+        """
+        Record one frame, timestamp defaults to time.monotonic_ns() now.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        header = FRAME_HEADER.pack(timestamp, len(data))
+
+        with self._lock:
+            if self._closed:
+                return
+
+            self._buf.append(header)
+            self._buf.append(data)
+            self._buf_size += FRAME_HEADER.size + len(data)
+            self._count += 1
+            self.frames += 1
+
+            if self._buf_size >= self.chunk_size:
+                self._flush()
+
+    def flush(self):
+        """
+        Hand buffered frames to the writer thread as one chunk.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """"""
+        if not self._buf:
+            return
+
+        self._queue.put((self._buf, self._count))
+        self._buf = []
+        self._buf_size = 0
+        self._count = 0
+
+    def close(self):
+        """
+        Flush remaining frames and wait till everything is on disk.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self._queue.put(None)
+
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        """"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            frames, count = item
+            payload = zlib.compress(b"".join(frames), self.level)
+            self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(payload), count))
+            self._file.write(payload)
+            self._file.flush()
+            self.chunks += 1
+
+
+def complete_size(path: str) -> int:
+    """
+    Size of the complete chunks at the start of a capture file.
+    """
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return size
+
+            magic, payload_size, _ = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                return size
+
+            f.seek(payload_size, 1)
+            if f.tell() > os.fstat(f.fileno()).st_size:
+                return size
+            size = f.tell()
+
+
+def read_frames(path: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate (timestamp, data) of all frames in a capture file.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+
+            magic, size, count = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                raise ValueError(f"Invalid chunk in capture file {path}")
+
+            payload = f.read(size)
+            if len(payload) < size:
+                return  # last chunk was not completely written
+
+            raw = zlib.decompress(payload)
+            offset = 0
+            for _ in range(count):
+                timestamp, length = FRAME_HEADER.unpack_from(raw, offset)
+                offset += FRAME_HEADER.size
+                yield timestamp, raw[offset:offset + length]
+                offset += length
+
+
+class FrameReplayer:
+    """
+    Feed a capture file back through unpack_data and on_packet of a client.
+
+    speed: 1 for original pace, 10 for ten times faster, 0 for as fast as possible.
+    """
+
+    def __init__(self, path: str):
+        """"""
+        self.path = path
+
+        self.frames: int = 0
+        self.elapsed: float = 0
+
+    def replay(self, client, speed: float = 0, limit: Optional[int] = None):
+        """
+        Replay frames on current thread, return after the last one.
+        """
+        self.frames = 0
+        accepts_bytes = client.codec.accepts_bytes
+        unpack_data = client.unpack_data
+        on_packet = client.on_packet
+
+        start = time.perf_counter()
+        first_timestamp = None
+
+        for timestamp, data in read_frames(self.path):
+            if speed:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+
+                delay = (timestamp - first_timestamp) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            if not accepts_bytes:
+                data = data.decode("utf-8")
+
+            on_packet(unpack_data(data))
+
+            self.frames += 1
+            if limit and self.frames >= limit:
+                break
+
+        self.elapsed = time.perf_counter() - start
+        return self.frames
@@ -0,0 +1,284 @@
+import asyncio
+import sys
+import traceback
+import zlib
+from heapq import heappush, heappop
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from .AsyncWebsocketClient import AsyncWebsocketClient, WebsocketLoop, get_websocket_loop
+
+# Topics of the account, kept on their own authenticated socket
+PRIVATE_TOPICS: Set[str] = {"order", "execution", "position", "stop_order", "wallet"}
+
+PARTITION_SYMBOL = "symbol"  # all topics of a symbol on the same shard
+PARTITION_CLASS = "class"  # all symbols of a topic class on the same shard
+
+PACKET_CALLBACK_TYPE = Callable[[dict], Any]
+
+
+def topic_symbol(topic: str) -> str:
+    """
+    Symbol of a public topic, e.g. orderBookL2_25.BTCUSD -> BTCUSD.
+    """
+    return topic.rpartition(".")[2]
+
+
+def topic_class(topic: str) -> str:
+    """
+    Topic without symbol, e.g. orderBookL2_25.BTCUSD -> orderBookL2_25.
+    """
+    return topic.rpartition(".")[0] or topic
+
+
+class TopicRouter:
+    """
+    Assign public topics to one of n shards.
+
+    Shards are picked with crc32, so the assignment is the same in every run.
+    """
+
+    def __init__(self, shards: int, mode: str = PARTITION_SYMBOL):
+        """"""
+        if mode not in (PARTITION_SYMBOL, PARTITION_CLASS):
+            raise ValueError(f"Unknown partition mode {mode}")
+
+        self.shards = max(1, shards)
+        self.mode = mode
+
+    def is_private(self, topic: str) -> bool:
+        """"""
+        return topic in PRIVATE_TOPICS
+
+    def shard_of(self, topic: str) -> int:
+        """"""
+        if self.mode == PARTITION_SYMBOL:
+            key = topic_symbol(topic)
+        else:
+            key = topic_class(topic)
+        return zlib.crc32(key.encode()) % self.shards
+
+
+class SymbolMerger:
+    """
+    Merge packets of one symbol coming from several sockets into timestamp order.
+
+    Packets are held for window seconds and released sorted by timestamp_e6.
+    A packet older than one already released is passed on at once and counted
+    as late. With window 0 packets pass through untouched, which is enough
+    when every symbol lives on one socket. Must be used inside the event loop.
+    """
+
+    def __init__(self, callback: PACKET_CALLBACK_TYPE, window: float = 0):
+        """"""
+        self.callback = callback
+        self.window = window
+
+        self._heaps: Dict[str, List[Tuple[int, int, float, dict]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._released: Dict[str, int] = {}  # symbol: timestamp of last released packet
+        self._count: int = 0
+
+        self.late: int = 0
+
+    def push(self, symbol: str, packet: dict):
+        """"""
+        if not self.window:
+            self.callback(packet)
+            return
+
+        timestamp = packet.get("timestamp_e6", 0)
+        if timestamp < self._released.get(symbol, 0):
+            self.late += 1
+            self.callback(packet)
+            return
+
+        loop = asyncio.get_running_loop()
+
+        heap = self._heaps.get(symbol, None)
+        if heap is None:
+            heap = self._heaps[symbol] = []
+
+        self._count += 1
+        heappush(heap, (timestamp, self._count, loop.time(), packet))
+
+        if symbol not in self._timers:
+            self._timers[symbol] = loop.call_later(self.window, self._release, symbol)
+
+    def _release(self, symbol: str):
+        """
+        Release packets which waited for the full window.
+        """
+        self._timers.pop(symbol, None)
+
+        heap = self._heaps[symbol]
+        loop = asyncio.get_running_loop()
+        limit = loop.time() - self.window
+
+        while heap and heap[0][2] <= limit:
+            timestamp, _, _, packet = heappop(heap)
+            self._released[symbol] = timestamp
+            self.callback(packet)
+
+        if heap:
+            delay = heap[0][2] - limit
+            self._timers[symbol] = loop.call_later(delay, self._release, symbol)
+
+
+class ShardClient(AsyncWebsocketClient):
+    """
+    One socket of ShardedWebsocketApi, subscribes its topics again after
+    every reconnect and forwards topic packets to the api.
+    """
+
+    def __init__(self, api: "ShardedWebsocketApi", index: int, loop: WebsocketLoop):
+        """"""
+        super().__init__(api.gateway, loop)
+        self.api = api
+        self.index = index
+        self.topics: Set[str] = set()
+
+    def subscribe(self, topic: str):
+        """"""
+        self.topics.add(topic)
+        self.send_packet({"op": "subscribe", "args": [topic]})
+
+    def resubscribe(self, topic: str):
+        """"""
+        self.send_packet({"op": "unsubscribe", "args": [topic]})
+        self.send_packet({"op": "subscribe", "args": [topic]})
+
+    def on_connected(self):
+        """"""
+        if self.topics:
+            self.send_packet({"op": "subscribe", "args": list(self.topics)})
+        self.api.on_shard_connected(self.index)
+
+    def on_disconnected(self):
+        """"""
+        self.api.on_shard_disconnected(self.index)
+
+    def on_packet(self, packet: dict):
+        """"""
+        if "topic" in packet:
+            self.api.on_topic_packet(packet)
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb):
+        """"""
+        self.api.on_error(exception_type, exception_value, tb)
+
+
+class ShardedWebsocketApi:
+    """
+    Public market data spread over several sockets on one WebsocketLoop.
+
+    Topics are assigned to shards by TopicRouter and packets of all shards
+    are merged into one stream per symbol before callbacks are called. All
+    callbacks run on the loop thread.
+    """
+
+    def __init__(self, gateway, loop: WebsocketLoop = None):
+        """"""
+        self.gateway = gateway
+        self.ws_loop = loop or get_websocket_loop()
+
+        self.router = TopicRouter(1)
+        self.merger = SymbolMerger(self._dispatch)
+        self.clients: List[ShardClient] = []
+
+        self.callbacks: Dict[str, PACKET_CALLBACK_TYPE] = {}
+
+    def init(
+        self,
+        host: str,
+        shards: int = 2,
+        mode: str = PARTITION_SYMBOL,
+        merge_window: float = None,
+        **kwargs
+    ):
+        """
+        :param shards: number of sockets
+        :param mode: symbol or class, see TopicRouter
+        :param merge_window: seconds packets are held for ordering, by default
+            0 when partitioned by symbol and 5ms when partitioned by class.
+        :param kwargs: passed to init of every shard client
+        """
+        self.router = TopicRouter(shards, mode)
+
+        if merge_window is None:
+            merge_window = 0 if mode == PARTITION_SYMBOL else 0.005
+        self.merger = SymbolMerger(self._dispatch, merge_window)
+
+        self.clients = []
+        for i in range(self.router.shards):
+            client = ShardClient(self, i, self.ws_loop)
+            client.init(host, **kwargs)
+            self.clients.append(client)
+
+    def start(self):
+        """"""
+        for client in self.clients:
+            client.start()
+
+    def stop(self):
+        """"""
+        for client in self.clients:
+            client.stop()
+
+    def join(self):
+        """"""
+        for client in self.clients:
+            client.join()
+
+    def get_client(self, topic: str) -> ShardClient:
+        """"""
+        return self.clients[self.router.shard_of(topic)]
+
+    def subscribe(self, topic: str, callback: PACKET_CALLBACK_TYPE):
+        """
+        Subscribe a public topic on its shard.
+        """
+        if self.router.is_private(topic):
+            raise ValueError(f"Private topic {topic} cannot be sharded")
+
+        self.callbacks[topic] = callback
+        self.get_client(topic).subscribe(topic)
+
+    def resubscribe(self, topic: str):
+        """
+        Subscribe topic again to get a new snapshot.
+        """
+        self.get_client(topic).resubscribe(topic)
+
+    def on_topic_packet(self, packet: dict):
+        """"""
+        self.merger.push(topic_symbol(packet["topic"]), packet)
+
+    def _dispatch(self, packet: dict):
+        """"""
+        callback = self.callbacks.get(packet["topic"], None)
+        if callback:
+            callback(packet)
+
+    def get_health(self) -> List[dict]:
+        """"""
+        return [client.get_health() for client in self.clients]
+
+    def on_shard_connected(self, index: int):
+        """
+        Callback when a shard is connected.
+        """
+        pass
+
+    def on_shard_disconnected(self, index: int):
+        """
+        Callback when a shard lost connection.
+        """
+        pass
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb):
+        """
+        Callback when exception raised in a shard.
+        """
+        sys.stderr.write("".join(
+            traceback.format_exception(exception_type, exception_value, tb)
+        ))
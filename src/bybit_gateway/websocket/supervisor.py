@@ -0,0 +1,135 @@
+import random
+import time
+from collections import deque
+from typing import Deque
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter between reconnect attempts.
+
+    Delay doubles with every attempt up to cap, the actual wait is drawn
+    between half and all of it, so clients dropped together do not come
+    back together.
+    """
+
+    def __init__(self, base: float = 0.5, cap: float = 30, factor: float = 2):
+        """"""
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+
+        self.attempts: int = 0
+
+    def delay(self) -> float:
+        """
+        Seconds to wait before next attempt, 0 if the last connection was fine.
+        """
+        if not self.attempts:
+            return 0
+
+        delay = min(self.cap, self.base * self.factor ** min(self.attempts - 1, 32))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def fail(self):
+        """"""
+        self.attempts += 1
+
+    def reset(self):
+        """"""
+        self.attempts = 0
+
+
+class ConnectionHealth:
+    """
+    Track connection state and score it between 0 (down) and 1 (healthy).
+
+    The score goes down when no frame arrived for longer than stale_after
+    seconds, and with every drop inside the recent window.
+    """
+
+    def __init__(self, stale_after: float = 60, window: float = 300):
+        """"""
+        self.stale_after = stale_after
+        self.window = window
+
+        self.connected: bool = False
+        self.connected_at: float = 0
+        self.last_recv: float = 0
+
+        self.connects: int = 0
+        self.drops: int = 0
+        self.failures: int = 0  # connect attempts failed in a row
+
+        self._drop_times: Deque[float] = deque()
+
+    def on_connected(self):
+        """"""
+        now = time.monotonic()
+        self.connected = True
+        self.connected_at = now
+        self.last_recv = now
+        self.connects += 1
+        self.failures = 0
+
+    def on_recv(self):
+        """"""
+        self.last_recv = time.monotonic()
+
+    def on_disconnected(self) -> float:
+        """
+        :return: seconds the connection stayed up
+        """
+        if not self.connected:
+            return 0
+
+        now = time.monotonic()
+        self.connected = False
+        self.drops += 1
+        self._drop_times.append(now)
+        return now - self.connected_at
+
+    def on_failed(self):
+        """"""
+        self.failures += 1
+
+    def idle(self) -> float:
+        """
+        Seconds since last frame, 0 when not connected.
+        """
+        if not self.connected:
+            return 0
+        return time.monotonic() - self.last_recv
+
+    def recent_drops(self) -> int:
+        """"""
+        limit = time.monotonic() - self.window
+        drop_times = self._drop_times
+        while drop_times and drop_times[0] < limit:
+            drop_times.popleft()
+        return len(drop_times)
+
+    def score(self) -> float:
+        """"""
+        if not self.connected:
+            return 0
+
+        score = 1 / (1 + self.recent_drops())
+
+        idle = self.idle()
+        if idle > self.stale_after:
+            score *= self.stale_after / idle
+
+        return score
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "connected": self.connected,
+            "score": self.score(),
+            "idle": self.idle(),
+            "connects": self.connects,
+            "drops": self.drops,
+            "recent_drops": self.recent_drops(),
+            "failures": self.failures,
+        }
@@ -60,3 +60,12 @@ class OrderStatus(Enum):
     PENDING_CANCEL = "PendingCancel"
     DEACTIVATED = "Deactivated"
     DEFAULT = "Default"
+
+
+class BarType(Enum):
+    """
+    How ticks are grouped into bars
+    """
+    TIME = "time"  # size in seconds
+    VOLUME = "volume"  # size in contracts
+    TICK = "tick"  # size in ticks with trades
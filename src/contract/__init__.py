@@ -0,0 +1,2 @@
+from .registry import ContractRegistry, parse_contract, CONTRACT_CACHE_FILE, CONTRACT_CACHE_TTL
+from .validator import OrderValidator, DEFAULT_PRICE_BAND
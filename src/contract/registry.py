@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+from src.datatypes import ContractData, PriceScale, set_price_scale
+
+CONTRACT_CACHE_FILE = "bybit_contracts.json"
+CONTRACT_CACHE_TTL = 24 * 60 * 60  # seconds
+
+
+def parse_contract(d: dict) -> ContractData:
+    """
+    ContractData from one item of /v2/public/symbols result.
+    """
+    scale = PriceScale(d["price_scale"])
+    price_filter = d.get("price_filter", {})
+    lot_size_filter = d.get("lot_size_filter", {})
+
+    contract = ContractData(
+        symbol=d["name"],
+        price_scale=scale.scale,
+        tick_size=scale.from_str(str(price_filter.get("tick_size", "0"))),
+        min_price=scale.from_str(str(price_filter.get("min_price", "0"))),
+        max_price=scale.from_str(str(price_filter.get("max_price", "0"))),
+        qty_step=lot_size_filter.get("qty_step", 1),
+        min_qty=lot_size_filter.get("min_trading_qty", 0),
+        max_qty=lot_size_filter.get("max_trading_qty", 0),
+    )
+    contract.alias = d.get("alias", "")
+    contract.status = d.get("status", "")
+    contract.base_currency = d.get("base_currency", "")
+    contract.quote_currency = d.get("quote_currency", "")
+    contract.maker_fee = float(d.get("maker_fee", 0))
+    contract.taker_fee = float(d.get("taker_fee", 0))
+    contract.max_leverage = float(d.get("leverage_filter", {}).get("max_leverage", 0))
+    return contract
+
+
+class ContractRegistry:
+    """
+    Contracts indexed by symbol.
+
+    Filled from /v2/public/symbols and written to a cache file, which is
+    loaded on next start while it is younger than ttl seconds, so the REST
+    query can be skipped. Price scales of all symbols are registered with
+    set_price_scale when contracts are loaded.
+    """
+
+    def __init__(self, cache_path: str = CONTRACT_CACHE_FILE, ttl: float = CONTRACT_CACHE_TTL):
+        """
+        :param cache_path: cache file, empty to keep contracts in memory only
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+        self.contracts: Dict[str, ContractData] = {}
+        self.updated: float = 0  # epoch seconds when data was queried
+
+        self._lock = Lock()
+
+    def get(self, symbol) -> Optional[ContractData]:
+        """
+        Contract of symbol (str or Symbol), None if unknown.
+        """
+        return self.contracts.get(getattr(symbol, "value", symbol), None)
+
+    def __contains__(self, symbol) -> bool:
+        return getattr(symbol, "value", symbol) in self.contracts
+
+    def __iter__(self) -> Iterator[ContractData]:
+        return iter(list(self.contracts.values()))
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    def is_expired(self) -> bool:
+        """"""
+        return time.time() - self.updated >= self.ttl
+
+    def on_symbols(self, result: List[dict], updated: float = None, save: bool = True):
+        """
+        Load result of /v2/public/symbols.
+        """
+        contracts = {}
+        for d in result:
+            contract = parse_contract(d)
+            contracts[contract.symbol] = contract
+            set_price_scale(contract.symbol, contract.price_scale)
+
+        with self._lock:
+            self.contracts = contracts
+            self.updated = updated or time.time()
+
+        if save and self.cache_path:
+            self.save_cache(result)
+
+    def load_cache(self) -> bool:
+        """
+        Load contracts from cache file.
+        :return: False if there is no cache or it has expired
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            updated = data["updated"]
+            result = data["result"]
+        except (OSError, ValueError, KeyError):
+            return False
+
+        if time.time() - updated >= self.ttl:
+            return False
+
+        self.on_symbols(result, updated, save=False)
+        return True
+
+    def save_cache(self, result: List[dict]):
+        """
+        Write raw symbols data to cache file, replacing it in one step.
+        """
+        data = {"updated": self.updated, "result": result}
+
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.cache_path)
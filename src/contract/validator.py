@@ -0,0 +1,148 @@
+import math
+from collections import Counter
+from typing import Callable, Optional
+
+from src.constant import OrderType, TimeInForce
+from src.datatypes import OrderRequest, TickData
+from .registry import ContractRegistry
+
+BUY = "Buy"
+
+# Limit price may go this much beyond the opposite best price
+DEFAULT_PRICE_BAND = 0.05
+
+
+class OrderValidator:
+    """
+    Check orders against contract rules and the latest book before they
+    are sent, so orders the exchange would reject never leave the process.
+
+    * price is rounded to tick size, buys down and sells up, so rounding
+      never makes the price worse
+    * size is rounded down to qty step and checked against min/max qty
+    * limit price must be inside the contract price range, and not beyond
+      the opposite best price by more than price_band
+    * post only orders which would cross the book are rejected, or moved
+      one tick behind the opposite best price with fix_post_only
+
+    Rounding changes the request in place. With fix set to False,
+    misaligned price or size is rejected instead.
+    """
+
+    def __init__(
+        self,
+        contracts: ContractRegistry,
+        get_tick: Callable[[str], Optional[TickData]] = None,
+        price_band: float = DEFAULT_PRICE_BAND,
+        fix: bool = True,
+        fix_post_only: bool = False,
+    ):
+        """
+        :param get_tick: latest tick of symbol, for checks against the book
+        """
+        self.contracts = contracts
+        self.get_tick = get_tick
+        self.price_band = price_band
+        self.fix = fix
+        self.fix_post_only = fix_post_only
+
+        self.checked: int = 0
+        self.rejected: Counter = Counter()  # reason: count
+
+    def validate(self, req: OrderRequest) -> str:
+        """
+        :return: reason of rejection, empty if order can be sent
+        """
+        self.checked += 1
+        reason = self._validate(req)
+        if reason:
+            self.rejected[reason] += 1
+        return reason
+
+    def _validate(self, req: OrderRequest) -> str:
+        """"""
+        contract = self.contracts.get(req.symbol)
+        if not contract:
+            return "合约信息不存在"
+
+        # Size
+        size = self._round_size(req.size, contract.qty_step)
+        if size != req.size:
+            if not self.fix:
+                return "数量不是下单步长的整数倍"
+            req.size = size
+
+        if size < contract.min_qty:
+            return "数量低于最小下单量"
+        if contract.max_qty and size > contract.max_qty:
+            return "数量超过最大下单量"
+
+        if req.type == OrderType.MARKET:
+            return ""
+
+        # Price
+        buy = getattr(req.side, "value", req.side) == BUY
+        price = self._round_price(req.price, contract.tick_size, buy)
+        if price != req.price:
+            if not self.fix:
+                return "价格不是最小变动价位的整数倍"
+            req.price = price
+
+        if price < contract.min_price or (contract.max_price and price > contract.max_price):
+            return "价格超出合约允许范围"
+
+        tick = self.get_tick(req.symbol) if self.get_tick else None
+        if not tick:
+            return ""
+
+        best_bid = tick.bid_prices[0]
+        best_ask = tick.ask_prices[0]
+
+        if buy:
+            if best_ask and price > best_ask * (1 + self.price_band):
+                return "买价偏离卖一价过大"
+        elif best_bid and price < best_bid * (1 - self.price_band):
+            return "卖价偏离买一价过大"
+
+        if req.time_in_force == TimeInForce.POST_ONLY:
+            if buy and best_ask and price >= best_ask:
+                if not self.fix_post_only:
+                    return "PostOnly买单会立即成交"
+                req.price = best_ask - contract.tick_size
+            elif not buy and best_bid and price <= best_bid:
+                if not self.fix_post_only:
+                    return "PostOnly卖单会立即成交"
+                req.price = best_bid + contract.tick_size
+
+        return ""
+
+    @staticmethod
+    def _round_price(price: int, tick_size: int, buy: bool) -> int:
+        """"""
+        if tick_size <= 1:
+            return price
+
+        remainder = price % tick_size
+        if not remainder:
+            return price
+        if buy:
+            return price - remainder
+        return price - remainder + tick_size
+
+    @staticmethod
+    def _round_size(size, qty_step):
+        """"""
+        if isinstance(size, int) and isinstance(qty_step, int):
+            if qty_step <= 1:
+                return size
+            return size - size % qty_step
+
+        steps = math.floor(size / qty_step + 1e-9)
+        return round(steps * qty_step, 10)
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "checked": self.checked,
+            "rejected": dict(self.rejected),
+        }
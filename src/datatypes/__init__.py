@@ -1 +1,2 @@
+from .fixed import *
 from .object import *
\ No newline at end of file
@@ -0,0 +1,99 @@
+from typing import Dict, Union
+
+DEFAULT_PRICE_SCALE = 4  # decimals kept when price scale of the contract is unknown
+
+
+class PriceScale:
+    """
+    Fixed-point prices of one symbol: a price is an int of 10^-scale units,
+    e.g. with scale 2, 9000.5 is 900050.
+
+    Prices are converted from the API representation once when received and
+    back to a decimal string when sent, in between they are plain ints.
+    """
+
+    __slots__ = ("scale", "unit")
+
+    def __init__(self, scale: int = DEFAULT_PRICE_SCALE):
+        """"""
+        self.scale = scale
+        self.unit = 10 ** scale
+
+    def from_str(self, price: str) -> int:
+        """
+        Decimal string to ticks without going through float.
+        """
+        integer, _, fraction = price.partition(".")
+        fraction = (fraction + "0" * self.scale)[:self.scale]
+        return int(integer + fraction)
+
+    def from_e(self, value: int, e: int) -> int:
+        """
+        Integer with e decimals, like last_price_e4, to ticks.
+        """
+        if e == self.scale:
+            return value
+        if e < self.scale:
+            return value * 10 ** (self.scale - e)
+        return value // 10 ** (e - self.scale)
+
+    def from_float(self, price: float) -> int:
+        """"""
+        return round(price * self.unit)
+
+    def to_float(self, ticks: int) -> float:
+        """"""
+        return ticks / self.unit
+
+    def to_str(self, ticks: int) -> str:
+        """
+        Ticks to exact decimal string for the API.
+        """
+        if not self.scale:
+            return str(ticks)
+
+        sign = "-" if ticks < 0 else ""
+        integer, fraction = divmod(abs(ticks), self.unit)
+        fraction = str(fraction).rjust(self.scale, "0").rstrip("0")
+        if not fraction:
+            return f"{sign}{integer}"
+        return f"{sign}{integer}.{fraction}"
+
+    def __eq__(self, other):
+        return isinstance(other, PriceScale) and other.scale == self.scale
+
+    def __hash__(self):
+        return hash(self.scale)
+
+    def __repr__(self):
+        return f"PriceScale({self.scale})"
+
+
+_DEFAULT_SCALE = PriceScale()
+_price_scales: Dict[str, PriceScale] = {}
+
+
+def _symbol_name(symbol) -> str:
+    """"""
+    return getattr(symbol, "value", symbol)
+
+
+def get_price_scale(symbol: Union[str, object]) -> PriceScale:
+    """
+    Price scale of symbol (str or Symbol), DEFAULT_PRICE_SCALE if not set.
+    """
+    return _price_scales.get(_symbol_name(symbol), _DEFAULT_SCALE)
+
+
+def set_price_scale(symbol: Union[str, object], scale: int) -> PriceScale:
+    """
+    Set price scale of symbol, normally from price_scale of contract data.
+    Ticks and books created before keep their old scale, see
+    BybitWebsocketApi.check_price_scale.
+    """
+    name = _symbol_name(symbol)
+    price_scale = _price_scales.get(name, None)
+    if not price_scale or price_scale.scale != scale:
+        price_scale = PriceScale(scale)
+        _price_scales[name] = price_scale
+    return price_scale
@@ -1,4 +1,5 @@
 import time
+from operator import attrgetter, itemgetter
 
 from src.constant import (
     OrderType,
@@ -6,57 +7,167 @@ from src.constant import (
     TimeInForce,
     OrderStatus,
 )
+from .fixed import PriceScale, get_price_scale
 
 ACTIVE_STATUSES = set([OrderStatus.NEW, OrderStatus.CREATED, OrderStatus.PARTIALLY_FILLED])
 
 
-class TickData:
+TICK_DEPTH = 5
+
+_EMPTY_LEVEL = (0, 0)
+
+
+class _TickLevels:
+    """
+    Indexed accessors of the bid/ask levels shared by TickData and TickSnapshot.
+
+    Levels are stored in tuples with the best price first. The legacy
+    attributes (bid_price_1, ask_volume_5, ...) are read-only properties.
+
+    Prices are int ticks in price_scale, use to_price to get a float.
+    """
+
+    __slots__ = ()
+
+    def to_price(self, ticks: int) -> float:
+        """"""
+        return ticks / self.price_scale.unit
+
+    def bid_price(self, n: int) -> int:
+        """"""
+        return self.bid_prices[n - 1]
+
+    def bid_volume(self, n: int) -> float:
+        """"""
+        return self.bid_volumes[n - 1]
+
+    def ask_price(self, n: int) -> int:
+        """"""
+        return self.ask_prices[n - 1]
+
+    def ask_volume(self, n: int) -> float:
+        """"""
+        return self.ask_volumes[n - 1]
+
+
+for _i in range(TICK_DEPTH):
+    for _name in ("bid_price", "bid_volume", "ask_price", "ask_volume"):
+        setattr(
+            _TickLevels,
+            f"{_name}_{_i + 1}",
+            property(lambda self, _attr=f"{_name}s", _n=_i: getattr(self, _attr)[_n])
+        )
+
+
+class TickData(_TickLevels):
     """
     Tick data contains information about:
         * last trade in market
         * orderbook snapshot
         * intraday market statistics.
+
+    TickData is the mutable buffer kept by the gateway for each symbol, use
+    snapshot() to get an immutable copy to hand out to strategies.
     """
 
-    symbol: str
-    interval: int
+    __slots__ = (
+        "symbol", "interval", "datetime", "name", "price_scale",
+        "volume", "total_volume", "open_interest", "last_price", "last_volume", "limit_up", "limit_down",
+        "open_price", "high_price", "low_price", "pre_close",
+        "bid_prices", "bid_volumes", "ask_prices", "ask_volumes",
+    )
 
-    name: str = ""
-    volume: float = 0
-    open_interest: float = 0
-    last_price: float = 0
-    last_volume: float = 0
-    limit_up: float = 0
-    limit_down: float = 0
+    def __init__(self, symbol: str = "", interval: int = 0):
+        """"""
+        self.symbol = symbol
+        self.interval = interval
+        self.datetime = None
+        self.name = ""
+        self.price_scale: PriceScale = get_price_scale(symbol)
 
-    open_price: float = 0
-    high_price: float = 0
-    low_price: float = 0
-    pre_close: float = 0
+        self.volume = 0  # rolling 24h volume
+        self.total_volume = 0  # cumulative volume, only ever grows
+        self.open_interest = 0
+        self.last_price = 0
+        self.last_volume = 0
+        self.limit_up = 0
+        self.limit_down = 0
 
-    bid_price_1: float = 0
-    bid_price_2: float = 0
-    bid_price_3: float = 0
-    bid_price_4: float = 0
-    bid_price_5: float = 0
+        self.open_price = 0
+        self.high_price = 0
+        self.low_price = 0
+        self.pre_close = 0
 
-    ask_price_1: float = 0
-    ask_price_2: float = 0
-    ask_price_3: float = 0
-    ask_price_4: float = 0
-    ask_price_5: float = 0
+        empty = (0,) * TICK_DEPTH
+        self.bid_prices = empty
+        self.bid_volumes = empty
+        self.ask_prices = empty
+        self.ask_volumes = empty
 
-    bid_volume_1: float = 0
-    bid_volume_2: float = 0
-    bid_volume_3: float = 0
-    bid_volume_4: float = 0
-    bid_volume_5: float = 0
+    def set_bids(self, levels: list):
+        """
+        Replace bid levels with a list of (ticks, volume), best first.
+        """
+        if len(levels) < TICK_DEPTH:
+            levels = levels + [_EMPTY_LEVEL] * (TICK_DEPTH - len(levels))
+        self.bid_prices = tuple([level[0] for level in levels[:TICK_DEPTH]])
+        self.bid_volumes = tuple([level[1] for level in levels[:TICK_DEPTH]])
+
+    def set_asks(self, levels: list):
+        """
+        Replace ask levels with a list of (ticks, volume), best first.
+        """
+        if len(levels) < TICK_DEPTH:
+            levels = levels + [_EMPTY_LEVEL] * (TICK_DEPTH - len(levels))
+        self.ask_prices = tuple([level[0] for level in levels[:TICK_DEPTH]])
+        self.ask_volumes = tuple([level[1] for level in levels[:TICK_DEPTH]])
+
+    def snapshot(self) -> "TickSnapshot":
+        """
+        Immutable copy of current state.
 
-    ask_volume_1: float = 0
-    ask_volume_2: float = 0
-    ask_volume_3: float = 0
-    ask_volume_4: float = 0
-    ask_volume_5: float = 0
+        Level tuples are shared with the buffer instead of copied, they are
+        never mutated in place, only replaced by set_bids/set_asks.
+        """
+        return tuple.__new__(TickSnapshot, _get_tick_fields(self))
+
+
+class TickSnapshot(_TickLevels, tuple):
+    """
+    Immutable view of TickData at a point in time, with the same attributes.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"TickSnapshot({self.symbol}, {self.datetime}, {self.last_price})"
+
+
+_get_tick_fields = attrgetter(*TickData.__slots__)
+
+for _i, _name in enumerate(TickData.__slots__):
+    setattr(TickSnapshot, _name, property(itemgetter(_i)))
+
+
+class DepthDelta:
+    """
+    Levels of the top TICK_DEPTH of a book changed by one update.
+
+    bids and asks are tuples of (level, ticks, volume) with level 1 as the
+    best, a level emptied by the update has ticks and volume 0.
+    """
+
+    __slots__ = ("symbol", "datetime", "bids", "asks")
+
+    def __init__(self, symbol: str, datetime, bids: tuple, asks: tuple):
+        """"""
+        self.symbol = symbol
+        self.datetime = datetime
+        self.bids = bids
+        self.asks = asks
+
+    def __repr__(self):
+        return f"DepthDelta({self.symbol}, {self.datetime}, bids={self.bids}, asks={self.asks})"
 
 
 class PositionData:
@@ -77,6 +188,8 @@ class OrderData:
     """
     Order data contains information for tracking lastest status
     of a specific order.
+
+    price is in ticks of the PriceScale of symbol.
     """
 
     status: OrderStatus = OrderStatus.DEFAULT
@@ -88,7 +201,7 @@ class OrderData:
                  symbol: Symbol,
                  order_link_id: str,
                  order_type: OrderType,
-                 price: float,
+                 price: int,
                  size: int,
                  side: str,
                  time_in_force: TimeInForce,
@@ -122,13 +235,16 @@ class OrderData:
 class OrderRequest:
     """
     Request sending to specific bybit_gateway for creating a new order.
+
+    price is in ticks of the PriceScale of symbol, converted to a decimal
+    string only when the request is sent.
     """
 
     def __init__(self,
                  symbol: Symbol,
                  order_link_id: str,
                  order_type: OrderType,
-                 price: float,
+                 price: int,
                  size: int,
                  side: str,
                  time_in_force: TimeInForce,
@@ -171,3 +287,46 @@ class CancelRequest:
         self.order_id = order_id
         self.order_link_id = order_link_id
         self.symbol = symbol
+
+
+class ContractData:
+    """
+    Trading rules of one symbol from /v2/public/symbols.
+
+    Prices (tick_size, min_price, max_price) are ticks of price_scale,
+    quantities are in contracts.
+    """
+
+    def __init__(self,
+                 symbol: str,
+                 price_scale: int,
+                 tick_size: int,
+                 min_price: int,
+                 max_price: int,
+                 qty_step: float,
+                 min_qty: float,
+                 max_qty: float,
+                 ):
+        self.symbol = symbol
+        self.scale = PriceScale(price_scale)
+        self.price_scale = price_scale
+        self.tick_size = tick_size
+        self.min_price = min_price
+        self.max_price = max_price
+        self.qty_step = qty_step
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+
+        self.alias = ""
+        self.status = ""
+        self.base_currency = ""
+        self.quote_currency = ""
+        self.maker_fee = 0.0
+        self.taker_fee = 0.0
+        self.max_leverage = 0.0
+
+    def __repr__(self):
+        return (
+            f"ContractData({self.symbol}, price_scale={self.price_scale}, "
+            f"tick_size={self.tick_size}, qty_step={self.qty_step})"
+        )
@@ -0,0 +1,12 @@
+from .engine import (
+    Event,
+    EventEngine,
+    LatestOnlyHandler,
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_DEPTH,
+    EVENT_BAR,
+    DROPPABLE_EVENTS,
+)
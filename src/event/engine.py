@@ -0,0 +1,324 @@
+import sys
+import traceback
+from collections import defaultdict, deque
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+EVENT_TICK = "eTick."
+EVENT_ORDER = "eOrder."
+EVENT_TRADE = "eTrade."
+EVENT_POSITION = "ePosition."
+EVENT_DEPTH = "eDepth."
+EVENT_BAR = "eBar."
+
+# Events handled by a worker before it yields the symbol to others
+BATCH_SIZE = 32
+
+# Result of putting an event into a queue
+_QUEUED = 0
+_CONFLATED = 1  # replaced the pending tick at the tail
+_DROPPED = 2  # buffer full, oldest market data event dropped
+
+# Queued in place of events of a LatestOnlyHandler, data is the handler
+_EVENT_LATEST = "eLatest."
+
+# Only market data can be dropped from a full buffer, the next one
+# supersedes it. Order, trade and position events are never dropped.
+DROPPABLE_EVENTS = {EVENT_TICK, EVENT_DEPTH, EVENT_BAR}
+
+
+class Event:
+    """
+    Event object consists of a type string, the symbol it belongs to, and
+    the data object.
+    """
+
+    __slots__ = ("type", "symbol", "data")
+
+    def __init__(self, type: str, symbol: str = "", data: Any = None):
+        """"""
+        self.type = type
+        self.symbol = symbol
+        self.data = data
+
+
+HandlerType = Callable[[Event], None]
+
+
+class _SymbolQueue:
+    """
+    Pending events of one symbol, size limits the events kept when market
+    data can be dropped to make room.
+    """
+
+    __slots__ = ("events", "size", "scheduled")
+
+    def __init__(self, size: int):
+        """"""
+        self.events: Deque[Event] = deque()
+        self.size: int = size
+        self.scheduled: bool = False
+
+
+class LatestOnlyHandler:
+    """
+    Handler wrapper keeping only the newest event for a slow consumer.
+
+    Events are parked in a one slot mailbox and a marker is queued behind
+    them on the queue of their symbol, the wrapped handler runs when the
+    marker is reached. An event arriving before that supersedes the parked
+    one instead of queueing behind it. Running on the symbol queue keeps
+    the handler in order with other events of the symbol, and never in
+    parallel with them.
+    """
+
+    def __init__(self, engine: "EventEngine", handler: HandlerType):
+        """"""
+        self.engine = engine
+        self.handler = handler
+
+        self._lock = Lock()
+        self._pending: Optional[Event] = None
+        self._scheduled: bool = False
+
+        self.received: int = 0
+        self.conflated: int = 0
+
+    def __call__(self, event: Event):
+        """"""
+        with self._lock:
+            self.received += 1
+            if self._pending:
+                self.conflated += 1
+            self._pending = event
+
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        self.engine._schedule_latest(self, event.symbol)
+
+    def _deliver(self):
+        """
+        Run handler with the parked event, called on the symbol queue.
+        """
+        with self._lock:
+            event = self._pending
+            self._pending = None
+            self._scheduled = False
+
+        if event:
+            self.engine._call(self.handler, event)
+
+    @property
+    def delivered(self) -> int:
+        """"""
+        return self.received - self.conflated - (1 if self._pending else 0)
+
+    def to_dict(self) -> dict:
+        """"""
+        return {
+            "received": self.received,
+            "delivered": self.delivered,
+            "conflated": self.conflated,
+        }
+
+
+class EventEngine:
+    """
+    Event engine distributes events to registered handlers on a pool of
+    worker threads, so producers (websocket and REST callbacks) never run
+    strategy code themselves.
+
+    Events of the same symbol are handled in order by one worker at a time,
+    different symbols are handled in parallel. Handlers can be registered
+    for a type (EVENT_TICK) or for a type of one symbol (EVENT_TICK + symbol).
+
+    Each symbol keeps a buffer of pending events. When it is full, the
+    oldest tick, depth or bar event is dropped to make room. Order, trade
+    and position events, and markers of latest_only handlers, are never
+    dropped, the buffer grows past its size when only they are pending.
+
+    With conflate_ticks, a new tick replaces the pending tick at the tail
+    instead of queueing after it, for all handlers of the symbol. To
+    conflate for one slow handler only, wrap it with latest_only.
+    """
+
+    def __init__(self, workers: int = 4, buffer_size: int = 1024, conflate_ticks: bool = False):
+        """"""
+        self._worker_count = workers
+        self._workers: List[Thread] = []
+        self._buffer_size = buffer_size
+        self._conflate_ticks = conflate_ticks
+        self._active = False
+
+        self._lock = Lock()
+        self._queues: Dict[str, _SymbolQueue] = {}
+        self._ready: Queue = Queue()
+
+        self._handlers: Dict[str, List[HandlerType]] = defaultdict(list)
+
+        self.dropped: int = 0
+        self.conflated: int = 0
+
+    def start(self):
+        """"""
+        if self._active:
+            return
+        self._active = True
+
+        # Threads can only be started once, new ones are made for a restart
+        self._workers = [
+            Thread(target=self._run, name=f"EventEngine-{i}", daemon=True)
+            for i in range(self._worker_count)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        """"""
+        if not self._active:
+            return
+        self._active = False
+
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def put(self, event: Event):
+        """
+        Put an event into the queue of its symbol.
+        """
+        result = self._enqueue(self._get_queue(event.symbol), event, self._conflate_ticks)
+        if result == _CONFLATED:
+            self.conflated += 1
+        elif result == _DROPPED:
+            self.dropped += 1
+
+    def _get_queue(self, symbol: str) -> _SymbolQueue:
+        """"""
+        queue = self._queues.get(symbol, None)
+        if not queue:
+            with self._lock:
+                queue = self._queues.setdefault(symbol, _SymbolQueue(self._buffer_size))
+        return queue
+
+    def _schedule_latest(self, handler: LatestOnlyHandler, symbol: str):
+        """
+        Queue the marker which runs handler on the queue of symbol.
+        """
+        self._enqueue(self._get_queue(symbol), Event(_EVENT_LATEST, symbol, handler), False)
+
+    @staticmethod
+    def _drop_oldest(events: Deque[Event]) -> bool:
+        """
+        Remove the oldest market data event, False if there is none.
+        """
+        for i, event in enumerate(events):
+            if event.type in DROPPABLE_EVENTS:
+                del events[i]
+                return True
+        return False
+
+    def _enqueue(self, queue: _SymbolQueue, event: Event, conflate: bool) -> int:
+        """
+        Append event to queue and make it ready to run.
+        """
+        result = _QUEUED
+
+        with self._lock:
+            events = queue.events
+            if (
+                conflate
+                and event.type == EVENT_TICK
+                and events
+                and events[-1].type == EVENT_TICK
+            ):
+                events[-1] = event
+                result = _CONFLATED
+            elif len(events) < queue.size:
+                events.append(event)
+            elif self._drop_oldest(events):
+                result = _DROPPED
+                events.append(event)
+            elif event.type in DROPPABLE_EVENTS:
+                # Buffer full of events which are kept, drop the new one
+                return _DROPPED
+            else:
+                events.append(event)
+
+            if queue.scheduled:
+                return result
+            queue.scheduled = True
+
+        self._ready.put(queue)
+        return result
+
+    def _run(self):
+        """
+        Get a symbol queue ready to run and handle its events.
+        """
+        while self._active:
+            try:
+                queue = self._ready.get(block=True, timeout=1)
+            except Empty:
+                continue
+
+            for _ in range(BATCH_SIZE):
+                with self._lock:
+                    if not queue.events:
+                        queue.scheduled = False
+                        break
+                    event = queue.events.popleft()
+
+                if event.type == _EVENT_LATEST:
+                    event.data._deliver()
+                else:
+                    self._process(event)
+            else:
+                # Batch used up, let other symbols run before continuing
+                self._ready.put(queue)
+
+    def _process(self, event: Event):
+        """"""
+        for handler in self._handlers.get(event.type, ()):
+            self._call(handler, event)
+
+        for handler in self._handlers.get(event.type + event.symbol, ()):
+            self._call(handler, event)
+
+    def _call(self, handler: HandlerType, event: Event):
+        """
+        Exception raised by one handler should not stop the engine.
+        """
+        try:
+            handler(event)
+        except Exception:
+            sys.stderr.write(
+                "Unhandled EventEngine Error in {}:\n{}".format(handler, traceback.format_exc())
+            )
+
+    def latest_only(self, handler: HandlerType) -> LatestOnlyHandler:
+        """
+        Wrap handler so that it only receives the newest event, register the
+        returned object instead of handler.
+        """
+        return LatestOnlyHandler(self, handler)
+
+    def register(self, type: str, handler: HandlerType):
+        """
+        Register a handler for a type, or a type of one symbol.
+        """
+        handler_list = self._handlers[type]
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+    def unregister(self, type: str, handler: HandlerType):
+        """"""
+        handler_list = self._handlers[type]
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+        if not handler_list:
+            self._handlers.pop(type)
@@ -0,0 +1,8 @@
+from .journal import (
+    JournalWriter,
+    JournalReader,
+    RECORD_TICK,
+    RECORD_ORDER_REQUEST,
+    RECORD_ORDER,
+    RECORD_CANCEL_REQUEST,
+)
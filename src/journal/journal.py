@@ -0,0 +1,367 @@
+import glob
+import mmap
+import os
+import struct
+import sys
+import time
+import traceback
+from datetime import datetime, timedelta
+from functools import wraps
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.constant import OrderStatus, OrderType, Side, TimeInForce
+from src.datatypes import TickData, OrderData, OrderRequest, CancelRequest, TICK_DEPTH
+
+RECORD_TICK = 1
+RECORD_ORDER_REQUEST = 2
+RECORD_ORDER = 3
+RECORD_CANCEL_REQUEST = 4
+
+# Every record starts with type and time written in ns since epoch.
+# Type 0 marks the end of data in a preallocated segment.
+HEADER = struct.Struct("<Bq")
+
+# Body of each record type, strings are fixed width and padded with zeros,
+# prices are int ticks of the PriceScale of the symbol
+RECORD_STRUCTS: Dict[int, struct.Struct] = {
+    RECORD_TICK: struct.Struct("<12sqd" + ("q" * TICK_DEPTH + "d" * TICK_DEPTH) * 2),
+    RECORD_ORDER_REQUEST: struct.Struct("<12s36sBBBqq"),
+    RECORD_ORDER: struct.Struct("<12s36sBBBqqqqd"),
+    RECORD_CANCEL_REQUEST: struct.Struct("<12s36s36s"),
+}
+
+RECORD_FIELDS: Dict[int, Tuple[str, ...]] = {
+    RECORD_TICK: (
+        ("symbol", "last_price", "volume")
+        + tuple(f"bid_price_{n + 1}" for n in range(TICK_DEPTH))
+        + tuple(f"bid_volume_{n + 1}" for n in range(TICK_DEPTH))
+        + tuple(f"ask_price_{n + 1}" for n in range(TICK_DEPTH))
+        + tuple(f"ask_volume_{n + 1}" for n in range(TICK_DEPTH))
+    ),
+    RECORD_ORDER_REQUEST: (
+        "symbol", "order_link_id", "type", "side", "time_in_force", "price", "size"
+    ),
+    RECORD_ORDER: (
+        "symbol", "order_link_id", "type", "side", "status", "price", "size",
+        "cum_exec_qty", "leaves_qty", "update_time"
+    ),
+    RECORD_CANCEL_REQUEST: ("symbol", "order_id", "order_link_id"),
+}
+
+# Enums are stored as their index, values not in the list as UNKNOWN_CODE
+ORDER_TYPES: List[OrderType] = list(OrderType)
+TIME_IN_FORCES: List[TimeInForce] = list(TimeInForce)
+ORDER_STATUSES: List[OrderStatus] = list(OrderStatus)
+SIDES: List[str] = ["", "Buy", "Sell"]
+UNKNOWN_CODE = 255
+
+
+def _make_codes(values: list, enum_type=None) -> Dict[Any, int]:
+    """
+    Code of each value, looked up by enum member or by its value string.
+    """
+    codes = {}
+    for i, value in enumerate(values):
+        codes[value] = i
+        codes[getattr(value, "value", value)] = i
+    if enum_type:
+        for member in enum_type:
+            if member.value in codes:
+                codes[member] = codes[member.value]
+    return codes
+
+
+ORDER_TYPE_CODES = _make_codes(ORDER_TYPES)
+TIME_IN_FORCE_CODES = _make_codes(TIME_IN_FORCES)
+ORDER_STATUS_CODES = _make_codes(ORDER_STATUSES)
+SIDE_CODES = _make_codes(SIDES, Side)
+
+SEGMENT_SIZE = 64 * 1024 * 1024
+SEGMENT_SUFFIX = ".jnl"
+
+
+def _encode(value) -> bytes:
+    """"""
+    if value is None:
+        return b""
+    if not isinstance(value, str):
+        value = getattr(value, "value", str(value))
+    return value.encode()
+
+
+def _decode(value: bytes) -> str:
+    """"""
+    return value.rstrip(b"\x00").decode()
+
+
+def _code(codes: Dict[Any, int], value) -> int:
+    """"""
+    try:
+        return codes.get(value, UNKNOWN_CODE)
+    except TypeError:  # unhashable
+        return UNKNOWN_CODE
+
+
+def _lookup(values: list, code: int):
+    """
+    Value of code, None for UNKNOWN_CODE.
+    """
+    if code < len(values):
+        return values[code]
+    return None
+
+
+def _never_raise(func):
+    """
+    Journal is written from the trading path, its errors are counted and
+    reported instead of raised into the caller.
+    """
+    @wraps(func)
+    def wrapper(self, *args):
+        try:
+            func(self, *args)
+        except Exception:
+            self.errors += 1
+            # Report first error of each record type only, the cause repeats
+            if func.__name__ not in self._reported:
+                self._reported.add(func.__name__)
+                sys.stderr.write(
+                    "JournalWriter error in {}:\n{}".format(func.__name__, traceback.format_exc())
+                )
+    return wrapper
+
+
+class JournalWriter:
+    """
+    Append-only binary journal of trading events.
+
+    Records are written into memory-mapped segment files preallocated to
+    segment_size, a new segment is started when one is full. A background
+    thread syncs written data to disk every sync_interval seconds.
+
+    Segments are named {date}.{number}.jnl in folder, one journal per day
+    can be scanned quickly with JournalReader.
+    """
+
+    def __init__(self, folder: str, segment_size: int = SEGMENT_SIZE, sync_interval: float = 1):
+        """"""
+        self.folder = folder
+        self.segment_size = segment_size
+        self.sync_interval = sync_interval
+
+        self._lock = Lock()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._offset: int = 0
+        self._synced: int = 0
+        self._date: str = ""
+        self._date_end: int = 0  # ns time of next midnight, a new segment is started then
+
+        self.errors: int = 0  # records which could not be written
+        self._reported: set = set()
+
+        os.makedirs(folder, exist_ok=True)
+
+        self._active = True
+        self._stop_event = Event()
+        self._sync_thread = Thread(target=self._run_sync, daemon=True)
+        self._sync_thread.start()
+
+    @_never_raise
+    def write_tick(self, tick: TickData):
+        """"""
+        self._write(
+            RECORD_TICK,
+            _encode(tick.symbol),
+            tick.last_price,
+            tick.volume,
+            *tick.bid_prices,
+            *tick.bid_volumes,
+            *tick.ask_prices,
+            *tick.ask_volumes,
+        )
+
+    @_never_raise
+    def write_order_request(self, req: OrderRequest):
+        """"""
+        self._write(
+            RECORD_ORDER_REQUEST,
+            _encode(req.symbol),
+            _encode(req.order_link_id),
+            _code(ORDER_TYPE_CODES, req.type),
+            _code(SIDE_CODES, req.side),
+            _code(TIME_IN_FORCE_CODES, req.time_in_force),
+            req.price,
+            req.size,
+        )
+
+    @_never_raise
+    def write_order(self, order: OrderData):
+        """"""
+        self._write(
+            RECORD_ORDER,
+            _encode(order.symbol),
+            _encode(order.order_link_id),
+            _code(ORDER_TYPE_CODES, order.type),
+            _code(SIDE_CODES, order.side),
+            _code(ORDER_STATUS_CODES, getattr(order, "status", None)),
+            order.price,
+            order.size,
+            getattr(order, "cum_exec_qty", 0),
+            getattr(order, "leaves_qty", 0),
+            order.update_time,
+        )
+
+    @_never_raise
+    def write_cancel_request(self, req: CancelRequest):
+        """"""
+        self._write(
+            RECORD_CANCEL_REQUEST,
+            _encode(req.symbol),
+            _encode(req.order_id),
+            _encode(req.order_link_id),
+        )
+
+    def _write(self, record_type: int, *values):
+        """"""
+        body = RECORD_STRUCTS[record_type]
+        size = HEADER.size + body.size
+        timestamp = time.time_ns()
+
+        with self._lock:
+            if (
+                not self._mmap
+                or self._offset + size + HEADER.size > self.segment_size
+                or timestamp >= self._date_end
+            ):
+                self._open_segment()
+
+            # Body first, a record whose values fail to pack keeps type 0
+            offset = self._offset
+            body.pack_into(self._mmap, offset + HEADER.size, *values)
+            HEADER.pack_into(self._mmap, offset, record_type, timestamp)
+            self._offset = offset + size
+
+    def _open_segment(self):
+        """
+        Close current segment and create the next one.
+        """
+        self._close_segment()
+
+        now = datetime.now()
+        self._date = now.strftime("%Y%m%d")
+        midnight = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        self._date_end = int(midnight.timestamp() * 1e9)
+
+        number = len(glob.glob(os.path.join(self.folder, f"{self._date}.*{SEGMENT_SUFFIX}")))
+        path = os.path.join(self.folder, f"{self._date}.{number:04d}{SEGMENT_SUFFIX}")
+
+        self._file = open(path, "w+b")
+        self._file.truncate(self.segment_size)
+        self._mmap = mmap.mmap(self._file.fileno(), self.segment_size)
+        self._offset = 0
+        self._synced = 0
+
+    def _close_segment(self):
+        """
+        Sync and cut the unused tail of current segment.
+        """
+        if not self._mmap:
+            return
+
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(self._offset)
+        self._file.close()
+
+        self._mmap = None
+        self._file = None
+
+    def flush(self):
+        """
+        Sync written records to disk.
+        """
+        with self._lock:
+            if self._mmap and self._offset != self._synced:
+                self._mmap.flush()
+                self._synced = self._offset
+
+    def close(self):
+        """"""
+        self._active = False
+        self._stop_event.set()
+        self._sync_thread.join()
+
+        with self._lock:
+            self._close_segment()
+
+    def _run_sync(self):
+        """"""
+        while self._active:
+            self._stop_event.wait(self.sync_interval)
+            self.flush()
+
+
+class JournalReader:
+    """
+    Scan journal segments written by JournalWriter.
+    """
+
+    def __init__(self, folder: str):
+        """"""
+        self.folder = folder
+
+    def get_segments(self, date: str) -> List[str]:
+        """
+        Segment files of date (YYYYMMDD) in write order.
+        """
+        return sorted(glob.glob(os.path.join(self.folder, f"{date}.*{SEGMENT_SUFFIX}")))
+
+    def scan(self, date: str, types: set = None) -> Iterator[Tuple[int, int, tuple]]:
+        """
+        Iterate (record_type, timestamp, values) of all records of date,
+        skipping records whose type is not in types.
+        """
+        header_size = HEADER.size
+        unpack_header = HEADER.unpack_from
+
+        for path in self.get_segments(date):
+            with open(path, "rb") as f:
+                data = f.read()
+
+            offset = 0
+            end = len(data) - header_size
+            while offset <= end:
+                record_type, timestamp = unpack_header(data, offset)
+                if not record_type:
+                    break
+
+                body = RECORD_STRUCTS[record_type]
+                offset += header_size
+                if types is None or record_type in types:
+                    yield record_type, timestamp, body.unpack_from(data, offset)
+                offset += body.size
+
+    def records(self, date: str, types: set = None) -> Iterator[dict]:
+        """
+        Iterate records of date as dict, with strings and enums decoded.
+        """
+        for record_type, timestamp, values in self.scan(date, types):
+            record = dict(zip(RECORD_FIELDS[record_type], values))
+            record["record_type"] = record_type
+            record["timestamp"] = timestamp
+
+            for key in ("symbol", "order_link_id", "order_id"):
+                if key in record:
+                    record[key] = _decode(record[key])
+            if "type" in record:
+                record["type"] = _lookup(ORDER_TYPES, record["type"])
+            if "side" in record:
+                record["side"] = _lookup(SIDES, record["side"])
+            if "time_in_force" in record:
+                record["time_in_force"] = _lookup(TIME_IN_FORCES, record["time_in_force"])
+            if "status" in record:
+                record["status"] = _lookup(ORDER_STATUSES, record["status"])
+
+            yield record
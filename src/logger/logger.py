@@ -1,7 +1,11 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import queue
 from datetime import datetime
+from threading import Thread
 import os
 
 file_handlers: Dict[str, logging.FileHandler] = {}
@@ -25,6 +29,235 @@ class LogFilter(logging.Filter):
             return 0
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Put records into a bounded queue, to be written to target handlers by
+    BatchQueueListener.
+
+    policy "block" waits for free space when the queue is full, "drop"
+    discards the record and counts it in dropped.
+
+    Records are put into the queue as they are, message formatting is left
+    to the listener thread. Objects passed as log arguments should not be
+    modified after logging.
+    """
+
+    def __init__(self, queue_: queue.Queue, targets: List[logging.Handler], policy: str = "block"):
+        """"""
+        super().__init__(queue_)
+        self.targets = targets
+        self.block = policy == "block"
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord):
+        """"""
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """"""
+        try:
+            self.queue.put((self.targets, record), block=self.block)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchFlushMixin:
+    """
+    Handler mixin for BatchQueueListener: while batching is set, the flush
+    done after each record is skipped, and the listener calls flush_batch
+    once per batch instead.
+    """
+
+    batching: bool = False
+
+    def flush(self):
+        """"""
+        if not self.batching:
+            super().flush()
+
+    def flush_batch(self):
+        """"""
+        super().flush()
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+    """"""
+    pass
+
+
+class BatchRotatingFileHandler(BatchFlushMixin, logging.handlers.RotatingFileHandler):
+    """"""
+    pass
+
+
+class BatchQueueListener:
+    """
+    Write records queued by BoundedQueueHandler on a background thread.
+
+    Records are written in batches. Handlers with BatchFlushMixin are
+    flushed once per batch instead of once per record, other handlers
+    flush as they normally do.
+
+    Errors raised by a handler are passed to its handleError, like
+    logging.shutdown does, so the thread keeps running and logging calls
+    never wait on a queue nobody reads.
+    """
+
+    _sentinel = None
+
+    def __init__(
+        self,
+        queue_: queue.Queue,
+        handlers: List[logging.Handler],
+        batch_size: int = 100,
+        timeout: float = 5,
+    ):
+        """
+        :param timeout: seconds stop waits for queued records to be written
+        """
+        self.queue = queue_
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self._thread: Optional[Thread] = None
+
+    @property
+    def active(self) -> bool:
+        """"""
+        return self._thread is not None
+
+    def start(self):
+        """"""
+        if self._thread:
+            return
+
+        for handler in self.handlers:
+            if isinstance(handler, BatchFlushMixin):
+                handler.batching = True
+
+        self._thread = Thread(target=self._run, name="BatchQueueListener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Write out all queued records, then stop the thread.
+        """
+        if not self._thread:
+            return
+
+        # Waits a while for space, the queue may be full when stopping
+        try:
+            self.queue.put(self._sentinel, timeout=self.timeout)
+        except queue.Full:
+            pass
+        self._thread.join(self.timeout)
+        self._thread = None
+
+        for handler in self.handlers:
+            if isinstance(handler, BatchFlushMixin):
+                handler.batching = False
+            self._flush(handler, None)
+
+    @staticmethod
+    def _flush(handler: logging.Handler, record: Optional[logging.LogRecord]):
+        """"""
+        try:
+            if isinstance(handler, BatchFlushMixin):
+                handler.flush_batch()
+            else:
+                handler.flush()
+        except Exception:
+            if record is not None:
+                handler.handleError(record)
+
+    def _run(self):
+        """"""
+        q = self.queue
+
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopped = False
+            record = None
+            for item in batch:
+                if item is self._sentinel:
+                    stopped = True
+                    continue
+
+                targets, record = item
+                for handler in targets:
+                    if record.levelno >= handler.level:
+                        try:
+                            handler.handle(record)
+                        except Exception:
+                            handler.handleError(record)
+
+            for handler in self.handlers:
+                if isinstance(handler, BatchFlushMixin):
+                    self._flush(handler, record)
+
+            for _ in batch:
+                q.task_done()
+
+            if stopped:
+                break
+
+
+def _start_queue_logging(config: dict) -> Optional[BatchQueueListener]:
+    """
+    Move handlers of loggers listed in config["queue"] behind a queue, so
+    logging calls only pay for putting the record into the queue.
+
+    At exit the queue is drained and the handlers are put back on their
+    loggers, so records logged during the rest of shutdown are written
+    directly instead of waiting in a queue nobody reads.
+    """
+    queue_config = config.get("queue", {})
+    if not queue_config.get("enabled", False):
+        return None
+
+    q = queue.Queue(queue_config.get("maxsize", 10000))
+    all_handlers = []
+    moved = []  # (logger, queue_handler, handlers)
+
+    for name in queue_config["loggers"]:
+        logger = logging.getLogger(name)
+        handlers = list(logger.handlers)
+        for handler in handlers:
+            logger.removeHandler(handler)
+            if handler not in all_handlers:
+                all_handlers.append(handler)
+
+        queue_handler = BoundedQueueHandler(q, handlers, queue_config.get("policy", "block"))
+        logger.addHandler(queue_handler)
+        moved.append((logger, queue_handler, handlers))
+
+    listener = BatchQueueListener(q, all_handlers, queue_config.get("batch_size", 100))
+    listener.start()
+
+    # Runs before logging.shutdown, which was registered earlier
+    atexit.register(_stop_queue_logging, listener, moved)
+    return listener
+
+
+def _stop_queue_logging(listener: BatchQueueListener, moved: list):
+    """
+    Write out queued records and log directly again, called at exit.
+    """
+    for logger, queue_handler, handlers in moved:
+        for handler in handlers:
+            logger.addHandler(handler)
+        logger.removeHandler(queue_handler)
+
+    listener.stop()
+
+
 def _get_filename(*, basename='app.log', log_level='info'):
     date_str = datetime.today().strftime('%Y%m%d')
     pidstr = str(os.getpid())
@@ -61,14 +294,14 @@ class LogFactory:
 
         'handlers': {
             'console': {
-                'class': 'logging.StreamHandler',
+                '()': BatchStreamHandler,
                 'level': 'ERROR',
                 'formatter': 'dev'
             },
 
             'file': {
                 # 'level': 'DEBUG',
-                'class': 'logging.handlers.RotatingFileHandler',
+                '()': BatchRotatingFileHandler,
                 'filename': _get_filename(log_level='info'),
                 'maxBytes': _SINGLE_FILE_MAX_BYTES,
                 'encoding': 'UTF-8',
@@ -79,7 +312,7 @@ class LogFactory:
             },
             'file_error': {
                 'level': 'ERROR',
-                'class': 'logging.handlers.RotatingFileHandler',
+                '()': BatchRotatingFileHandler,
                 'filename': _get_filename(log_level='error'),
                 'maxBytes': _SINGLE_FILE_MAX_BYTES,  # 2GB
                 'encoding': 'UTF-8',
@@ -90,6 +323,15 @@ class LogFactory:
 
         },
 
+        # Loggers listed here write through a background thread
+        'queue': {
+            'enabled': True,
+            'loggers': ['SAMPLE_LOGGER', 'ERROR_LOGGER', 'DEBUG_LOGGER'],
+            'maxsize': 10000,
+            'policy': 'block',  # block or drop when queue is full
+            'batch_size': 100,  # records written per flush
+        },
+
         'loggers': {
             'SAMPLE_LOGGER': {
                 'handlers': ['console', 'file', 'file_error'],
@@ -107,6 +349,8 @@ class LogFactory:
     }
 
     logging.config.dictConfig(_LOG_CONFIG_DICT)
+    _queue_listener = _start_queue_logging(_LOG_CONFIG_DICT)
+
     @classmethod
     def get_logger(cls, logger_name):
         return logging.getLogger(logger_name)
@@ -1 +1,3 @@
 from .manager import LocalOrderManager
+from .order_store import OrderStore, TERMINAL_STATUSES
+from .id_generator import OrderIdGenerator, UuidIdGenerator, CompactIdGenerator
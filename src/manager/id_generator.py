@@ -0,0 +1,145 @@
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from threading import Lock
+from typing import Deque, List
+
+BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Bybit rejects order_link_id longer than this
+MAX_ID_LENGTH = 36
+
+# Custom epoch (2020-01-01 UTC) keeps the time part short
+EPOCH_MS = 1577836800000
+
+
+def to_base36(value: int, width: int) -> str:
+    """
+    Encode value in base 36, left padded with zeros to width.
+    """
+    chars = []
+    while value:
+        value, remainder = divmod(value, 36)
+        chars.append(BASE36[remainder])
+    return "".join(reversed(chars)).rjust(width, "0")
+
+
+# All 2 digit base 36 strings, the low digits of a block are taken from here
+_LOW_DIGITS = [to_base36(n, 2) for n in range(36 ** 2)]
+
+
+class OrderIdGenerator(ABC):
+    """
+    Base class of order_link_id generators used by LocalOrderManager.
+    """
+
+    @abstractmethod
+    def next_id(self) -> str:
+        """"""
+        pass
+
+
+class UuidIdGenerator(OrderIdGenerator):
+    """
+    Prefix + counter + uuid4, the original scheme. Ids may exceed the
+    length limit of Bybit depending on prefix.
+    """
+
+    def __init__(self, prefix: str = ""):
+        """"""
+        self.prefix = prefix
+        self.count = 0
+
+    def next_id(self) -> str:
+        """"""
+        self.count += 1
+        return self.prefix + str(self.count) + str(uuid.uuid4())
+
+
+class CompactIdGenerator(OrderIdGenerator):
+    """
+    Monotonic ids made of start time, node id and a counter in base 36,
+    17 chars plus prefix:
+
+        [prefix][start time ms: 8][node: 3][counter: 6]
+
+    Start time separates restarts of the process and node separates
+    processes started in the same millisecond. Give each process sharing an
+    account its own node_id, by default a random one is taken. All parts
+    are fixed width, so ids sort in generation order. Ids are prepared in
+    blocks, next_id only pops one from the current block.
+    """
+
+    TIME_WIDTH = 8
+    NODE_WIDTH = 3
+    COUNTER_WIDTH = 6
+
+    def __init__(self, prefix: str = "", node_id: int = None, block_size: int = 1024):
+        """
+        :param node_id: 0 to 36 ** NODE_WIDTH - 1, random if not given
+        """
+        if node_id is None:
+            node_id = int.from_bytes(os.urandom(4), "little")
+        elif not 0 <= node_id < 36 ** self.NODE_WIDTH:
+            raise ValueError(f"Node id {node_id} is out of range")
+
+        self.prefix = prefix
+        self.node = to_base36(node_id % 36 ** self.NODE_WIDTH, self.NODE_WIDTH)
+        self.block_size = block_size
+
+        if len(prefix) + self.TIME_WIDTH + self.NODE_WIDTH + self.COUNTER_WIDTH > MAX_ID_LENGTH:
+            raise ValueError(f"Prefix {prefix} is too long for order_link_id")
+
+        self._lock = Lock()
+        self._block: Deque[str] = deque()
+        self._start_ms: int = 0
+        self._head: str = ""
+        self._counter: int = 0
+
+        self._reset_head()
+
+    def _reset_head(self):
+        """
+        Take a new start time, called at start and when counter runs out.
+        """
+        start_ms = int(time.time() * 1000) - EPOCH_MS
+        self._start_ms = max(start_ms, self._start_ms + 1)
+        self._head = self.prefix + to_base36(self._start_ms, self.TIME_WIDTH) + self.node
+        self._counter = 0
+
+    def _allocate(self) -> List[str]:
+        """
+        Prepare the next block of ids.
+        """
+        limit = 36 ** self.COUNTER_WIDTH
+        if self._counter + self.block_size > limit:
+            self._reset_head()
+
+        head = self._head
+        width = self.COUNTER_WIDTH - 2
+        base = len(_LOW_DIGITS)
+
+        n = self._counter
+        end = n + self.block_size
+        self._counter = end
+
+        ids = []
+        while n < end:
+            high, low = divmod(n, base)
+            stop = min(end, (high + 1) * base)
+            middle = head + to_base36(high, width)
+            ids.extend([middle + digits for digits in _LOW_DIGITS[low:low + stop - n]])
+            n = stop
+        return ids
+
+    def next_id(self) -> str:
+        """"""
+        try:
+            return self._block.popleft()
+        except IndexError:
+            with self._lock:
+                if not self._block:
+                    self._block.extend(self._allocate())
+                return self._block.popleft()
@@ -1,7 +1,11 @@
-from src.bybit_gateway import BybitGateway
 from copy import copy
-from src.datatypes import OrderData, CancelRequest
-import uuid
+from threading import Lock
+from typing import List
+
+from src.constant import OrderStatus
+from src.datatypes import OrderData
+from .order_store import OrderStore
+from .id_generator import OrderIdGenerator, CompactIdGenerator
 
 
 class LocalOrderManager:
@@ -9,18 +13,31 @@ class LocalOrderManager:
     Management tool to support use local order id for trading.
     """
 
-    def __init__(self, gateway: BybitGateway, order_prefix: str = ""):
-        """"""
+    def __init__(
+        self,
+        gateway: "BybitGateway",
+        order_prefix: str = "",
+        max_terminal: int = 10000,
+        id_generator: OrderIdGenerator = None,
+        node_id: int = None,
+    ):
+        """
+        :param node_id: node of order ids, unique for each process trading
+            the same account, see CompactIdGenerator
+        """
         self.gateway = gateway
 
         # For generating local orderid
         self.order_prefix = order_prefix
         self.order_count = 0
-        self.orders = {}  # local_orderid:order
+        self.id_generator = id_generator or CompactIdGenerator(order_prefix, node_id)
 
-        # Map between local and system orderid
-        self.local_sys_orderid_map = {}
-        self.sys_local_orderid_map = {}
+        # Orders and map between local and system orderid
+        self.store = OrderStore(max_terminal)
+        self.orders = self.store.orders  # read-only view, local_orderid:order
+
+        # Buffers below are written by REST callbacks and websocket thread
+        self._lock = Lock()
 
         # Push order data buf
         self.push_data_buf = {}  # sys_orderid:data
@@ -28,30 +45,22 @@ class LocalOrderManager:
         # Callback for processing push order data
         self.push_data_callback = None
 
-        # Cancel request buf
-        self.cancel_request_buf = {}  # local_orderid:req
-
-        # Hook cancel order function
-        self._cancel_order = gateway.cancel_order
-        gateway.cancel_order = self.cancel_order
-
     def new_order_link_id(self):
         """
         Generate a new local orderid.
         """
         self.order_count += 1
-        order_link_id = self.order_prefix + str(self.order_count) + uuid.uuid4()
-        return order_link_id
+        return self.id_generator.next_id()
 
     def get_order_link_id(self, order_id: str):
         """
         Get order_link_id with order_id.
         """
-        order_link_id = self.sys_local_orderid_map.get(order_id, "")
+        order_link_id = self.store.get_order_link_id(order_id)
 
         if not order_link_id:
-            order_link_id = self.new_local_orderid()
-            self.update_orderid_map(order_link_id, order_id)
+            order_link_id = self.new_order_link_id()
+            self.update_order_id_map(order_link_id, order_id)
 
         return order_link_id
 
@@ -59,35 +68,31 @@ class LocalOrderManager:
         """
         Get order_id with local order_link_id.
         """
-        order_id = self.local_sys_orderid_map.get(order_link_id, "")
-        return order_id
+        return self.store.get_order_id(order_link_id)
 
     def update_order_id_map(self, order_link_id: str, order_id: str):
         """
         Update orderid map.
         """
-        self.sys_local_orderid_map[order_id] = order_link_id
-        self.local_sys_orderid_map[order_link_id] = order_id
-
-        self.check_cancel_request(order_link_id)
+        self.store.update_id_map(order_link_id, order_id)
         self.check_push_data(order_id)
 
     def check_push_data(self, sys_orderid: str):
         """
         Check if any order push data waiting.
         """
-        if sys_orderid not in self.push_data_buf:
-            return
+        with self._lock:
+            data = self.push_data_buf.pop(sys_orderid, None)
 
-        data = self.push_data_buf.pop(sys_orderid)
-        if self.push_data_callback:
+        if data and self.push_data_callback:
             self.push_data_callback(data)
 
     def add_push_data(self, sys_orderid: str, data: dict):
         """
         Add push data into buf.
         """
-        self.push_data_buf[sys_orderid] = data
+        with self._lock:
+            self.push_data_buf[sys_orderid] = data
 
     def get_order_with_sys_orderid(self, order_id: str):
         """
@@ -95,39 +100,36 @@ class LocalOrderManager:
         :param order_id:
         :return:
         """
-        order_link_id = self.sys_local_orderid_map.get(order_id, None)
+        order_link_id = self.store.get_order_link_id(order_id)
         if not order_link_id:
             return None
         else:
-            return self.get_order_with_local_orderid(order_link_id)
+            return self.get_order_with_order_link_id(order_link_id)
 
     def get_order_with_order_link_id(self, order_link_id: str):
-        """"""
-        order = self.orders[order_link_id]
-        return copy(order)
-
-    def on_order(self, order: OrderData):
         """
-        Keep an order buf before pushing it to bybit_gateway.
+        Returned order is shared, do not modify it.
         """
-        self.orders[order.order_link_id] = copy(order)
-        self.gateway.on_order(order)
+        return self.store.get(order_link_id)
 
-    def cancel_order(self, req: CancelRequest):
-        """
-        """
-        order_link_id = self.get_sys_orderid(req.order_link_id)
-        if not order_link_id:
-            self.cancel_request_buf[req.order_link_id] = req
-            return
+    def get_active_orders(self, symbol: str = "") -> List[OrderData]:
+        """"""
+        orders = self.store.get_active_orders()
+        if symbol:
+            orders = [order for order in orders if order.symbol == symbol]
+        return orders
+
+    def get_orders_by_symbol(self, symbol: str) -> List[OrderData]:
+        """"""
+        return self.store.get_orders_by_symbol(symbol)
 
-        self._cancel_order(req)
+    def get_orders_by_status(self, status: OrderStatus) -> List[OrderData]:
+        """"""
+        return self.store.get_orders_by_status(status)
 
-    def check_cancel_request(self, order_link_id: str):
+    def on_order(self, order: OrderData):
         """
+        Keep an order buf before pushing it to bybit_gateway.
         """
-        if order_link_id not in self.cancel_request_buf:
-            return
-
-        req = self.cancel_request_buf.pop(order_link_id)
-        self.gateway.cancel_order(req)
+        self.store.put(copy(order))
+        self.gateway.on_order(order)
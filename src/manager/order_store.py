@@ -0,0 +1,128 @@
+from collections import deque
+from threading import Lock
+from types import MappingProxyType
+from typing import Deque, Dict, List, Mapping, Optional
+
+from src.constant import OrderStatus
+from src.datatypes import OrderData
+
+TERMINAL_STATUSES = {
+    OrderStatus.FILLED,
+    OrderStatus.CANCELLED,
+    OrderStatus.REJECTED,
+    OrderStatus.DEACTIVATED,
+}
+
+
+class OrderStore:
+    """
+    Order state indexed by order_link_id, symbol and status.
+
+    All updates are serialized by a single writer lock, lookups read the
+    indexes without locking. Stored orders are never modified in place,
+    each update replaces the object, so orders returned by lookups can be
+    used without copying but must not be modified by the caller.
+
+    Only the latest max_terminal finished orders are kept, older ones are
+    evicted together with their id mapping.
+    """
+
+    def __init__(self, max_terminal: int = 10000):
+        """"""
+        self.max_terminal = max_terminal
+
+        self._lock = Lock()
+
+        self._orders: Dict[str, OrderData] = {}  # order_link_id:order
+        self._active: Dict[str, OrderData] = {}
+        self._by_symbol: Dict[str, Dict[str, OrderData]] = {}
+        self._by_status: Dict[OrderStatus, Dict[str, OrderData]] = {}
+        self._terminal: Deque[str] = deque()
+
+        # Status each order is indexed under, which stays right even if the
+        # caller changed a stored order in place before putting it again
+        self._statuses: Dict[str, OrderStatus] = {}  # order_link_id:status
+
+        # Map between local and system orderid
+        self._local_sys_map: Dict[str, str] = {}
+        self._sys_local_map: Dict[str, str] = {}
+
+        self.orders: Mapping[str, OrderData] = MappingProxyType(self._orders)
+        self.active_orders: Mapping[str, OrderData] = MappingProxyType(self._active)
+
+    def put(self, order: OrderData):
+        """
+        Add or replace an order, status may also be given as the Bybit string.
+        """
+        order_link_id = order.order_link_id
+        if not isinstance(order.status, OrderStatus):
+            order.status = OrderStatus(order.status)
+
+        with self._lock:
+            old_status = self._statuses.get(order_link_id, None)
+            if old_status is not None:
+                self._by_status[old_status].pop(order_link_id, None)
+            was_terminal = old_status in TERMINAL_STATUSES
+
+            self._orders[order_link_id] = order
+            self._statuses[order_link_id] = order.status
+            self._by_symbol.setdefault(order.symbol, {})[order_link_id] = order
+            self._by_status.setdefault(order.status, {})[order_link_id] = order
+
+            if order.status in TERMINAL_STATUSES:
+                self._active.pop(order_link_id, None)
+                if not was_terminal:
+                    self._terminal.append(order_link_id)
+                    self._evict()
+            else:
+                self._active[order_link_id] = order
+
+    def _evict(self):
+        """
+        Drop oldest finished orders beyond max_terminal.
+        """
+        while len(self._terminal) > self.max_terminal:
+            order_link_id = self._terminal.popleft()
+            order = self._orders.pop(order_link_id, None)
+            if not order:
+                continue
+
+            self._by_symbol[order.symbol].pop(order_link_id, None)
+            self._by_status[self._statuses.pop(order_link_id)].pop(order_link_id, None)
+
+            order_id = self._local_sys_map.pop(order_link_id, None)
+            if order_id:
+                self._sys_local_map.pop(order_id, None)
+
+    def update_id_map(self, order_link_id: str, order_id: str):
+        """"""
+        with self._lock:
+            self._sys_local_map[order_id] = order_link_id
+            self._local_sys_map[order_link_id] = order_id
+
+    def get(self, order_link_id: str) -> Optional[OrderData]:
+        """"""
+        return self._orders.get(order_link_id, None)
+
+    def get_order_link_id(self, order_id: str) -> str:
+        """"""
+        return self._sys_local_map.get(order_id, "")
+
+    def get_order_id(self, order_link_id: str) -> str:
+        """"""
+        return self._local_sys_map.get(order_link_id, "")
+
+    def get_active_orders(self) -> List[OrderData]:
+        """"""
+        return list(self._active.values())
+
+    def get_orders_by_symbol(self, symbol: str) -> List[OrderData]:
+        """"""
+        return list(self._by_symbol.get(symbol, {}).values())
+
+    def get_orders_by_status(self, status: OrderStatus) -> List[OrderData]:
+        """"""
+        return list(self._by_status.get(status, {}).values())
+
+    def __len__(self):
+        return len(self._orders)
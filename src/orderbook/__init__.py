@@ -0,0 +1 @@
+from .orderbook import OrderBook, price_to_ticks, DEFAULT_PRICE_SCALE
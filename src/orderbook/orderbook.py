@@ -0,0 +1,229 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+from src.datatypes.fixed import DEFAULT_PRICE_SCALE, PriceScale, get_price_scale
+
+BUY = "Buy"
+
+
+def price_to_ticks(price: str, scale: int = DEFAULT_PRICE_SCALE) -> int:
+    """
+    Convert a decimal price string to integer ticks without going through float,
+    e.g. price_to_ticks("9000.5", 2) == 900050.
+    """
+    return PriceScale(scale).from_str(price)
+
+
+class _BookSide:
+    """
+    One side of the order book.
+
+    Price levels are kept in a sorted list of integer keys with the best price
+    at the end, so that removing the best level is a pop from the tail. Bids
+    use ticks as key, asks use negative ticks.
+    """
+
+    def __init__(self, sign: int):
+        """"""
+        self.sign = sign
+        self.keys: List[int] = []
+        self.sizes: Dict[int, int] = {}  # ticks:size
+
+    def clear(self):
+        """"""
+        self.keys.clear()
+        self.sizes.clear()
+
+    def set(self, ticks: int, size: int):
+        """
+        Insert a new level or update size of an existing one.
+        """
+        if ticks not in self.sizes:
+            insort(self.keys, ticks * self.sign)
+        self.sizes[ticks] = size
+
+    def delete(self, ticks: int):
+        """"""
+        if self.sizes.pop(ticks, None) is None:
+            return
+
+        key = ticks * self.sign
+        keys = self.keys
+        if keys[-1] == key:
+            keys.pop()
+        else:
+            del keys[bisect_left(keys, key)]
+
+    def best(self) -> int:
+        """
+        Ticks of the best level, 0 if the side is empty.
+        """
+        if not self.keys:
+            return 0
+        return self.keys[-1] * self.sign
+
+    def top(self, k: int) -> List[Tuple[int, int]]:
+        """
+        Best k levels as (ticks, size), best first.
+        """
+        sign = self.sign
+        sizes = self.sizes
+        return [
+            (key * sign, sizes[key * sign])
+            for key in self.keys[:-k - 1:-1]
+        ]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class OrderBook:
+    """
+    L2 order book of one symbol keyed by integer price ticks.
+
+    Prices going out (levels, best bid/ask, changes) are ticks as well, in
+    the PriceScale of the symbol, use to_price to get a float.
+
+    * insert/update/delete: O(log n) search
+    * best bid/ask: O(1)
+    * top k levels: O(k)
+    """
+
+    def __init__(self, symbol: str, price_scale: int = None):
+        """
+        :param price_scale: decimals of price, by default the scale set for
+            symbol with set_price_scale.
+        """
+        self.symbol = symbol
+        if price_scale is None:
+            self.scale = get_price_scale(symbol)
+        else:
+            self.scale = PriceScale(price_scale)
+        self.price_scale = self.scale.scale
+        self.price_unit = self.scale.unit
+
+        self.bids = _BookSide(1)
+        self.asks = _BookSide(-1)
+
+        self.ready: bool = False  # snapshot received
+        self.seq: int = 0  # cross_seq of last applied data
+
+        # Top levels as of last top_changes call
+        self._last_bids: List[Tuple[int, int]] = []
+        self._last_asks: List[Tuple[int, int]] = []
+
+    def clear(self):
+        """
+        Drop all levels, deltas are not valid again till next snapshot.
+        """
+        self.bids.clear()
+        self.asks.clear()
+        self.ready = False
+        self.seq = 0
+        self._last_bids = []
+        self._last_asks = []
+
+    def to_ticks(self, price: str) -> int:
+        """"""
+        return self.scale.from_str(price)
+
+    def to_price(self, ticks: int) -> float:
+        """"""
+        return ticks / self.price_unit
+
+    def _side(self, side: str) -> _BookSide:
+        """"""
+        if side == BUY:
+            return self.bids
+        return self.asks
+
+    def on_snapshot(self, data: List[dict], seq: int = 0):
+        """
+        Rebuild the book from orderBookL2 snapshot data.
+        """
+        self.clear()
+
+        to_ticks = self.scale.from_str
+        for d in data:
+            self._side(d["side"]).set(to_ticks(d["price"]), d["size"])
+
+        self.ready = True
+        self.seq = seq
+
+    def on_delta(self, delete: List[dict], update: List[dict], insert: List[dict], seq: int = 0):
+        """
+        Apply orderBookL2 delta data.
+        """
+        if seq:
+            self.seq = seq
+
+        to_ticks = self.scale.from_str
+
+        for d in delete:
+            self._side(d["side"]).delete(to_ticks(d["price"]))
+
+        for d in update:
+            self._side(d["side"]).set(to_ticks(d["price"]), d["size"])
+
+        for d in insert:
+            self._side(d["side"]).set(to_ticks(d["price"]), d["size"])
+
+    def top_changes(self, k: int) -> Tuple[tuple, tuple]:
+        """
+        Levels of the top k which changed since last call, as (level, ticks, size)
+        for bids and asks, level 1 is the best. Both are empty if the update
+        did not touch the top k.
+        """
+        bids = self.bids.top(k)
+        asks = self.asks.top(k)
+
+        bid_changes = self._diff(self._last_bids, bids)
+        ask_changes = self._diff(self._last_asks, asks)
+
+        self._last_bids = bids
+        self._last_asks = asks
+        return bid_changes, ask_changes
+
+    def _diff(self, old: List[Tuple[int, int]], new: List[Tuple[int, int]]) -> tuple:
+        """"""
+        if old == new:
+            return ()
+
+        changes = []
+        for i in range(max(len(old), len(new))):
+            level = new[i] if i < len(new) else (0, 0)
+            if i >= len(old) or old[i] != level:
+                changes.append((i + 1, level[0], level[1]))
+        return tuple(changes)
+
+    def crossed(self) -> bool:
+        """
+        Best bid at or above best ask, the book missed some data.
+        """
+        bid = self.bids.best()
+        ask = self.asks.best()
+        return bool(bid and ask and bid >= ask)
+
+    def best_bid(self) -> int:
+        """
+        Ticks of best bid, 0 if there is none.
+        """
+        return self.bids.best()
+
+    def best_ask(self) -> int:
+        """
+        Ticks of best ask, 0 if there is none.
+        """
+        return self.asks.best()
+
+    def top_bids(self, k: int) -> List[Tuple[int, int]]:
+        """
+        Best k bid levels as (ticks, size), best first.
+        """
+        return self.bids.top(k)
+
+    def top_asks(self, k: int) -> List[Tuple[int, int]]:
+        """
+        Best k ask levels as (ticks, size), best first.
+        """
+        return self.asks.top(k)
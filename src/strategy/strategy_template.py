@@ -1,9 +1,53 @@
-from src.datatypes import TickData
+from src.datatypes import TickData, OrderData, DepthDelta
+from src.event import Event
+from src.bar import BarSnapshot
 
 
 class Strategy:
     def __init__(self):
         pass
 
-    def __onTick(self, tick: TickData):
+    def process_tick_event(self, event: Event):
+        """"""
+        self.on_tick(event.data)
+
+    def process_order_event(self, event: Event):
+        """"""
+        self.on_order(event.data)
+
+    def process_trade_event(self, event: Event):
+        """"""
+        self.on_trade(event.data)
+
+    def process_position_event(self, event: Event):
+        """"""
+        self.on_position(event.data)
+
+    def process_depth_event(self, event: Event):
+        """"""
+        self.on_depth(event.data)
+
+    def process_bar_event(self, event: Event):
+        """"""
+        self.on_bar(event.data)
+
+    def on_tick(self, tick: TickData):
+        pass
+
+    def on_order(self, order: OrderData):
+        pass
+
+    def on_trade(self, trade):
+        pass
+
+    def on_position(self, position):
+        pass
+
+    def on_depth(self, delta: DepthDelta):
+        pass
+
+    def on_bar(self, bars: BarSnapshot):
+        """
+        A bar of bars was completed, read the latest bars with bars.close(n) etc.
+        """
         pass
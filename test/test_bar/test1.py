@@ -0,0 +1,106 @@
+import random
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.bar import BarGenerator
+from src.constant import BarType
+from src.datatypes import TickData
+
+
+def make_ticks(n: int) -> list:
+    """Trade ticks mixed with book update ticks which repeat the last trade."""
+    ticks = []
+    price = 900000
+    total_volume = 1_000_000
+    timestamp = 1_600_000_000_000
+    for _ in range(n):
+        timestamp += random.randint(1, 500)
+        if random.random() < 0.8:
+            price += random.randint(-5, 5) * 50
+            total_volume += random.randint(1, 100)
+
+        tick = TickData("BTCUSD")
+        tick.last_price = price
+        tick.total_volume = total_volume
+        tick.volume = random.randint(0, 10 ** 9)  # rolling 24h volume, not used
+        tick.datetime = datetime.fromtimestamp(timestamp / 1000, timezone.utc)
+        ticks.append(tick)
+    return ticks
+
+
+def trade_ticks(ticks: list) -> list:
+    """(tick, traded volume) of ticks after the first one with a trade."""
+    trades = []
+    for last_tick, tick in zip(ticks, ticks[1:]):
+        if tick.total_volume > last_tick.total_volume:
+            trades.append((tick, tick.total_volume - last_tick.total_volume))
+    return trades
+
+
+def time_bars(ticks: list, seconds: int) -> list:
+    """Reference aggregation with plain Python, completed bars only."""
+    bars = {}
+    for tick, volume in trade_ticks(ticks):
+        timestamp = round(tick.datetime.timestamp() * 1000)
+        start = timestamp - timestamp % (seconds * 1000)
+        bar = bars.get(start)
+        if not bar:
+            bars[start] = [start, tick.last_price, tick.last_price, tick.last_price, tick.last_price, volume]
+        else:
+            bar[2] = max(bar[2], tick.last_price)
+            bar[3] = min(bar[3], tick.last_price)
+            bar[4] = tick.last_price
+            bar[5] += volume
+    return list(bars.values())[:-1]
+
+
+if __name__ == "__main__":
+    ticks = make_ticks(100_000)
+
+    completed = []
+    generator = BarGenerator(completed.append)
+    minute = generator.add("BTCUSD", BarType.TIME, 60, capacity=100)
+    generator.add("BTCUSD", BarType.TIME, 300)
+    by_volume = generator.add("BTCUSD", BarType.VOLUME, 10000)
+    by_tick = generator.add("BTCUSD", BarType.TICK, 100)
+    assert generator.add("BTCUSD", BarType.TIME, 60) is minute
+
+    start = time.perf_counter()
+    for tick in ticks:
+        generator.update_tick(tick)
+    cost = time.perf_counter() - start
+
+    # Only the latest capacity bars are kept, as one contiguous view
+    trades = len(trade_ticks(ticks))
+    expected = np.array(time_bars(ticks, 60)[-100:])
+    assert len(minute) == 100 and minute.total > 100
+    close = minute.close()
+    assert close.base is not None and close.flags["C_CONTIGUOUS"]
+    assert (minute.datetime() == expected[:, 0]).all()
+    assert (minute.open() == expected[:, 1]).all()
+    assert (minute.high() == expected[:, 2]).all()
+    assert (minute.low() == expected[:, 3]).all()
+    assert (close == expected[:, 4]).all()
+    assert (minute.volume() == expected[:, 5]).all()
+    assert (minute.close(10) == expected[-10:, 4]).all()
+
+    assert (by_volume.volume() >= 10000).all()
+    assert (by_tick.count() == 100).all() and by_tick.total == trades // 100
+    assert len(completed) == sum(series.total for series in generator.series["BTCUSD"])
+
+    # Pushed snapshots keep the bars as they were when completed
+    first = next(bars for bars in completed if bars.bar_type == BarType.TIME and bars.size == 60)
+    assert first.total == 1 and len(first) == 1 and first.close(10).shape == (1,)
+    assert first.datetime()[0] == time_bars(ticks, 60)[0][0]
+    assert not first.close().flags["WRITEABLE"]
+    last = [bars for bars in completed if bars.bar_type == BarType.TIME and bars.size == 60][-1]
+    assert (last.close() == minute.close()).all() and not np.shares_memory(last.close(), minute.close())
+
+    # Vectorized indicator on the view
+    ma = np.convolve(minute.close(), np.ones(20) / 20, mode="valid")
+
+    print(f"{len(completed)} bars from {trades} trades of {len(ticks)} ticks in 4 series")
+    print(f"update_tick: {cost / len(ticks) * 1e6:.2f}us per tick")
+    print(f"last 20 bar ma of 1 minute close: {ma[-1] / 100:.2f}")
@@ -0,0 +1,62 @@
+import time
+
+from src.constant import OrderType, TimeInForce
+from src.contract import ContractRegistry, OrderValidator
+from src.datatypes import OrderRequest, TickData
+
+SYMBOLS = [{
+    "name": "BTCUSD", "alias": "BTCUSD", "status": "Trading",
+    "base_currency": "BTC", "quote_currency": "USD", "price_scale": 2,
+    "taker_fee": "0.00075", "maker_fee": "-0.00025",
+    "leverage_filter": {"min_leverage": 1, "max_leverage": 100, "leverage_step": "0.01"},
+    "price_filter": {"min_price": "0.5", "max_price": "999999.5", "tick_size": "0.5"},
+    "lot_size_filter": {"max_trading_qty": 1000000, "min_trading_qty": 1, "qty_step": 1},
+}]
+
+
+def make_req(price: int, size: int = 10, side: str = "Buy",
+             tif: TimeInForce = TimeInForce.GOOD_TILL_CANCEL) -> OrderRequest:
+    return OrderRequest("BTCUSD", "", OrderType.LIMIT, price, size, side, tif)
+
+
+if __name__ == "__main__":
+    contracts = ContractRegistry("")
+    contracts.on_symbols(SYMBOLS)
+
+    tick = TickData("BTCUSD")
+    tick.set_bids([(900000, 100)])  # 9000.00
+    tick.set_asks([(900050, 100)])  # 9000.50
+    ticks = {"BTCUSD": tick}
+
+    validator = OrderValidator(contracts, ticks.get)
+
+    # Rounding never makes the price worse
+    req = make_req(900020)
+    assert validator.validate(req) == "" and req.price == 900000
+    req = make_req(900020, side="Sell")
+    assert validator.validate(req) == "" and req.price == 900050
+
+    assert validator.validate(make_req(900000, size=0))
+    assert validator.validate(make_req(900000, size=2000000))
+    assert validator.validate(make_req(2000000000))
+    assert validator.validate(make_req(1000000))  # 10000 is 11% above best ask
+    assert validator.validate(make_req(900050, tif=TimeInForce.POST_ONLY))
+    assert validator.validate(make_req(900000, side="Sell", tif=TimeInForce.POST_ONLY))
+    assert validator.validate(make_req(900000, tif=TimeInForce.POST_ONLY)) == ""
+
+    fixer = OrderValidator(contracts, ticks.get, fix_post_only=True)
+    req = make_req(900100, tif=TimeInForce.POST_ONLY)
+    assert fixer.validate(req) == "" and req.price == 900000
+
+    strict = OrderValidator(contracts, ticks.get, fix=False)
+    assert strict.validate(make_req(900020))
+
+    n = 100_000
+    reqs = [make_req(900000 - (i % 100) * 10, tif=TimeInForce.POST_ONLY) for i in range(n)]
+    start = time.perf_counter()
+    for req in reqs:
+        validator.validate(req)
+    cost = time.perf_counter() - start
+
+    print(f"validate: {cost / n * 1e6:.2f}us per order")
+    print(validator.to_dict())
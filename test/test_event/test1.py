@@ -0,0 +1,88 @@
+import time
+from threading import Lock
+
+from src.event import EventEngine, Event, EVENT_TICK, EVENT_ORDER, EVENT_TRADE
+
+
+class Recorder:
+    """Slow handler noting if it ever runs together with another one of the symbol."""
+
+    running = Lock()
+    overlaps = 0
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.events = []
+
+    def __call__(self, event: Event):
+        if not Recorder.running.acquire(blocking=False):
+            Recorder.overlaps += 1
+            return
+        time.sleep(self.delay)
+        self.events.append(event.data)
+        Recorder.running.release()
+
+
+def wait(engine: EventEngine, symbol: str):
+    queue = engine._get_queue(symbol)
+    while queue.events or queue.scheduled:
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    n = 200
+    engine = EventEngine()
+
+    # Stopping an engine never started is fine, and a stopped engine restarts
+    engine.stop()
+    engine.start()
+    engine.stop()
+    engine.start()
+
+    # Every tick reaches a normal handler, however slow it is
+    normal = Recorder(0.002)
+    engine.register(EVENT_TICK + "BTCUSD", normal)
+    for i in range(n):
+        engine.put(Event(EVENT_TICK, "BTCUSD", i))
+    wait(engine, "BTCUSD")
+    assert normal.events == list(range(n)), len(normal.events)
+    assert engine.conflated == 0
+
+    # Latest only handler skips ticks, and runs in order with orders of the symbol
+    latest = engine.latest_only(Recorder(0.005))
+    orders = Recorder(0.001)
+    engine.register(EVENT_TICK + "ETHUSD", latest)
+    engine.register(EVENT_ORDER + "ETHUSD", orders)
+    for i in range(n):
+        engine.put(Event(EVENT_TICK, "ETHUSD", i))
+        if i % 10 == 0:
+            engine.put(Event(EVENT_ORDER, "ETHUSD", i))
+        time.sleep(0.0005)
+    wait(engine, "ETHUSD")
+
+    delivered = latest.handler.events
+    assert delivered[-1] == n - 1 and delivered == sorted(delivered)
+    assert latest.delivered == len(delivered) < n
+    assert latest.received == latest.delivered + latest.conflated
+    assert orders.events == list(range(0, n, 10))
+    assert Recorder.overlaps == 0
+
+    engine.stop()
+    engine.stop()
+
+    # A full buffer drops ticks only, orders and trades are all kept in order
+    engine = EventEngine(buffer_size=10)
+    for i in range(100):
+        engine.put(Event(EVENT_TICK, "XRPUSD", i))
+        if i % 3 == 0:
+            engine.put(Event(EVENT_ORDER, "XRPUSD", i))
+        if i % 7 == 0:
+            engine.put(Event(EVENT_TRADE, "XRPUSD", i))
+    events = engine._get_queue("XRPUSD").events
+    assert [e.data for e in events if e.type == EVENT_ORDER] == list(range(0, 100, 3))
+    assert [e.data for e in events if e.type == EVENT_TRADE] == list(range(0, 100, 7))
+    ticks = [e.data for e in events if e.type == EVENT_TICK]
+    assert len(ticks) <= 1 and engine.dropped == 100 - len(ticks)
+
+    print(f"latest only: {latest.to_dict()}")
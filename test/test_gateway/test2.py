@@ -0,0 +1,47 @@
+import time
+
+from src.bybit_gateway.gateway import sign
+from src.bybit_gateway.signer import Signer
+
+KEY = "8cxTAQ8w68MpL58rVb"
+SECRET = b"lcpJ5I4Fabcgx7joliu8ArmpkOvO6dDwnqkq"
+
+
+def legacy_sign(api_params: dict, timestamp: int):
+    """BybitRestApi.sign before Signer."""
+    api_params["api_key"] = KEY
+    api_params["recv_window"] = 30 * 1000
+    api_params["timestamp"] = timestamp
+
+    data2sign = "&".join(
+        [f"{k}={v}" for k, v in sorted(api_params.items())])
+    api_params["sign"] = sign(SECRET, data2sign.encode())
+    return api_params
+
+
+def make_params():
+    return {
+        "symbol": "BTCUSD",
+        "side": "Buy",
+        "order_type": "Limit",
+        "qty": 1,
+        "price": 8600.5,
+        "time_in_force": "PostOnly",
+        "order_link_id": "2qidu456to004abj",
+    }
+
+
+if __name__ == "__main__":
+    n = 100_000
+    timestamp = 1578853524091
+    signer = Signer(KEY, SECRET)
+
+    assert legacy_sign(make_params(), timestamp) == signer.sign(make_params(), timestamp)
+
+    for name, func in [("legacy", legacy_sign), ("Signer", signer.sign)]:
+        params = [make_params() for _ in range(n)]
+        start = time.perf_counter()
+        for p in params:
+            func(p, timestamp)
+        cost = time.perf_counter() - start
+        print(f"{name:<7} {cost / n * 1e6:.2f}us per request")
@@ -0,0 +1,82 @@
+from src.bybit_gateway.gateway import BybitGateway, BatchRequest
+from src.constant import OrderType, TimeInForce
+from src.datatypes import CancelRequest, OrderRequest
+
+SYMBOLS = [{
+    "name": "BTCUSD", "alias": "BTCUSD", "status": "Trading",
+    "base_currency": "BTC", "quote_currency": "USD", "price_scale": 2,
+    "taker_fee": "0.00075", "maker_fee": "-0.00025",
+    "leverage_filter": {"min_leverage": 1, "max_leverage": 100, "leverage_step": "0.01"},
+    "price_filter": {"min_price": "0.5", "max_price": "999999.5", "tick_size": "0.5"},
+    "lot_size_filter": {"max_trading_qty": 1000000, "min_trading_qty": 1, "qty_step": 1},
+}]
+
+
+def capture(rest_api) -> list:
+    """Record request bodies instead of sending them, orders are answered as created."""
+    sent = []
+
+    def add_request(method, path, callback, data=None, **kwargs):
+        sent.append(data)
+        if path == "/v2/private/order/create":
+            result = {"order_id": "sysid-" + data["order_link_id"], "order_link_id": data["order_link_id"]}
+            callback({"ret_code": 0, "ret_msg": "OK", "result": result}, None)
+
+    rest_api.add_request = add_request
+    rest_api.add_batch_request = lambda method, path, data_list, **kwargs: sent.extend(data_list)
+    return sent
+
+
+if __name__ == "__main__":
+    gateway = BybitGateway()
+    gateway.contracts.on_symbols(SYMBOLS)
+    sent = capture(gateway.rest_api)
+
+    # Link id of order whose exchange id arrived later
+    gateway.order_manager.update_order_id_map("link-3", "sysid-3")
+
+    gateway.cancel_orders([
+        CancelRequest("sysid-1", "", "BTCUSD"),
+        CancelRequest("sysid-2", "", "BTCUSD"),
+        CancelRequest("", "link-3", "BTCUSD"),
+        CancelRequest("", "link-4", "BTCUSD"),
+    ])
+    assert sent == [
+        {"symbol": "BTCUSD", "order_id": "sysid-1"},
+        {"symbol": "BTCUSD", "order_id": "sysid-2"},
+        {"symbol": "BTCUSD", "order_id": "sysid-3"},
+        {"symbol": "BTCUSD", "order_link_id": "link-4"},
+    ], sent
+
+    # No id mapping is made up for cancelled orders
+    assert not gateway.order_manager.store.get_order_link_id("sysid-1")
+
+    sent.clear()
+    gateway.rest_api.cancel_order(CancelRequest("sysid-5", "", "BTCUSD"))
+    assert sent == [{"symbol": "BTCUSD", "order_id": "sysid-5"}], sent
+
+    # Cancel of an order without known exchange id is sent right away
+    sent.clear()
+    gateway.cancel_order(CancelRequest("", "link-1", "BTCUSD"))
+    assert sent == [{"symbol": "BTCUSD", "order_link_id": "link-1"}], sent
+
+    # Order placed through the gateway is cancelled by the order_id from its create response
+    sent.clear()
+    req = OrderRequest("BTCUSD", "", OrderType.LIMIT, 900000, 10, "Buy", TimeInForce.GOOD_TILL_CANCEL)
+    order_link_id = gateway.send_order(req)
+    assert order_link_id and sent[0]["order_link_id"] == order_link_id
+    gateway.cancel_order(CancelRequest("", order_link_id, "BTCUSD"))
+    assert sent[1] == {"symbol": "BTCUSD", "order_id": "sysid-" + order_link_id}, sent
+
+    # Each created order of a batch keeps its order_id, failed ones do not
+    batch = BatchRequest()
+    batch.results = [
+        {"ret_code": 0, "ret_msg": "OK", "result": {"order_id": "sysid-6", "order_link_id": "link-6"}},
+        {"ret_code": 30001, "ret_msg": "error", "result": None},
+        500,
+    ]
+    rest_api = gateway.rest_api
+    rest_api._batch_callback("委托下单", None, rest_api.update_order_id)(batch)
+    assert gateway.order_manager.get_order_id("link-6") == "sysid-6"
+
+    print("cancel request bodies ok")
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from threading import Thread
+
+from aiohttp import web
+
+from src.bybit_gateway.gateway import BybitGateway, RequestStatus
+from src.bybit_gateway.signer import Signer
+
+PORT = 18765
+
+
+class Records(logging.Handler):
+    """Keep error messages logged by the REST client."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def run_server():
+    async def fail(request):
+        return web.Response(status=500, text="server error")
+
+    async def broken(request):
+        return web.Response(status=200, text="not json")
+
+    app = web.Application()
+    app.router.add_post("/fail", fail)
+    app.router.add_post("/broken", broken)
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", PORT).start())
+    loop.run_forever()
+
+
+if __name__ == "__main__":
+    Thread(target=run_server, daemon=True).start()
+    time.sleep(0.5)
+
+    gateway = BybitGateway()
+    rest_api = gateway.rest_api
+    records = Records()
+    rest_api.logger.addHandler(records)
+
+    # Requests before start and after stop are failed with a clear error
+    results = []
+    request = rest_api.add_request("POST", "/fail", None)
+    assert request.status == RequestStatus.error
+    rest_api.add_batch_request("POST", "/fail", [{}, {}], callback=lambda batch: results.extend(batch.results))
+    assert len(results) == 2 and all(isinstance(r, RuntimeError) for r in results)
+    assert len(records.messages) == 1 and "not running" in records.messages[0]
+
+    rest_api.signer = Signer("key", b"secret")
+    rest_api.start(0)
+    rest_api.url_base = f"http://127.0.0.1:{PORT}"
+
+    # Non-2xx response and exception in processing are both logged
+    records.messages.clear()
+    failed = rest_api.add_request("POST", "/fail", None)
+    broken = rest_api.add_request("POST", "/broken", None)
+    for _ in range(100):
+        if len(records.messages) == 2:
+            break
+        time.sleep(0.05)
+
+    assert failed.status == RequestStatus.failed and broken.status == RequestStatus.error
+    messages = sorted(records.messages)
+    assert "500" in messages[1] and "/fail" in messages[1], messages
+    assert "JSONDecodeError" in messages[0] and "/broken" in messages[0], messages
+
+    rest_api.stop()
+    request = rest_api.add_request("POST", "/fail", None)
+    assert request.status == RequestStatus.error
+
+    print("REST errors logged")
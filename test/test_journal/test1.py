@@ -0,0 +1,100 @@
+import tempfile
+import time
+from datetime import datetime
+
+from src.constant import OrderStatus, OrderType, Side, TimeInForce
+from src.datatypes import CancelRequest, OrderData, OrderRequest, TickData
+from src.bybit_gateway.gateway import BybitGateway
+from src.journal import JournalWriter, JournalReader, RECORD_ORDER, RECORD_ORDER_REQUEST
+
+SYMBOLS = [{
+    "name": "BTCUSD", "alias": "BTCUSD", "status": "Trading",
+    "base_currency": "BTC", "quote_currency": "USD", "price_scale": 2,
+    "taker_fee": "0.00075", "maker_fee": "-0.00025",
+    "leverage_filter": {"min_leverage": 1, "max_leverage": 100, "leverage_step": "0.01"},
+    "price_filter": {"min_price": "0.5", "max_price": "999999.5", "tick_size": "0.5"},
+    "lot_size_filter": {"max_trading_qty": 1000000, "min_trading_qty": 1, "qty_step": 1},
+}]
+
+
+def make_order(status, side="Buy") -> OrderData:
+    order = OrderData("BTCUSD", "2qieisqgzv004abj", OrderType.LIMIT, 900050, 10, side,
+                      TimeInForce.POST_ONLY, 1600000000.5)
+    order.status = status
+    return order
+
+
+if __name__ == "__main__":
+    folder = tempfile.mkdtemp()
+    writer = JournalWriter(folder, segment_size=1024 * 1024)
+
+    tick = TickData("BTCUSD")
+    tick.last_price = 900050
+    tick.volume = 12345
+    tick.set_bids([(900000, 100)])
+    tick.set_asks([(900050, 200)])
+    writer.write_tick(tick)
+
+    # Enum members and their value strings are stored the same way
+    writer.write_order_request(OrderRequest("BTCUSD", "link-1", OrderType.LIMIT, 900000, 10,
+                                            Side.BUY, TimeInForce.POST_ONLY))
+    writer.write_order_request(OrderRequest("BTCUSD", "link-2", OrderType.MARKET, 0, 5,
+                                            "Sell", TimeInForce.IMMEDIATE_OR_CANCEL))
+    writer.write_order(make_order(OrderStatus.NEW))
+    writer.write_order(make_order("Filled", Side.SELL))
+    writer.write_cancel_request(CancelRequest("sysid-1", "link-1", "BTCUSD"))
+
+    # Unknown values are stored as unknown, broken records never raise
+    writer.write_order(make_order("NoSuchStatus", "Both"))
+    broken = make_order(OrderStatus.NEW)
+    broken.price = None
+    writer.write_order(broken)
+    assert writer.errors == 1
+    writer.close()
+
+    records = list(JournalReader(folder).records(datetime.now().strftime("%Y%m%d")))
+    assert [r["record_type"] for r in records] == [1, 2, 2, 3, 3, 4, 3]
+
+    tick_record = records[0]
+    assert tick_record["symbol"] == "BTCUSD" and tick_record["last_price"] == 900050
+    assert tick_record["bid_price_1"] == 900000 and tick_record["ask_volume_1"] == 200
+
+    assert records[1]["side"] == "Buy" and records[1]["time_in_force"] == TimeInForce.POST_ONLY
+    assert records[2]["side"] == "Sell" and records[2]["type"] == OrderType.MARKET
+
+    orders = [r for r in records if r["record_type"] == RECORD_ORDER]
+    assert [r["status"] for r in orders] == [OrderStatus.NEW, OrderStatus.FILLED, None]
+    assert [r["side"] for r in orders] == ["Buy", "Sell", None]
+    assert orders[0]["price"] == 900050 and orders[0]["update_time"] == 1600000000.5
+
+    assert records[5]["order_id"] == "sysid-1" and records[5]["order_link_id"] == "link-1"
+
+    # Requests sent through the gateway are journaled with the link id they are sent with
+    gateway_folder = tempfile.mkdtemp()
+    gateway = BybitGateway()
+    gateway.contracts.on_symbols(SYMBOLS)
+    gateway.open_journal(gateway_folder)
+    sent = []
+    gateway.rest_api.add_request = lambda method, path, callback, data=None, **kwargs: sent.append(data)
+    gateway.rest_api.add_batch_request = lambda method, path, data_list, **kwargs: sent.extend(data_list)
+    gateway.send_order(OrderRequest("BTCUSD", "", OrderType.LIMIT, 900000, 10, "Buy",
+                                    TimeInForce.GOOD_TILL_CANCEL))
+    gateway.send_orders([OrderRequest("BTCUSD", "", OrderType.LIMIT, 900000, 10, "Buy",
+                                      TimeInForce.GOOD_TILL_CANCEL) for _ in range(2)])
+    gateway.journal.close()
+
+    records = list(JournalReader(gateway_folder).records(datetime.now().strftime("%Y%m%d")))
+    link_ids = [r["order_link_id"] for r in records if r["record_type"] == RECORD_ORDER_REQUEST]
+    assert len(link_ids) == 3 and all(link_ids)
+    assert link_ids == [data["order_link_id"] for data in sent]
+
+    n = 100_000
+    writer = JournalWriter(folder)
+    order = make_order(OrderStatus.NEW)
+    start = time.perf_counter()
+    for _ in range(n):
+        writer.write_order(order)
+    cost = time.perf_counter() - start
+    writer.close()
+
+    print(f"journal round trip ok, write_order: {cost / n * 1e6:.2f}us per record")
@@ -0,0 +1,60 @@
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+
+from src.logger.logger import BoundedQueueHandler, BatchQueueListener, log_formatter
+
+
+def make_file_handler(path: str):
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=50 * 1024 * 1024, encoding="UTF-8")
+    handler.setFormatter(log_formatter)
+    return handler
+
+
+def measure(logger: logging.Logger, n: int):
+    """Latency of each logging call as seen by the caller, in us."""
+    headers = {"Referer": "vn.py"}
+    params = None
+    data = {"symbol": "BTCUSD", "side": "Buy", "order_type": "Limit", "qty": 1, "price": 8600.5,
+            "time_in_force": "PostOnly", "api_key": "8cxTAQ8w68MpL58rVb", "recv_window": 30000,
+            "timestamp": 1578853524091, "sign": "a" * 64}
+
+    costs = []
+    for i in range(n):
+        start = time.perf_counter_ns()
+        logger.info("[%s] sending request %s %s, headers:%s, params:%s, data:%s",
+                    i, "POST", "https://api.bybit.com/v2/private/order/create", headers, params, data)
+        costs.append(time.perf_counter_ns() - start)
+
+    costs.sort()
+    return costs[n // 2] / 1000, costs[int(n * 0.99)] / 1000, costs[-1] / 1000
+
+
+if __name__ == "__main__":
+    n = 20000
+    folder = tempfile.mkdtemp()
+
+    sync_logger = logging.getLogger("BENCH_SYNC")
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.INFO)
+    sync_logger.addHandler(make_file_handler(os.path.join(folder, "sync.log")))
+
+    queue_logger = logging.getLogger("BENCH_QUEUE")
+    queue_logger.propagate = False
+    queue_logger.setLevel(logging.INFO)
+    q = queue.Queue(10000)
+    handler = make_file_handler(os.path.join(folder, "queue.log"))
+    queue_logger.addHandler(BoundedQueueHandler(q, [handler], "block"))
+    listener = BatchQueueListener(q, [handler], 100)
+    listener.start()
+
+    for name, logger in [("sync", sync_logger), ("queue", queue_logger)]:
+        p50, p99, worst = measure(logger, n)
+        print(f"{name:<6} p50: {p50:6.2f}us  p99: {p99:7.2f}us  max: {worst:8.2f}us")
+
+    start = time.perf_counter()
+    listener.stop()
+    print(f"queue drained in {time.perf_counter() - start:.3f}s, log files in {folder}")
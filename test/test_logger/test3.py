@@ -0,0 +1,57 @@
+import logging
+import queue
+import time
+from threading import Thread
+
+from src.logger.logger import BoundedQueueHandler, BatchQueueListener, BatchStreamHandler
+
+
+class BrokenHandler(BatchStreamHandler):
+    """Fails on every other record and on every flush."""
+
+    def __init__(self):
+        super().__init__()
+        self.handled = 0
+
+    def emit(self, record):
+        self.handled += 1
+        if self.handled % 2:
+            raise ValueError("emit failed")
+
+    def handleError(self, record):
+        pass
+
+    def flush_batch(self):
+        raise OSError("disk full")
+
+
+if __name__ == "__main__":
+    logger = logging.getLogger("BROKEN_HANDLER")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    q = queue.Queue(100)
+    handler = BrokenHandler()
+    logger.addHandler(BoundedQueueHandler(q, [handler], "block"))
+    listener = BatchQueueListener(q, [handler], 10, timeout=1)
+    listener.start()
+
+    # More records than the queue holds, only returns if the listener keeps reading
+    n = 10005
+    for i in range(n):
+        logger.info("record %s", i)
+    q.join()
+    assert listener._thread.is_alive() and handler.handled == n
+
+    start = time.perf_counter()
+    listener.stop()
+    assert not listener.active and time.perf_counter() - start < 1
+
+    # A dead listener does not make stop hang on a full queue
+    q = queue.Queue(1)
+    q.put(object())
+    listener = BatchQueueListener(q, [], timeout=0.1)
+    listener._thread = Thread(target=lambda: None)
+    listener._thread.start()
+    listener.stop()
+    print(f"{handler.handled} records handled by a failing handler, listener stopped")
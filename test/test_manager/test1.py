@@ -0,0 +1,32 @@
+import time
+
+from src.manager.id_generator import UuidIdGenerator, CompactIdGenerator, MAX_ID_LENGTH
+
+
+def bench(generator, n: int):
+    next_id = generator.next_id
+    start = time.perf_counter()
+    ids = [next_id() for _ in range(n)]
+    cost = time.perf_counter() - start
+    return ids, cost
+
+
+if __name__ == "__main__":
+    n = 200_000
+
+    for name, generator in [
+        ("uuid", UuidIdGenerator(str(time.time()))),
+        ("compact", CompactIdGenerator()),
+    ]:
+        ids, cost = bench(generator, n)
+        longest = max(len(i) for i in ids)
+        print(f"{name:<8} {cost / n * 1e9:7.1f}ns per id, example: {ids[-1]}, "
+              f"max length: {longest} (limit {MAX_ID_LENGTH})")
+
+    ids, _ = bench(CompactIdGenerator(block_size=64), n)
+    assert len(set(ids)) == n, "duplicated id"
+    assert ids == sorted(ids), "ids not monotonic"
+
+    # Nodes keep processes started in the same millisecond apart
+    a, b = CompactIdGenerator(node_id=1), CompactIdGenerator(node_id=2)
+    assert a.next_id()[8:11] != b.next_id()[8:11]
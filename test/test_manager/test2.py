@@ -0,0 +1,58 @@
+from copy import copy
+
+from src.constant import OrderStatus, OrderType, TimeInForce
+from src.datatypes import OrderData
+from src.manager.order_store import OrderStore
+
+
+def make_order(order_link_id: str, status: OrderStatus) -> OrderData:
+    order = OrderData("BTCUSD", order_link_id, OrderType.LIMIT, 900000, 10, "Buy",
+                      TimeInForce.GOOD_TILL_CANCEL, 0)
+    order.status = status
+    return order
+
+
+def link_ids(orders: list) -> list:
+    return sorted(order.order_link_id for order in orders)
+
+
+if __name__ == "__main__":
+    store = OrderStore(max_terminal=1)
+    store.put(make_order("a", OrderStatus.NEW))
+    store.put(make_order("b", OrderStatus.NEW))
+
+    # Replaced by an updated copy
+    order = copy(store.get("a"))
+    order.status = OrderStatus.PARTIALLY_FILLED
+    store.put(order)
+    assert link_ids(store.get_orders_by_status(OrderStatus.NEW)) == ["b"]
+    assert link_ids(store.get_orders_by_status(OrderStatus.PARTIALLY_FILLED)) == ["a"]
+
+    # Stored object changed in place before it is put again
+    order = store.get("a")
+    order.status = OrderStatus.FILLED
+    store.put(order)
+    assert link_ids(store.get_orders_by_status(OrderStatus.PARTIALLY_FILLED)) == []
+    assert link_ids(store.get_orders_by_status(OrderStatus.FILLED)) == ["a"]
+    assert link_ids(store.get_active_orders()) == ["b"]
+
+    # Eviction finds the order under the status it is indexed with
+    order = store.get("b")
+    order.status = OrderStatus.CANCELLED
+    store.put(order)
+    assert store.get("a") is None and len(store) == 1
+    assert link_ids(store.get_orders_by_status(OrderStatus.FILLED)) == []
+    assert link_ids(store.get_orders_by_status(OrderStatus.CANCELLED)) == ["b"]
+    assert not store.get_active_orders()
+
+    # Status as received from websocket makes the order terminal
+    store = OrderStore()
+    store.put(make_order("c", "New"))
+    assert link_ids(store.get_orders_by_status(OrderStatus.NEW)) == ["c"]
+    order = copy(store.get("c"))
+    order.status = "Filled"
+    store.put(order)
+    assert store.get("c").status is OrderStatus.FILLED
+    assert not store.get_active_orders() and store._terminal[-1] == "c"
+
+    print("order store status index ok")
@@ -0,0 +1,75 @@
+import random
+import time
+
+from src.orderbook import OrderBook
+
+
+def make_level(side: str, price: float, size: int):
+    return {"price": f"{price:.2f}", "symbol": "BTCUSD", "side": side, "size": size}
+
+
+def dict_top(bids: dict, asks: dict, k: int):
+    """Previous on_depth implementation: dict keyed by float price, sorted on every update."""
+    bid_keys = sorted(bids.keys(), reverse=True)
+    ask_keys = sorted(asks.keys())
+    return bid_keys[:k], ask_keys[:k]
+
+
+if __name__ == "__main__":
+    levels = 200
+    book = OrderBook("BTCUSD", 2)
+    bids = {}
+    asks = {}
+
+    snapshot = [make_level("Buy", 9000 - i * 0.5, 100) for i in range(levels)]
+    snapshot += [make_level("Sell", 9000.5 + i * 0.5, 100) for i in range(levels)]
+    book.on_snapshot(snapshot)
+    for d in snapshot:
+        (bids if d["side"] == "Buy" else asks)[float(d["price"])] = d
+
+    deltas = []
+    for _ in range(20000):
+        side = random.choice(["Buy", "Sell"])
+        if side == "Buy":
+            price = 9000 - random.randint(0, levels) * 0.5
+        else:
+            price = 9000.5 + random.randint(0, levels) * 0.5
+        d = make_level(side, price, random.randint(1, 1000))
+        if random.random() < 0.3:
+            deltas.append({"delete": [d], "update": [], "insert": []})
+        else:
+            deltas.append({"delete": [], "update": [], "insert": [d]})
+
+    start = time.perf_counter()
+    for data in deltas:
+        book.on_delta(data["delete"], data["update"], data["insert"])
+        book.top_bids(5)
+        book.top_asks(5)
+    book_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in deltas:
+        for d in data["delete"]:
+            (bids if d["side"] == "Buy" else asks).pop(float(d["price"]), None)
+        for d in data["insert"]:
+            (bids if d["side"] == "Buy" else asks)[float(d["price"])] = d
+        dict_top(bids, asks, 5)
+    dict_cost = time.perf_counter() - start
+
+    bid_keys, ask_keys = dict_top(bids, asks, 5)
+    assert [book.to_price(p) for p, _ in book.top_bids(5)] == bid_keys
+    assert [book.to_price(p) for p, _ in book.top_asks(5)] == ask_keys
+    assert book.to_price(book.best_bid()) == bid_keys[0]
+    assert book.to_price(book.best_ask()) == ask_keys[0]
+
+    # Prices go in and out of the book as exact ticks
+    scale = book.scale
+    for price in ["9000", "9000.5", "9000.50", "0.05", "-1.25"]:
+        ticks = scale.from_str(price)
+        assert scale.from_str(scale.to_str(ticks)) == ticks
+    assert scale.from_str("9000.5") == 900050
+    assert scale.to_str(900050) == "9000.5"
+    assert scale.from_e(90005000, 4) == 900050
+
+    print(f"OrderBook: {book_cost / len(deltas) * 1e6:.2f}us per delta")
+    print(f"dict+sort: {dict_cost / len(deltas) * 1e6:.2f}us per delta")
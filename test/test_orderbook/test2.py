@@ -0,0 +1,57 @@
+import random
+import time
+
+from src.orderbook import OrderBook
+
+
+def make_level(side: str, price: float, size: int):
+    return {"price": f"{price:.2f}", "symbol": "BTCUSD", "side": side, "size": size}
+
+
+def apply_changes(levels: list, changes: tuple):
+    """Rebuild top levels on the consumer side from DepthDelta style changes."""
+    for level, price, size in changes:
+        while len(levels) < level:
+            levels.append((0, 0))
+        levels[level - 1] = (price, size)
+    while levels and levels[-1] == (0, 0):
+        levels.pop()
+
+
+if __name__ == "__main__":
+    levels = 25
+    book = OrderBook("BTCUSD", 2)
+
+    snapshot = [make_level("Buy", 9000 - i * 0.5, 100) for i in range(levels)]
+    snapshot += [make_level("Sell", 9000.5 + i * 0.5, 100) for i in range(levels)]
+    book.on_snapshot(snapshot)
+
+    bids, asks = [], []
+    bid_changes, ask_changes = book.top_changes(5)
+    apply_changes(bids, bid_changes)
+    apply_changes(asks, ask_changes)
+
+    emitted = 0
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        side = random.choice(["Buy", "Sell"])
+        if side == "Buy":
+            price = 9000 - random.randint(0, levels - 1) * 0.5
+        else:
+            price = 9000.5 + random.randint(0, levels - 1) * 0.5
+        d = make_level(side, price, random.randint(1, 1000))
+        book.on_delta([], [d], [])
+
+        bid_changes, ask_changes = book.top_changes(5)
+        if bid_changes or ask_changes:
+            emitted += 1
+            apply_changes(bids, bid_changes)
+            apply_changes(asks, ask_changes)
+
+        assert bids == book.top_bids(5)
+        assert asks == book.top_asks(5)
+    cost = time.perf_counter() - start
+
+    print(f"{emitted} of {n} updates changed top 5 ({emitted / n:.0%})")
+    print(f"{cost / n * 1e6:.2f}us per delta with top_changes and check")
@@ -0,0 +1,90 @@
+import json
+import sys
+import time
+
+from src.bybit_gateway.websocket.codec import CODECS
+
+# Frames as received from wss://stream.bybit.com/realtime
+INSTRUMENT_SNAPSHOT = (
+    '{"topic":"instrument_info.100ms.BTCUSD","type":"snapshot","data":{"id":1,"symbol":"BTCUSD",'
+    '"last_price_e4":81165000,"last_tick_direction":"ZeroPlusTick","prev_price_24h_e4":81585000,'
+    '"price_24h_pcnt_e6":-5148,"high_price_24h_e4":82900000,"low_price_24h_e4":79655000,'
+    '"prev_price_1h_e4":81395000,"price_1h_pcnt_e6":-2825,"mark_price_e4":81178500,'
+    '"index_price_e4":81172800,"open_interest":154418471,"open_value_e8":1997561103030,'
+    '"total_turnover_e8":2029370141961401,"turnover_24h_e8":9072939873591,"total_volume":175654418740,'
+    '"volume_24h":735865248,"funding_rate_e6":100,"predicted_funding_rate_e6":100,'
+    '"cross_seq":1053192577,"created_at":"2018-11-14T16:33:26Z","updated_at":"2020-01-12T18:25:16Z",'
+    '"next_funding_time":"2020-01-13T00:00:00Z","countdown_hour":6},'
+    '"cross_seq":1053192634,"timestamp_e6":1578853524091081}'
+)
+
+INSTRUMENT_DELTA = (
+    '{"topic":"instrument_info.100ms.BTCUSD","type":"delta","data":{"delete":[],"update":[{"id":1,'
+    '"symbol":"BTCUSD","prev_price_24h_e4":81565000,"price_24h_pcnt_e6":-4904,'
+    '"open_value_e8":2000479681106,"total_turnover_e8":2029370495672976,'
+    '"turnover_24h_e8":9066215468687,"volume_24h":735316391,"cross_seq":1053192657,'
+    '"created_at":"2018-11-14T16:33:26Z","updated_at":"2020-01-12T18:25:25Z"}],"insert":[]},'
+    '"cross_seq":1053192658,"timestamp_e6":1578853525691123}'
+)
+
+
+def make_depth_snapshot(levels: int = 25):
+    data = []
+    for i in range(levels):
+        price = 8600 - i * 0.5
+        data.append({"price": f"{price:.2f}", "symbol": "BTCUSD", "id": int(price * 10000),
+                     "side": "Buy", "size": 1000 + i})
+    for i in range(levels):
+        price = 8600.5 + i * 0.5
+        data.append({"price": f"{price:.2f}", "symbol": "BTCUSD", "id": int(price * 10000),
+                     "side": "Sell", "size": 1000 + i})
+    packet = {"topic": "orderBookL2_25.BTCUSD", "type": "snapshot", "data": data,
+              "cross_seq": 1053192577, "timestamp_e6": 1578853524091081}
+    return json.dumps(packet, separators=(",", ":"))
+
+
+DEPTH_DELTA = (
+    '{"topic":"orderBookL2_25.BTCUSD","type":"delta","data":{"delete":[{"price":"3508.50",'
+    '"symbol":"BTCUSD","id":35085000,"side":"Sell"}],"update":[{"price":"3508.00","symbol":"BTCUSD",'
+    '"id":35080000,"side":"Buy","size":42}],"insert":[{"price":"3509.00","symbol":"BTCUSD",'
+    '"id":35090000,"side":"Sell","size":2000}],"transactTimeE6":0},'
+    '"cross_seq":1053192578,"timestamp_e6":1578853524110084}'
+)
+
+
+if __name__ == "__main__":
+    frames = [INSTRUMENT_SNAPSHOT, make_depth_snapshot()] + [INSTRUMENT_DELTA, DEPTH_DELTA] * 50
+    frames_bytes = [f.encode() for f in frames]
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = rounds * len(frames)
+
+    results = {}
+    for name, codec in CODECS.items():
+        loads = codec.loads
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for frame in frames:
+                loads(frame)
+        results[f"{name} (str)"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for frame in frames_bytes:
+                loads(frame)
+        results[f"{name} (bytes)"] = time.perf_counter() - start
+
+    # Previous path: recv() decodes to str, then json.loads
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames_bytes:
+            json.loads(frame.decode("utf-8"))
+    results["json (decode + str), before"] = time.perf_counter() - start
+
+    baseline = results["json (decode + str), before"]
+    for name, cost in sorted(results.items(), key=lambda item: item[1]):
+        print(f"{name:<30} {cost / count * 1e6:8.2f}us per frame  x{baseline / cost:.2f}")
+
+    # JsonCodec.accepts_bytes should follow this
+    faster = results["json (bytes)"] < baseline
+    print(f"json.loads(bytes) is {'faster' if faster else 'slower'} than decode + json.loads(str)")
@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.bybit_gateway.websocket import WebsocketClient, FrameRecorder, FrameReplayer
+from src.orderbook import OrderBook
+
+
+class ReplayClient(WebsocketClient):
+    """Decode -> book pipeline of BybitWebsocketApi.on_depth, without network."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.books = {}
+        self.packets = 0
+
+    def on_packet(self, packet: dict):
+        self.packets += 1
+        topic = packet.get("topic", "")
+        if not topic.startswith("orderBookL2_25."):
+            return
+
+        symbol = topic.replace("orderBookL2_25.", "")
+        book = self.books.setdefault(symbol, OrderBook(symbol))
+        data = packet["data"]
+        if packet["type"] == "snapshot":
+            book.on_snapshot(data)
+        else:
+            book.on_delta(data["delete"], data["update"], data["insert"])
+        book.top_bids(5)
+        book.top_asks(5)
+
+
+def level(side: str, price: float, size: int = 0):
+    d = {"price": f"{price:.2f}", "symbol": "BTCUSD", "id": int(price * 10000), "side": side}
+    if size:
+        d["size"] = size
+    return d
+
+
+def make_capture(path: str, count: int):
+    """Synthetic orderBookL2_25 stream at 10ms intervals."""
+    recorder = FrameRecorder(path)
+    timestamp = time.monotonic_ns()
+
+    snapshot = [level("Buy", 8600 - i * 0.5, 100) for i in range(25)]
+    snapshot += [level("Sell", 8600.5 + i * 0.5, 100) for i in range(25)]
+    packet = {"topic": "orderBookL2_25.BTCUSD", "type": "snapshot", "data": snapshot}
+    recorder.write(json.dumps(packet), timestamp)
+
+    for _ in range(count):
+        timestamp += 10_000_000
+        side = random.choice(["Buy", "Sell"])
+        price = 8600 - random.randint(0, 24) * 0.5 if side == "Buy" else 8600.5 + random.randint(0, 24) * 0.5
+        data = {"delete": [], "update": [level(side, price, random.randint(1, 1000))], "insert": []}
+        packet = {"topic": "orderBookL2_25.BTCUSD", "type": "delta", "data": data}
+        recorder.write(json.dumps(packet), timestamp)
+
+    recorder.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        path = os.path.join(tempfile.gettempdir(), "bybit_capture.bin")
+        if os.path.exists(path):
+            os.remove(path)
+        make_capture(path, 100_000)
+
+    client = ReplayClient()
+    client.init("", codec="auto")
+
+    replayer = FrameReplayer(path)
+    replayer.replay(client, speed=0)
+
+    print(f"codec: {client.codec.name}, capture size: {os.path.getsize(path) / 1024:.0f}KB")
+    print(f"{replayer.frames} frames in {replayer.elapsed:.3f}s, "
+          f"{replayer.elapsed / replayer.frames * 1e6:.2f}us per frame")
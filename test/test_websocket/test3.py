@@ -0,0 +1,79 @@
+from main import BybitWebsocketApi, Request
+from src.datatypes import set_price_scale, TICK_DEPTH
+
+
+class FakeGateway:
+    def __init__(self):
+        self.ticks = []
+
+    def write_log(self, msg):
+        print(msg)
+
+    def on_tick(self, tick):
+        self.ticks.append(tick)
+
+    def on_depth(self, delta):
+        pass
+
+
+def instrument_snapshot(symbol: str) -> dict:
+    return {
+        "topic": f"instrument_info.100ms.{symbol}",
+        "type": "snapshot",
+        "data": {"last_price_e4": 86005000, "volume_24h": 1000, "total_volume": 5000},
+        "timestamp_e6": 1_600_000_000_000_000,
+    }
+
+
+def depth_snapshot(symbol: str) -> dict:
+    data = [
+        {"price": "8600.00", "symbol": symbol, "side": "Buy", "size": 100},
+        {"price": "8600.50", "symbol": symbol, "side": "Sell", "size": 100},
+    ]
+    return {
+        "topic": f"orderBookL2_25.{symbol}",
+        "type": "snapshot",
+        "data": data,
+        "cross_seq": 1,
+        "timestamp_e6": 1_600_000_000_100_000,
+    }
+
+
+if __name__ == "__main__":
+    symbol = "SCALEUSD"  # no price scale set yet
+    gateway = FakeGateway()
+    api = BybitWebsocketApi(gateway)
+
+    resubscribed = []
+    api.resubscribe = resubscribed.append
+    api.subscribe(Request(f"instrument_info.100ms.{symbol}"))
+    api.subscribe(Request(f"orderBookL2_25.{symbol}"))
+
+    # Market data arrives before contracts are loaded
+    api.on_packet(instrument_snapshot(symbol))
+    assert gateway.ticks[-1].price_scale.scale == 4
+
+    set_price_scale(symbol, 2)
+
+    # Data of the old scale is dropped and snapshots are requested again
+    api.on_packet(depth_snapshot(symbol))
+    assert symbol not in api.ticks and symbol not in api.books
+    assert sorted(resubscribed) == sorted(api.subscribed), resubscribed
+    assert len(gateway.ticks) == 1
+
+    api.on_packet(instrument_snapshot(symbol))
+    api.on_packet(depth_snapshot(symbol))
+    tick = gateway.ticks[-1]
+    assert tick.price_scale.scale == api.books[symbol].price_scale == 2
+    assert tick.to_price(tick.last_price) == 8600.5
+    assert tick.to_price(tick.bid_prices[0]) == 8600.0
+    assert tick.to_price(tick.ask_prices[0]) == 8600.5
+    assert len(tick.bid_prices) == TICK_DEPTH
+
+    # Setting the same scale again keeps the data
+    set_price_scale(symbol, 2)
+    resubscribed.clear()
+    api.on_packet(depth_snapshot(symbol))
+    assert not resubscribed and symbol in api.books
+
+    print("price scale change ok")
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from src.bybit_gateway.websocket.AsyncWebsocketClient import AsyncWebsocketClient, WebsocketLoop
+
+
+class ClosedSocket:
+    """Socket whose sends fail like a connection closed under them."""
+
+    async def send_str(self, text: str):
+        raise ConnectionResetError("Cannot write to closing transport")
+
+
+class Client(AsyncWebsocketClient):
+
+    def __init__(self, loop: WebsocketLoop):
+        super().__init__(None, loop)
+        self.errors = []
+
+    def on_error(self, exception_type, exception_value, tb):
+        self.errors.append(exception_value)
+
+
+async def get_ssl(ws_loop: WebsocketLoop):
+    return ws_loop.get_session().connector._ssl
+
+
+if __name__ == "__main__":
+    ws_loop = WebsocketLoop()
+    ws_loop.start()
+
+    # Certificates are checked unless turned off explicitly
+    assert asyncio.run_coroutine_threadsafe(get_ssl(ws_loop), ws_loop.loop).result() is not False
+    insecure = WebsocketLoop(verify_ssl=False)
+    insecure.start()
+    assert asyncio.run_coroutine_threadsafe(get_ssl(insecure), insecure.loop).result() is False
+    insecure.stop()
+
+    # Failed sends reach on_error, from other threads and from the loop thread
+    client = Client(ws_loop)
+    client._ws = ClosedSocket()
+    client.send_packet({"op": "ping"})
+    ws_loop.loop.call_soon_threadsafe(client.send_packet, {"op": "ping"})
+    for _ in range(100):
+        if len(client.errors) == 2:
+            break
+        time.sleep(0.01)
+    assert len(client.errors) == 2, client.errors
+    assert all(isinstance(e, ConnectionResetError) for e in client.errors)
+
+    ws_loop.stop()
+    print("send errors reported, tls verified by default")
@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+from src.bybit_gateway.websocket import FrameRecorder
+from src.bybit_gateway.websocket.recorder import read_frames
+
+
+def record(path: str, frames: list):
+    recorder = FrameRecorder(path)
+    for i, data in enumerate(frames):
+        recorder.write(data, i)
+        recorder.flush()
+    recorder.close()
+
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.mkdtemp(), "capture.bin")
+
+    record(path, [b"first", b"second"])
+    size = os.path.getsize(path)
+
+    # Last chunk cut short by a crash
+    with open(path, "r+b") as f:
+        f.truncate(size - 3)
+
+    # Appending after it drops the partial chunk, the file stays readable
+    record(path, [b"third", b"fourth"])
+    assert [data for _, data in read_frames(path)] == [b"first", b"third", b"fourth"]
+
+    # Partial chunk header is dropped too
+    with open(path, "ab") as f:
+        f.write(b"BYW")
+    record(path, [b"fifth"])
+    assert [data for _, data in read_frames(path)] == [b"first", b"third", b"fourth", b"fifth"]
+
+    print("capture file appended after a partial chunk")